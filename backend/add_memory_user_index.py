@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Migration script to index user_memories by (user_id, created_at).
+Chat turns look up each user's memory count and newest memory to decide
+whether their retrieval index is current; without this index that is a
+scan of every user's memories.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_memory_user_index():
+    """Create the (user_id, created_at) index on user_memories if it is missing"""
+    with app.app_context():
+        try:
+            db.session.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_user_memories_user_id_created_at
+                ON user_memories (user_id, created_at)
+            """))
+            db.session.commit()
+            print("✅ user_memories (user_id, created_at) index is in place")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error creating user_memories index: {e}")
+            # Fail the release step rather than report the migration as done
+            raise
+
+if __name__ == '__main__':
+    add_memory_user_index()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Migration script for full-text message search.
+Adds messages.search_vector (to_tsvector('english', content) plus a lexeme
+naming the conversation's user, see message_search.py) with a trigger that
+keeps it current on insert and edit, backfills existing rows in id order,
+then builds the GIN index over it. Also indexes messages by conversation
+and conversations by user, which loading a conversation and the sidebar
+list otherwise scan the whole table for.
+The column is filled by a trigger rather than declared GENERATED because
+adding a stored generated column rewrites the whole table under an
+exclusive lock; this way every step can run against a live database.
+Safe to run more than once.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+from message_search import SCOPE_PREFIX
+from sqlalchemy import text
+
+BATCH_SIZE = 5000
+
+INDEXES = (
+    ('ix_messages_search_vector', 'messages USING gin (search_vector)'),
+    ('ix_messages_conversation_id_created_at', 'messages (conversation_id, created_at)'),
+    ('ix_conversations_user_id_updated_at', 'conversations (user_id, updated_at)'),
+)
+
+def create_index_concurrently(name, definition):
+    """CREATE INDEX CONCURRENTLY, replacing an invalid leftover from an interrupted earlier run"""
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        # Index builds on a large table run far past the app's statement_timeout
+        connection.execute(text("SET statement_timeout = 0"))
+        valid = connection.execute(text("""
+            SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)
+        """), {'name': name}).scalar()
+        if valid is False:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+
+def add_message_search():
+    """Add the search column, its trigger, backfill and indexes"""
+    with app.app_context():
+        try:
+            db.session.execute(text("""
+                ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector
+            """))
+            db.session.execute(text(f"""
+                CREATE OR REPLACE FUNCTION messages_search_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := to_tsvector('english', NEW.content) || array_to_tsvector(ARRAY[
+                        (SELECT '{SCOPE_PREFIX}' || user_id FROM conversations WHERE id = NEW.conversation_id)
+                    ]);
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            """))
+            db.session.execute(text("""
+                DROP TRIGGER IF EXISTS messages_search_vector_update ON messages
+            """))
+            db.session.execute(text("""
+                CREATE TRIGGER messages_search_vector_update
+                BEFORE INSERT OR UPDATE OF content, conversation_id ON messages
+                FOR EACH ROW EXECUTE FUNCTION messages_search_vector_update()
+            """))
+            db.session.commit()
+            print("✅ messages.search_vector column and trigger are in place")
+
+            # Walk the primary key so each batch is an index range, not a rescan for NULLs
+            filled, after = 0, ''
+            while True:
+                last = db.session.execute(text("""
+                    SELECT max(id) FROM (
+                        SELECT id FROM messages WHERE id > :after ORDER BY id LIMIT :batch_size
+                    ) AS batch
+                """), {'after': after, 'batch_size': BATCH_SIZE}).scalar()
+                if last is None:
+                    # End this read's transaction: CREATE INDEX CONCURRENTLY waits for every open one
+                    db.session.commit()
+                    break
+                filled += db.session.execute(text(f"""
+                    UPDATE messages m
+                    SET search_vector = to_tsvector('english', m.content)
+                        || array_to_tsvector(ARRAY['{SCOPE_PREFIX}' || c.user_id])
+                    FROM conversations c
+                    WHERE c.id = m.conversation_id
+                      AND m.id > :after AND m.id <= :last AND m.search_vector IS NULL
+                """), {'after': after, 'last': last}).rowcount
+                db.session.commit()
+                after = last
+            print(f"✅ Backfilled search_vector for {filled} messages")
+
+            for name, definition in INDEXES:
+                create_index_concurrently(name, definition)
+            print("✅ Message search indexes are in place")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error adding message search: {e}")
+            # Fail the release step: message search can't query a half-migrated schema
+            raise
+
+if __name__ == '__main__':
+    add_message_search()
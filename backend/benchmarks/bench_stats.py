@@ -0,0 +1,12 @@
+"""
+Summary statistics shared by the benchmark scripts
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank `pct` percentile (0-100) of `values`; 0.0 when there are none"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
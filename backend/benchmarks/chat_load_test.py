@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Concurrent chat stream load generator
+
+Finds how many concurrent /api/chatOpenAI streams a gunicorn worker
+configuration sustains. The upstream is benchmarks/mock_openai.py emitting
+tokens at a fixed rate, so every turn holds a worker thread for roughly
+header latency + tokens * token delay. Concurrency is ramped through
+--levels; at each level every client runs chat turns back to back for
+--duration seconds and the tool records:
+
+  - time to first byte of the response body
+  - gaps between received chunks (p95/max show stalls behind busy workers)
+  - completion rate (turns ending in a 'complete' frame / turns started)
+  - CPU and RSS of the gunicorn master and workers, from /proc
+
+The saturation point is the first level where the completion rate drops
+below --min-completion, p95 TTFB exceeds --ttfb-factor times that of the
+first level, or turn throughput stops growing.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python benchmarks/seed.py --reset
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/chat_load_test.py --workers 2 --threads 8 --levels 4,8,16,32 \\
+        --token-delay-ms 25 --output chat-load.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import mock_openai  # noqa: E402
+from bench_stats import percentile  # noqa: E402
+from endpoint_bench import start_server  # noqa: E402
+from seed import username  # noqa: E402
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class ProcessSampler:
+    """Samples CPU time and RSS of a process tree from /proc (Linux only)"""
+
+    def __init__(self, root_pid, interval=0.5):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.samples = []  # (monotonic, cpu seconds, rss bytes)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _tree(self):
+        pids = [self.root_pid]
+        try:
+            for entry in os.listdir('/proc'):
+                if entry.isdigit():
+                    with open(f'/proc/{entry}/stat') as f:
+                        fields = f.read().rsplit(')', 1)[1].split()
+                    if int(fields[1]) == self.root_pid:
+                        pids.append(int(entry))
+        except OSError:
+            pass
+        return pids
+
+    def _sample(self):
+        cpu, rss = 0.0, 0
+        for pid in self._tree():
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+                with open(f'/proc/{pid}/statm') as f:
+                    rss += int(f.read().split()[1]) * PAGE_SIZE
+            except (OSError, IndexError, ValueError):
+                continue
+        return time.monotonic(), cpu, rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(self._sample())
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if os.path.isdir('/proc'):
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if not self.samples:
+            return {}
+        self.samples.append(self._sample())
+        if len(self.samples) < 2:
+            return {}
+        (t0, cpu0, _), (t1, cpu1, _) = self.samples[0], self.samples[-1]
+        return {
+            'cpu_percent': round(100 * (cpu1 - cpu0) / (t1 - t0), 1) if t1 > t0 else 0.0,
+            'rss_max_mb': round(max(rss for _, _, rss in self.samples) / 1e6, 1),
+        }
+
+
+def load_conversations(base_url, users):
+    conversations = {}
+    session = requests.Session()
+    for user_index in range(users):
+        user = username(user_index)
+        response = session.get(f'{base_url}/api/conversations', params={'user_id': user}, timeout=30)
+        response.raise_for_status()
+        ids = [c['id'] for c in response.json().get('conversations', [])]
+        if ids:
+            conversations[user] = ids
+    if not conversations:
+        raise SystemExit('❌ No seeded conversations found; run benchmarks/seed.py first')
+    return conversations
+
+
+def chat_turn(session, base_url, user, conversation_id, timeout):
+    """Run one streamed turn; returns (ttfb, chunk gaps, completed)"""
+    started = time.perf_counter()
+    response = session.post(f'{base_url}/api/chatOpenAI', json={
+        'message': 'load test message, what should I do this weekend?',
+        'user_id': user,
+        'conversation_id': conversation_id,
+    }, stream=True, timeout=timeout)
+    if response.status_code != 200:
+        response.close()
+        return None, [], False
+
+    ttfb, gaps, last, body = None, [], None, b''
+    for chunk in response.iter_content(chunk_size=None):
+        now = time.perf_counter()
+        if ttfb is None:
+            ttfb = now - started
+        elif last is not None:
+            gaps.append(now - last)
+        last = now
+        body += chunk
+    return ttfb, gaps, b'"type": "complete"' in body
+
+
+def run_level(base_url, conversations, concurrency, duration, timeout, seed, server_pid):
+    ttfbs, gaps, errors = [], [], []
+    started_turns = completed_turns = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        nonlocal started_turns, completed_turns
+        session = requests.Session()
+        rng = random.Random(seed * 1000 + index)
+        while time.monotonic() < deadline:
+            user = rng.choice(list(conversations))
+            with lock:
+                started_turns += 1
+            try:
+                ttfb, turn_gaps, completed = chat_turn(session, base_url, user, rng.choice(conversations[user]), timeout)
+            except requests.RequestException as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                continue
+            with lock:
+                if ttfb is not None:
+                    ttfbs.append(ttfb)
+                gaps.extend(turn_gaps)
+                if completed:
+                    completed_turns += 1
+
+    sampler = ProcessSampler(server_pid).start() if server_pid else None
+    wall_started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - wall_started
+    resources = sampler.stop() if sampler else {}
+
+    return {
+        'concurrency': concurrency,
+        'turns_started': started_turns,
+        'turns_completed': completed_turns,
+        'completion_rate': round(completed_turns / started_turns, 4) if started_turns else 0.0,
+        'turns_per_second': round(completed_turns / wall, 2),
+        'errors': len(errors),
+        'ttfb_p50_ms': round(percentile(ttfbs, 50) * 1000, 1),
+        'ttfb_p95_ms': round(percentile(ttfbs, 95) * 1000, 1),
+        'gap_p50_ms': round(percentile(gaps, 50) * 1000, 1),
+        'gap_p95_ms': round(percentile(gaps, 95) * 1000, 1),
+        'gap_max_ms': round(max(gaps) * 1000, 1) if gaps else 0.0,
+        **resources,
+    }
+
+
+def find_saturation(levels, min_completion, ttfb_factor):
+    """Return (concurrency, reason) for the first level past capacity, or (None, None)"""
+    first = levels[0]
+    previous = None
+    for level in levels:
+        if level['completion_rate'] < min_completion:
+            return level['concurrency'], f"completion rate {level['completion_rate']:.1%}"
+        if first['ttfb_p95_ms'] and level['ttfb_p95_ms'] > ttfb_factor * first['ttfb_p95_ms']:
+            return level['concurrency'], f"p95 TTFB {level['ttfb_p95_ms']:.0f}ms > {ttfb_factor}x baseline"
+        # Doubling clients should buy close to double the turns until the pool is full
+        if previous and level['turns_per_second'] < previous['turns_per_second'] * 1.1:
+            return level['concurrency'], 'throughput stopped growing'
+        previous = level
+    return None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the concurrent chat stream capacity of a worker configuration')
+    parser.add_argument('--base-url', help='Use a running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--worker-class', default='gthread')
+    parser.add_argument('--levels', default='2,4,8,16,32', help='Comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per level')
+    parser.add_argument('--users', type=int, default=20, help='Seeded users whose conversations are used')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--min-completion', type=float, default=0.99)
+    parser.add_argument('--ttfb-factor', type=float, default=3.0)
+    parser.add_argument('--output', default='chat-load.json')
+    parser.add_argument('--mock-port', type=int, default=8766)
+    parser.add_argument('--header-latency-ms', type=float, default=300)
+    parser.add_argument('--token-delay-ms', type=float, default=25)
+    parser.add_argument('--tokens', type=int, default=60)
+    args = parser.parse_args()
+
+    mock_config = mock_openai.build_parser().parse_args([
+        '--port', str(args.mock_port),
+        '--header-latency-ms', str(args.header_latency_ms),
+        '--token-delay-ms', str(args.token_delay_ms),
+        '--tokens', str(args.tokens),
+    ])
+    mock_server = mock_openai.start_in_thread(mock_config)
+    mock_url = f'http://{mock_config.host}:{mock_config.port}/v1'
+
+    process = None
+    if args.base_url:
+        base_url = args.base_url.rstrip('/')
+    else:
+        process, base_url = start_server(args.port, args.workers, args.threads, mock_url, args.worker_class)
+
+    levels = []
+    try:
+        conversations = load_conversations(base_url, args.users)
+        for concurrency in (int(level) for level in args.levels.split(',')):
+            stats = run_level(base_url, conversations, concurrency, args.duration, args.timeout,
+                              args.seed, process.pid if process else None)
+            levels.append(stats)
+            print(f"📊 c={concurrency:<4} {stats['turns_per_second']:>6.2f} turns/s  "
+                  f"complete={stats['completion_rate']:.1%}  ttfb p50/p95={stats['ttfb_p50_ms']:.0f}/{stats['ttfb_p95_ms']:.0f}ms  "
+                  f"gap p95/max={stats['gap_p95_ms']:.0f}/{stats['gap_max_ms']:.0f}ms  "
+                  f"cpu={stats.get('cpu_percent', '-')}% rss={stats.get('rss_max_mb', '-')}MB")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        mock_server.shutdown()
+
+    saturation, reason = find_saturation(levels, args.min_completion, args.ttfb_factor)
+    config = {'worker_class': args.worker_class, 'workers': args.workers, 'threads': args.threads}
+    if saturation:
+        print(f"🧱 Saturated at {saturation} concurrent streams ({reason}) "
+              f"with {args.workers} {args.worker_class} workers x {args.threads} threads")
+    else:
+        print(f"✅ No saturation up to {levels[-1]['concurrency']} concurrent streams")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'server': config,
+            'mock': {key: getattr(mock_config, key) for key in ('header_latency_ms', 'token_delay_ms', 'tokens')},
+            'levels': levels,
+            'saturation': {'concurrency': saturation, 'reason': reason},
+        }, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
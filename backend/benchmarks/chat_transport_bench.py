@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+HTTP streaming vs Socket.IO chat turn benchmark
+
+Runs the same chat turns through POST /api/chatOpenAI (one streamed HTTP
+response per turn) and through the chat_send Socket.IO event (one
+persistent connection per client), against a gunicorn server whose
+upstream is benchmarks/mock_openai.py. For each transport it reports time
+to first chunk, turn time (send to complete) and the per-turn overhead
+above what the mock itself takes (header latency + tokens x token delay).
+
+A final check runs a deliberately slow Socket.IO client that takes
+--slow-ack-ms to acknowledge each chunk: its turn must still deliver the
+full reply, with tokens merged into fewer chunks instead of queueing.
+
+The Python client needs the websocket-client package for
+--socket-transport websocket; polling works with no extra packages.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python benchmarks/seed.py --reset
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/chat_transport_bench.py --turns 30 --clients 4
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+import socketio as socketio_client
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import mock_openai  # noqa: E402
+from chat_load_test import load_conversations  # noqa: E402
+from bench_stats import percentile  # noqa: E402
+from endpoint_bench import start_server  # noqa: E402
+
+MESSAGE = 'transport benchmark message, how was your day?'
+
+
+def http_turn(session, base_url, user, conversation_id):
+    """Returns (first chunk seconds, turn seconds, content, chunk count)"""
+    started = time.perf_counter()
+    response = session.post(f'{base_url}/api/chatOpenAI', json={
+        'message': MESSAGE, 'user_id': user, 'conversation_id': conversation_id,
+    }, stream=True, timeout=60)
+    first, content, chunks, complete = None, '', 0, False
+    buffer = ''
+    for data in response.iter_content(chunk_size=None, decode_unicode=True):
+        buffer += data
+        while '\n\n' in buffer:
+            frame, buffer = buffer.split('\n\n', 1)
+            if not frame.startswith('data: '):
+                continue
+            event = json.loads(frame[6:])
+            if event['type'] == 'chunk':
+                if first is None:
+                    first = time.perf_counter() - started
+                content += event['content']
+                chunks += 1
+            elif event['type'] == 'complete':
+                complete = True
+    if not complete:
+        raise RuntimeError('HTTP turn ended without a complete frame')
+    return first, time.perf_counter() - started, content, chunks
+
+
+class SocketChatClient:
+    """One persistent Socket.IO connection running turns with chat_send"""
+
+    def __init__(self, base_url, transport, ack_delay=0.0):
+        self.ack_delay = ack_delay
+        self._refs = itertools.count()
+        self._turn = None
+        self._done = threading.Event()
+        self.client = socketio_client.Client()
+        self.client.on('chat_chunk', self._on_chunk)
+        self.client.on('chat_complete', lambda data: self._finish(data, None))
+        self.client.on('chat_error', lambda data: self._finish(data, data.get('error')))
+        self.client.connect(base_url, transports=[transport])
+
+    def _on_chunk(self, data):
+        turn = self._turn
+        if turn is not None and data.get('client_ref') == turn['ref']:
+            if turn['first'] is None:
+                turn['first'] = time.perf_counter() - turn['started']
+            turn['content'] += data['content']
+            turn['chunks'] += 1
+        if self.ack_delay:
+            time.sleep(self.ack_delay)
+        # Returning from the handler sends the ack the server's window waits for
+        return True
+
+    def _finish(self, data, error):
+        turn = self._turn
+        if turn is not None and data.get('client_ref') == turn['ref']:
+            turn['error'] = error
+            turn['elapsed'] = time.perf_counter() - turn['started']
+            self._done.set()
+
+    def turn(self, user, conversation_id, timeout=60):
+        ref = f'bench-{next(self._refs)}'
+        self._done.clear()
+        self._turn = {'ref': ref, 'started': time.perf_counter(), 'first': None, 'content': '',
+                      'chunks': 0, 'error': None, 'elapsed': None}
+        self.client.emit('chat_send', {'message': MESSAGE, 'user_id': user,
+                                       'conversation_id': conversation_id, 'client_ref': ref})
+        if not self._done.wait(timeout):
+            raise RuntimeError('Socket.IO turn timed out')
+        turn = self._turn
+        if turn['error']:
+            raise RuntimeError(turn['error'])
+        return turn['first'], turn['elapsed'], turn['content'], turn['chunks']
+
+    def close(self):
+        self.client.disconnect()
+
+
+def run_transport(name, make_runner, conversations, clients, turns, seed):
+    firsts, totals, errors, finished = [], [], [], []
+    lock = threading.Lock()
+    # Connecting (and a polling client's disconnect) is not part of a turn, so the clock
+    # starts once every client is connected and stops when the last turn is done
+    ready = threading.Barrier(clients + 1)
+
+    def worker(index):
+        rng = random.Random(seed * 100 + index)
+        run, close = make_runner()
+        ready.wait()
+        try:
+            for _ in range(turns):
+                user = rng.choice(list(conversations))
+                try:
+                    first, total, _, _ = run(user, rng.choice(conversations[user]))
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                with lock:
+                    firsts.append(first)
+                    totals.append(total)
+            with lock:
+                finished.append(time.monotonic())
+        finally:
+            close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    started = time.monotonic()
+    for t in threads:
+        t.join()
+    wall = max(finished, default=started) - started
+    return {
+        'transport': name,
+        'turns': len(totals),
+        'errors': len(errors),
+        'turns_per_second': round(len(totals) / wall, 2) if wall > 0 else 0.0,
+        'first_chunk_p50_ms': round(percentile(firsts, 50) * 1000, 1),
+        'first_chunk_p95_ms': round(percentile(firsts, 95) * 1000, 1),
+        'turn_p50_ms': round(percentile(totals, 50) * 1000, 1),
+        'turn_p95_ms': round(percentile(totals, 95) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare chat turn overhead over HTTP streaming and Socket.IO')
+    parser.add_argument('--base-url', help='Use a running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=5060)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--turns', type=int, default=20, help='Turns per client per transport')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--socket-transport', choices=['polling', 'websocket'], default='polling')
+    parser.add_argument('--mock-port', type=int, default=8769)
+    parser.add_argument('--header-latency-ms', type=float, default=50)
+    parser.add_argument('--token-delay-ms', type=float, default=5)
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--slow-ack-ms', type=float, default=100, help='Ack delay of the slow-client check (0 = skip)')
+    parser.add_argument('--output', default='chat-transport.json')
+    args = parser.parse_args()
+
+    mock_config = mock_openai.build_parser().parse_args([
+        '--port', str(args.mock_port), '--header-latency-ms', str(args.header_latency_ms),
+        '--token-delay-ms', str(args.token_delay_ms), '--tokens', str(args.tokens), '--memory-every', '0'])
+    mock_server = mock_openai.start_in_thread(mock_config)
+    mock_url = f'http://{mock_config.host}:{mock_config.port}/v1'
+    upstream_ms = args.header_latency_ms + args.tokens * args.token_delay_ms
+
+    process = None
+    if args.base_url:
+        base_url = args.base_url.rstrip('/')
+    else:
+        process, base_url = start_server(args.port, args.workers, args.threads, mock_url)
+
+    results, failed = [], False
+    try:
+        conversations = load_conversations(base_url, args.users)
+
+        def http_runner():
+            session = requests.Session()
+            return (lambda user, conversation_id: http_turn(session, base_url, user, conversation_id)), session.close
+
+        def socket_runner():
+            client = SocketChatClient(base_url, args.socket_transport)
+            return client.turn, client.close
+
+        for name, runner in (('http', http_runner), (f'socketio-{args.socket_transport}', socket_runner)):
+            stats = run_transport(name, runner, conversations, args.clients, args.turns, args.seed)
+            stats['overhead_p50_ms'] = round(stats['turn_p50_ms'] - upstream_ms, 1)
+            results.append(stats)
+            failed |= bool(stats['errors'])
+            print(f"📊 {name:<18} {stats['turns_per_second']:>6.2f} turns/s  first chunk p50/p95="
+                  f"{stats['first_chunk_p50_ms']:.0f}/{stats['first_chunk_p95_ms']:.0f}ms  turn p50/p95="
+                  f"{stats['turn_p50_ms']:.0f}/{stats['turn_p95_ms']:.0f}ms  overhead p50={stats['overhead_p50_ms']:.0f}ms  "
+                  f"errors={stats['errors']}")
+
+        slow = None
+        if args.slow_ack_ms:
+            user = next(iter(conversations))
+            _, _, expected, http_chunks = http_turn(requests.Session(), base_url, user, conversations[user][0])
+            client = SocketChatClient(base_url, args.socket_transport, ack_delay=args.slow_ack_ms / 1000)
+            try:
+                _, elapsed, content, chunks = client.turn(user, conversations[user][0], timeout=120)
+            finally:
+                client.close()
+            ok = content == expected and chunks < http_chunks
+            failed |= not ok
+            slow = {'ack_delay_ms': args.slow_ack_ms, 'chunks': chunks, 'tokens': http_chunks,
+                    'turn_ms': round(elapsed * 1000, 1), 'content_matches': content == expected}
+            print(f"{'✅' if ok else '❌'} slow client ({args.slow_ack_ms:.0f}ms per ack): full reply in {chunks} chunks "
+                  f"for {http_chunks} tokens, {elapsed * 1000:.0f}ms")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        mock_server.shutdown()
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'server': {'workers': args.workers, 'threads': args.threads},
+            'mock': {key: getattr(mock_config, key) for key in ('header_latency_ms', 'token_delay_ms', 'tokens')},
+            'transports': results,
+            'slow_client': slow,
+        }, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
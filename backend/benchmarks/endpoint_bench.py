@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite
+
+Measures throughput and p50/p95/p99 latency of the main API endpoints
+against the dataset written by benchmarks/seed.py, with the OpenAI
+upstream replaced by benchmarks/mock_openai.py. By default the script
+starts both the mock and a gunicorn server pointed at it (via
+OPENAI_API_BASE); pass --base-url to measure an already running server
+instead (that server must be started with OPENAI_API_BASE pointing at a
+mock for the chat scenario).
+
+Results are written as JSON (--output). Passing --baseline with an
+earlier result file prints per-endpoint deltas and exits non-zero when
+p95 latency or throughput regresses by more than --tolerance.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python benchmarks/seed.py --reset
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/endpoint_bench.py --duration 20 --concurrency 16 \\
+        --output bench-results.json --baseline bench-baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import mock_openai  # noqa: E402
+from bench_stats import percentile  # noqa: E402
+from seed import username  # noqa: E402
+
+SCENARIOS = ('memories', 'conversations', 'search_users', 'user_profile', 'chat')
+
+
+class Scenario:
+    """Builds requests for one endpoint from the seeded users"""
+
+    def __init__(self, name, base_url, users, rng):
+        self.name = name
+        self.base_url = base_url
+        self.users = users
+        self.rng = rng
+        self.conversations = {}
+
+    def prepare(self, session):
+        if self.name != 'chat':
+            return
+        # Chat turns are appended to existing seeded conversations
+        for user_index in range(min(self.users, 20)):
+            user = username(user_index)
+            response = session.get(f'{self.base_url}/api/conversations', params={'user_id': user}, timeout=30)
+            response.raise_for_status()
+            ids = [c['id'] for c in response.json().get('conversations', [])]
+            if ids:
+                self.conversations[user] = ids
+
+    def call(self, session, rng):
+        user = username(rng.randrange(self.users))
+        if self.name == 'memories':
+            return session.get(f'{self.base_url}/api/memories', params={'user_id': user}, timeout=60)
+        if self.name == 'conversations':
+            return session.get(f'{self.base_url}/api/conversations', params={'user_id': user}, timeout=60)
+        if self.name == 'search_users':
+            return session.get(f'{self.base_url}/api/search-users',
+                               params={'username': f'bench_user_{rng.randrange(10)}', 'user_id': user}, timeout=60)
+        if self.name == 'user_profile':
+            return session.get(f'{self.base_url}/api/user-profile/{username(rng.randrange(self.users))}',
+                               params={'user_id': user}, timeout=60)
+        # chat: stream the whole response so latency covers the full turn
+        user = rng.choice(list(self.conversations))
+        response = session.post(f'{self.base_url}/api/chatOpenAI', json={
+            'message': 'benchmark message, how was your day?',
+            'user_id': user,
+            'conversation_id': rng.choice(self.conversations[user]),
+        }, stream=True, timeout=60)
+        for _ in response.iter_content(chunk_size=None):
+            pass
+        return response
+
+
+def run_scenario(scenario, concurrency, duration, seed):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(worker_index):
+        session = requests.Session()
+        rng = random.Random(seed * 1000 + worker_index)
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = scenario.call(session, rng)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if response.status_code >= 400:
+                        errors.append(response.status_code)
+                    else:
+                        latencies.append(elapsed)
+            except requests.RequestException as e:
+                with lock:
+                    errors.append(type(e).__name__)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def start_server(port, workers, threads, mock_url, worker_class='gthread'):
+    """Start gunicorn on app:app with the upstream pointed at the mock; returns (process, base_url)"""
+    env = dict(os.environ, OPENAI_API_BASE=mock_url, OPENAI_API_KEY='sk-benchmark', LOG_LEVEL='WARNING')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--worker-class', worker_class,
+         '--workers', str(workers), '--threads', str(threads), '--timeout', '120', 'app:app'],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base_url}/api/health', timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('❌ Backend did not become healthy within 30s')
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'endpoint':<15} {'p95 ms':>18} {'rps':>18}")
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        p95_change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0.0
+        rps_change = (current['throughput_rps'] - previous['throughput_rps']) / previous['throughput_rps'] \
+            if previous['throughput_rps'] else 0.0
+        flag = ''
+        if p95_change > tolerance or rps_change < -tolerance:
+            regressions.append(name)
+            flag = '  ❌'
+        print(f"{name:<15} {previous['p95_ms']:>7.1f} → {current['p95_ms']:>7.1f} "
+              f"{previous['throughput_rps']:>7.1f} → {current['throughput_rps']:>7.1f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput and latency benchmark for the main endpoints')
+    parser.add_argument('--base-url', help='Use a running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--users', type=int, default=200, help='Seeded users to draw from (match seed.py --users)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per scenario')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', default='bench-results.json')
+    parser.add_argument('--baseline', help='Earlier result file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed regression fraction')
+    parser.add_argument('--mock-port', type=int, default=8765)
+    parser.add_argument('--header-latency-ms', type=float, default=300)
+    parser.add_argument('--token-delay-ms', type=float, default=20)
+    parser.add_argument('--tokens', type=int, default=60)
+    parser.add_argument('--completion-ms', type=float, default=500)
+    args = parser.parse_args()
+
+    mock_config = mock_openai.build_parser().parse_args([
+        '--port', str(args.mock_port),
+        '--header-latency-ms', str(args.header_latency_ms),
+        '--token-delay-ms', str(args.token_delay_ms),
+        '--tokens', str(args.tokens),
+        '--completion-ms', str(args.completion_ms),
+    ])
+    mock_server = mock_openai.start_in_thread(mock_config)
+    mock_url = f'http://{mock_config.host}:{mock_config.port}/v1'
+
+    process = None
+    if args.base_url:
+        base_url = args.base_url.rstrip('/')
+    else:
+        process, base_url = start_server(args.port, args.workers, args.threads, mock_url)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_rev': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                      capture_output=True, text=True).stdout.strip(),
+            'python': platform.python_version(),
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'users': args.users,
+            'seed': args.seed,
+            'mock': {key: getattr(mock_config, key) for key in ('header_latency_ms', 'token_delay_ms', 'tokens', 'completion_ms')},
+        },
+        'endpoints': {},
+    }
+
+    try:
+        session = requests.Session()
+        for name in args.scenarios.split(','):
+            scenario = Scenario(name, base_url, args.users, random.Random(args.seed))
+            scenario.prepare(session)
+            stats = run_scenario(scenario, args.concurrency, args.duration, args.seed)
+            results['endpoints'][name] = stats
+            print(f"📊 {name:<15} {stats['throughput_rps']:>7.1f} rps  p50={stats['p50_ms']:.1f}ms "
+                  f"p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms errors={stats['errors']}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        mock_server.shutdown()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions beyond tolerance")
+
+
+if __name__ == '__main__':
+    main()
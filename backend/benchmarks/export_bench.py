@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Conversation export benchmark
+
+Seeds one account with --messages messages spread over --conversations
+conversations, then downloads it on a fresh gunicorn server per mode:
+
+  - jsonl / markdown: GET /api/conversations/export for the whole account
+  - to_dict: the existing GET /api/conversations/<id>/messages for every
+    conversation (the whole history is built in memory per response)
+
+For each mode it records time to first byte, total time, bytes received
+and how far the server's RSS (sampled from /proc) rose above its idle
+level, which for the export should not depend on --messages. Seeded rows
+belong to the user `bench_export_user` and are replaced on every run.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/export_bench.py --messages 100000 --conversations 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from chat_load_test import ProcessSampler  # noqa: E402
+from endpoint_bench import start_server  # noqa: E402
+
+USERNAME = 'bench_export_user'
+MODES = ('jsonl', 'markdown', 'to_dict')
+
+
+def seed(args):
+    """Replace the bench user's conversations with --messages generated messages; returns the user id"""
+    from sqlalchemy import text
+    from app import app
+    from models import db
+
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(text("SET LOCAL statement_timeout = 0"))
+        conversations = "SELECT c.id FROM conversations c JOIN users u ON u.id = c.user_id WHERE u.username = :username"
+        connection.execute(text(f"DELETE FROM messages WHERE conversation_id IN ({conversations})"), {'username': USERNAME})
+        connection.execute(text(f"DELETE FROM conversations WHERE id IN ({conversations})"), {'username': USERNAME})
+        connection.execute(text("""
+            INSERT INTO users (id, username, email, name, created_at)
+            VALUES (gen_random_uuid()::text, :username, :email, 'Export Bench', now())
+            ON CONFLICT (username) DO NOTHING
+        """), {'username': USERNAME, 'email': f'{USERNAME}@bench.glow.com'})
+        per_conversation = max(1, args.messages // args.conversations)
+        connection.execute(text("""
+            WITH new_conversations AS (
+                INSERT INTO conversations (id, user_id, title, created_at, updated_at)
+                SELECT gen_random_uuid()::text, u.id, 'Export chat ' || n, now() - make_interval(days => n), now()
+                FROM users u, generate_series(1, :conversations) AS n
+                WHERE u.username = :username
+                RETURNING id, created_at
+            )
+            INSERT INTO messages (id, conversation_id, role, content, created_at, edited)
+            SELECT gen_random_uuid()::text, c.id, CASE WHEN t % 2 = 0 THEN 'assistant' ELSE 'user' END,
+                   'Message ' || t || ': ' || repeat(md5(c.id || t), 1 + t % 8), c.created_at + make_interval(secs => t),
+                   t % 50 = 0
+            FROM new_conversations c, generate_series(1, :per_conversation) AS t
+        """), {'username': USERNAME, 'conversations': args.conversations, 'per_conversation': per_conversation})
+        return per_conversation * args.conversations
+
+
+def download(session, url, params):
+    """Stream a response to the end; returns (ttfb seconds, total seconds, bytes)"""
+    started = time.perf_counter()
+    first, size = None, 0
+    with session.get(url, params=params, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=65536):
+            if first is None:
+                first = time.perf_counter() - started
+            size += len(chunk)
+    return first or 0.0, time.perf_counter() - started, size
+
+
+def run_mode(args, mode, port):
+    # Nothing here calls the upstream, so the mock URL is never reached
+    process, base_url = start_server(port, 1, 2, 'http://127.0.0.1:9/v1')
+    try:
+        session = requests.Session()
+        conversations = session.get(f'{base_url}/api/conversations', params={'user_id': USERNAME}, timeout=30)
+        conversation_ids = [c['id'] for c in conversations.json()['conversations']]
+        sampler = ProcessSampler(process.pid, interval=0.05).start()
+        time.sleep(0.3)
+        idle = sampler.samples[-1][2] if sampler.samples else 0
+        if mode == 'to_dict':
+            first, total, size = None, 0.0, 0
+            for conversation_id in conversation_ids:
+                ttfb, elapsed, received = download(session, f'{base_url}/api/conversations/{conversation_id}/messages', {})
+                first = ttfb if first is None else first
+                total += elapsed
+                size += received
+        else:
+            first, total, size = download(session, f'{base_url}/api/conversations/export',
+                                          {'user_id': USERNAME, 'format': mode})
+        stats = sampler.stop()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        'mode': mode,
+        'ttfb_ms': round(first * 1000, 1),
+        'total_s': round(total, 2),
+        'mb': round(size / 1e6, 1),
+        'rss_growth_mb': round(stats.get('rss_max_mb', 0) - idle / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and memory of exporting a large account')
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--conversations', type=int, default=20)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--port', type=int, default=5066)
+    parser.add_argument('--output', default='export.json')
+    args = parser.parse_args()
+
+    messages = seed(args)
+    print(f"🌱 {USERNAME}: {messages} messages in {args.conversations} conversations")
+    results = []
+    for i, mode in enumerate(args.modes.split(',')):
+        # Fresh server (and port) per mode, so RSS growth isn't hidden by an earlier mode's peak
+        stats = run_mode(args, mode, args.port + i)
+        results.append(stats)
+        print(f"📊 {mode:<8} first byte {stats['ttfb_ms']:.0f}ms, total {stats['total_s']:.1f}s, "
+              f"{stats['mb']:.1f}MB, server RSS +{stats['rss_growth_mb']:.1f}MB")
+
+    with open(args.output, 'w') as f:
+        json.dump({'messages': messages, 'conversations': args.conversations, 'modes': results}, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
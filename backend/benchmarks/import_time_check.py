@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Cold-start import profile check
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter, reports
+the slowest top-level imports, and fails when:
+  - the total cumulative import time exceeds --budget-ms, or
+  - a module that should be imported lazily shows up at startup
+
+Usage:
+    python benchmarks/import_time_check.py --budget-ms 900
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules that must only be imported on first use (numpy: memory_index.py).
+# `requests` is not listed: python-socketio's client stack imports it whenever
+# flask_socketio loads.
+LAZY_MODULES = ('openai', 'numpy')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile_imports(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            depth = len(indent) // 2
+            entries.append((name, int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time regression check for the app module')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--budget-ms', type=float, default=1500.0)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    entries = profile_imports(args.module)
+    total_ms = sum(self_us for _, self_us, _, _ in entries) / 1000
+    top_level = sorted((e for e in entries if e[3] == 0), key=lambda e: e[2], reverse=True)
+
+    print(f"📦 Top {args.top} top-level imports by cumulative time:")
+    for name, _, cumulative_us, _ in top_level[:args.top]:
+        print(f"   {cumulative_us / 1000:8.1f}ms  {name}")
+    print(f"⏱️  Total import time: {total_ms:.1f}ms (budget {args.budget_ms}ms)")
+
+    failed = False
+    imported = {name for name, _, _, _ in entries}
+    eager = [name for name in LAZY_MODULES if name in imported]
+    if eager:
+        print(f"❌ Modules that should be lazy were imported at startup: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("❌ Import time exceeds budget")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Cold start within budget")
+
+
+if __name__ == '__main__':
+    main()
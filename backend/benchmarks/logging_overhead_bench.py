@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Logging overhead benchmark
+
+Measures per-request latency of /api/memories and a full chat stream through
+the Flask test client with LOG_LEVEL=DEBUG (every hot-path record written, as
+the old print calls did) versus LOG_LEVEL=INFO (debug records gated off).
+Each level runs in its own interpreter since logging is configured once per
+process. The chat upstream is replaced in-process by a canned SSE response so
+only backend overhead is measured.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/logging_overhead_bench.py --requests 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CannedStream:
+    """Stands in for the streamed upstream response"""
+    status_code = 200
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_lines(self):
+        for chunk in self.chunks:
+            yield ('data: ' + json.dumps({'choices': [{'delta': {'content': chunk}}]})).encode()
+        yield b'data: [DONE]'
+
+    def json(self):
+        return {'choices': [{'message': {'content': 'Benchmark Chat'}}]}
+
+
+def run_worker(requests_per_route):
+    sys.path.insert(0, BACKEND_DIR)
+    import openai_api
+    import routes.chat
+
+    chunks = [f'token{i} ' for i in range(60)] + ['[MEMORY: user benchmarks logging]']
+    fake_post = lambda payload, timeout, stream=False: CannedStream(chunks)
+    openai_api.post_chat_completion = fake_post
+    routes.chat.post_chat_completion = fake_post
+    routes.chat.openai_available = True
+
+    from app import app
+    client = app.test_client()
+    user_id = 'logging_bench_user'
+
+    # Warm up and create the user/conversation
+    response = client.post('/api/chatOpenAI', json={'message': 'hello', 'user_id': user_id})
+    body = response.get_data(as_text=True)
+    conversation_id = json.loads(body.strip().split('\n')[-1][6:])['conversation_id']
+    client.get(f'/api/memories?user_id={user_id}')
+
+    results = {'memories': [], 'chat': []}
+    for _ in range(requests_per_route):
+        started = time.perf_counter()
+        client.get(f'/api/memories?user_id={user_id}')
+        results['memories'].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        response = client.post('/api/chatOpenAI', json={
+            'message': 'tell me more', 'user_id': user_id, 'conversation_id': conversation_id
+        })
+        response.get_data()
+        results['chat'].append(time.perf_counter() - started)
+
+    client.delete(f'/api/conversations/{conversation_id}')
+    # Results go to stderr; stdout carries the log output under test
+    sys.stderr.write('RESULT ' + json.dumps(results) + '\n')
+
+
+def run_level(level, requests_per_route):
+    env = dict(os.environ, LOG_LEVEL=level, LOG_FORMAT='json', OPENAI_API_KEY='sk-benchmark')
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', '--requests', str(requests_per_route)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    line = next(l for l in completed.stderr.splitlines() if l.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):]), len(completed.stdout.splitlines())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-request overhead across log levels')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.requests)
+        return
+
+    for level in ('DEBUG', 'INFO'):
+        results, log_lines = run_level(level, args.requests)
+        print(f"📊 LOG_LEVEL={level} ({log_lines} log lines written)")
+        for route, timings in results.items():
+            ordered = sorted(timings)
+            p95 = ordered[int(0.95 * (len(ordered) - 1))]
+            print(f"   {route:>9}: mean={statistics.mean(timings) * 1000:.2f}ms p95={p95 * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Memory retrieval benchmark
+
+Measures the per-user memory index (memory_index.py) at --memories facts
+per user (10k by default):
+
+  - in process: index build time, appending one new memory, query latency
+    percentiles, the insert-time near-duplicate check (dedup_action), the
+    compaction plan for the whole set (compact_memories.py) and the
+    index's array footprint, over synthetic facts
+  - with --db: the lookup a chat turn actually does (get_index), for a
+    seeded user with that many rows in user_memories: the cold load +
+    build, the warm path (freshness query only) and the refresh after one
+    new memory is inserted
+
+Usage:
+    python benchmarks/memory_retrieval_bench.py --memories 10000 --queries 2000
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/memory_retrieval_bench.py --db
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from compact_memories import plan_compaction  # noqa: E402
+from bench_stats import percentile  # noqa: E402
+from memory_index import MemoryIndex, dedup_action  # noqa: E402
+
+SUBJECTS = ('tennis', 'law school', 'her boyfriend', 'the startup', 'job applications', 'cornell', 'robotics',
+            'indian dance', 'a trip to italy', 'the bar exam', 'yoga', 'coffee shops', 'her sister', 'calculus',
+            'a hackathon', 'poetry', 'marathon training', 'the internship', 'cooking pasta', 'her roommate')
+VERBS = ('loves', 'is stressed about', 'often talks about', 'is excited about', 'wants to get better at',
+         'feels guilty about', 'is proud of', 'frequently asks questions about', 'is starting a new era with')
+DETAILS = ('every weekend', 'since high school', 'with friends', 'late at night', 'before exams', 'this semester',
+           'after a breakup', 'in the summer', 'for the first time', 'when she feels anxious')
+
+
+def synthetic_facts(count, rng):
+    return [f'user {rng.choice(VERBS)} {rng.choice(SUBJECTS)} {rng.choice(DETAILS)} #{i}' for i in range(count)]
+
+
+def timed(fn, repeat=1):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return result, samples
+
+
+def in_process(args, rng):
+    facts = synthetic_facts(args.memories, rng)
+    rows = [(str(i), fact) for i, fact in enumerate(facts)]
+    index, build = timed(lambda: MemoryIndex.build(rows), repeat=3)
+    _, extend = timed(lambda: index.extend([('new', 'user just adopted a puppy named biscuit')]), repeat=5)
+    queries = [f'{rng.choice(SUBJECTS)} {rng.choice(DETAILS)}, what do you think?' for _ in range(args.queries)]
+    _, search = timed(lambda: index.search(queries[rng.randrange(len(queries))], args.k), repeat=args.queries)
+    candidates = [f'user {rng.choice(VERBS)} {rng.choice(SUBJECTS)} {rng.choice(DETAILS)}' for _ in range(args.queries)]
+    _, dedup = timed(lambda: dedup_action(None, candidates[rng.randrange(len(candidates))], index), repeat=args.queries)
+    (deletes, rewrites), compaction = timed(lambda: plan_compaction(rows))
+    footprint = sum(array.nbytes for array in vars(index).values() if hasattr(array, 'nbytes'))
+    return {
+        'memories': args.memories,
+        'build_ms': round(min(build) * 1000, 1),
+        'append_one_ms': round(min(extend) * 1000, 2),
+        'query_p50_ms': round(percentile(search, 50) * 1000, 3),
+        'query_p95_ms': round(percentile(search, 95) * 1000, 3),
+        'query_p99_ms': round(percentile(search, 99) * 1000, 3),
+        'dedup_p50_ms': round(percentile(dedup, 50) * 1000, 3),
+        'dedup_p99_ms': round(percentile(dedup, 99) * 1000, 3),
+        'compaction_plan_ms': round(compaction[0] * 1000, 1),
+        'compaction_removed': len(deletes),
+        'compaction_merged': len(rewrites),
+        'index_arrays_mb': round(footprint / 1e6, 2),
+    }
+
+
+def with_database(args, rng):
+    from app import app
+    from memory_index import get_index
+    from models import db, User, UserMemory
+
+    username = 'bench_memory_user'
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            user = User(username=username, email=f'{username}@glow.com', name='Bench Memory User')
+            db.session.add(user)
+            db.session.commit()
+        UserMemory.query.filter_by(user_id=user.id).delete()
+        started = datetime(2025, 1, 1)
+        db.session.execute(UserMemory.__table__.insert(), [
+            {'id': str(uuid.uuid4()), 'user_id': user.id, 'fact': fact, 'is_displayed': True,
+             'created_at': started + timedelta(seconds=i)}
+            for i, fact in enumerate(synthetic_facts(args.memories, rng))
+        ])
+        db.session.commit()
+
+        _, cold = timed(lambda: get_index(user.id))
+        _, warm = timed(lambda: get_index(user.id), repeat=200)
+        db.session.add(UserMemory(user_id=user.id, fact='user just adopted a puppy named biscuit'))
+        db.session.commit()
+        index, refresh = timed(lambda: get_index(user.id))
+        found = index.search('how is the puppy biscuit doing', 1)
+
+        UserMemory.query.filter_by(user_id=user.id).delete()
+        db.session.delete(user)
+        db.session.commit()
+    return {
+        'cold_load_ms': round(cold[0] * 1000, 1),
+        'warm_p50_ms': round(percentile(warm, 50) * 1000, 2),
+        'warm_p95_ms': round(percentile(warm, 95) * 1000, 2),
+        'refresh_after_insert_ms': round(refresh[0] * 1000, 1),
+        'new_memory_found': bool(found and 'biscuit' in found[0][2]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-user memory retrieval')
+    parser.add_argument('--memories', type=int, default=10000, help='Memories for the benchmarked user')
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--db', action='store_true', help='Also measure get_index against DATABASE_URL')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', default='memory-retrieval.json')
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    results = {'in_process': in_process(args, rng)}
+    stats = results['in_process']
+    print(f"📊 {stats['memories']} memories: build {stats['build_ms']:.0f}ms, append one {stats['append_one_ms']:.1f}ms, "
+          f"query p50/p95/p99={stats['query_p50_ms']:.2f}/{stats['query_p95_ms']:.2f}/{stats['query_p99_ms']:.2f}ms, "
+          f"{stats['index_arrays_mb']:.1f}MB of arrays")
+    print(f"📊 near-duplicate check p50/p99={stats['dedup_p50_ms']:.2f}/{stats['dedup_p99_ms']:.2f}ms; "
+          f"compaction plan {stats['compaction_plan_ms']:.0f}ms ({stats['compaction_removed']} removed, "
+          f"{stats['compaction_merged']} merged)")
+
+    if args.db:
+        results['database'] = stats = with_database(args, rng)
+        print(f"{'✅' if stats['new_memory_found'] else '❌'} get_index: cold {stats['cold_load_ms']:.0f}ms, "
+              f"warm p50/p95={stats['warm_p50_ms']:.2f}/{stats['warm_p95_ms']:.2f}ms, "
+              f"after one new memory {stats['refresh_after_insert_ms']:.1f}ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    if args.db and not results['database']['new_memory_found']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
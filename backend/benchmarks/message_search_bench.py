@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Message search benchmark
+
+Seeds --messages messages (10M by default) across --users users, then
+measures GET /api/messages/search on a gunicorn server by query class:
+
+  - common: one of the most frequent words (matches a large share of each
+    user's messages, so ranking dominates)
+  - medium / rare: words further down the frequency curve
+  - phrase: a quoted pair of common words
+  - and: two words that must both appear
+
+Message text is drawn from a Zipf-like vocabulary on the database side
+(generate_series + random()), so seeding 10M rows doesn't go through
+Python; the trigger and indexes from add_message_search.py must already
+be in place (python migrate.py). Seeded usernames start with
+`bench_search_`; --reset removes them first and --reuse keeps an earlier
+seed of the same shape. Exits non-zero if the overall p95 misses
+--target-p95-ms.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python migrate.py
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/message_search_bench.py --messages 10000000 --users 1000 --reset
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_stats import percentile  # noqa: E402
+from endpoint_bench import start_server  # noqa: E402
+
+USER_PREFIX = 'bench_search_'
+QUERY_CLASSES = ('common', 'medium', 'rare', 'phrase', 'and')
+HEAD_WORDS = ('beach', 'coffee', 'tennis', 'exam', 'friends', 'music', 'trip', 'work', 'dinner', 'anxious',
+              'weekend', 'roommate', 'hiking', 'novel', 'presentation', 'sister', 'yoga', 'pasta', 'italy', 'concert')
+SYLLABLES = ('ka', 'lo', 'mi', 'ren', 'tu', 'sa', 'vel', 'dor', 'pi', 'nex', 'ba', 'quo', 'ri', 'fen', 'zu', 'lan')
+
+
+def vocabulary(size):
+    """HEAD_WORDS then pronounceable made-up words, most frequent first"""
+    made_up = (''.join(parts) for n in (2, 3, 4) for parts in itertools.product(SYLLABLES, repeat=n))
+    return list(HEAD_WORDS) + list(itertools.islice(made_up, size - len(HEAD_WORDS)))
+
+
+def reset(connection):
+    from sqlalchemy import text
+    users = "SELECT id FROM users WHERE username LIKE :prefix"
+    conversations = f"SELECT id FROM conversations WHERE user_id IN ({users})"
+    params = {'prefix': f'{USER_PREFIX}%'}
+    connection.execute(text(f"DELETE FROM messages WHERE conversation_id IN ({conversations})"), params)
+    connection.execute(text(f"DELETE FROM conversations WHERE user_id IN ({users})"), params)
+    connection.execute(text("DELETE FROM users WHERE username LIKE :prefix"), params)
+
+
+def seed(args, words):
+    """Users, conversations and messages, one transaction per --batch-users users"""
+    from sqlalchemy import text
+    from app import app
+    from models import db
+
+    per_conversation = max(1, args.messages // (args.users * args.conversations))
+    with app.app_context():
+        with db.engine.begin() as connection:
+            if args.reset:
+                reset(connection)
+            existing = connection.execute(text("""
+                SELECT count(*) FROM messages m JOIN conversations c ON c.id = m.conversation_id
+                JOIN users u ON u.id = c.user_id WHERE u.username LIKE :prefix
+            """), {'prefix': f'{USER_PREFIX}%'}).scalar()
+        if args.reuse and existing:
+            print(f"♻️  Reusing {existing} seeded messages")
+            return existing
+        if existing:
+            raise SystemExit('❌ bench_search_ rows already exist; pass --reset or --reuse')
+
+        started = time.perf_counter()
+        for first in range(0, args.users, args.batch_users):
+            last = min(args.users, first + args.batch_users)
+            with db.engine.begin() as connection:
+                connection.execute(text("SET LOCAL statement_timeout = 0"))
+                connection.execute(text("SELECT setseed(:seed)"), {'seed': (args.seed + first) % 1000 / 1000})
+                # random()^3 skews draws towards the front of the vocabulary, like real word frequencies
+                connection.execute(text("""
+                    WITH new_users AS (
+                        INSERT INTO users (id, username, email, name, created_at)
+                        SELECT gen_random_uuid()::text, :prefix || n, :prefix || n || '@bench.glow.com', 'Search ' || n, now()
+                        FROM generate_series(:first, :last - 1) AS n
+                        RETURNING id
+                    ), new_conversations AS (
+                        INSERT INTO conversations (id, user_id, title, created_at, updated_at)
+                        SELECT gen_random_uuid()::text, new_users.id, 'Search chat ' || c, now(), now()
+                        FROM new_users, generate_series(1, :conversations) AS c
+                        RETURNING id
+                    )
+                    INSERT INTO messages (id, conversation_id, role, content, created_at, edited)
+                    SELECT gen_random_uuid()::text, c.id, CASE WHEN t % 2 = 0 THEN 'user' ELSE 'assistant' END,
+                           (SELECT string_agg((CAST(:words AS text[]))[1 + floor(power(random(), 3) * :vocab)::int], ' ')
+                            FROM generate_series(1, 6 + (t * 7 + length(c.id)) % 24) AS w),
+                           now() - make_interval(mins => t), false
+                    FROM new_conversations c, generate_series(1, :per_conversation) AS t
+                """), {'prefix': USER_PREFIX, 'first': first, 'last': last, 'conversations': args.conversations,
+                       'words': words, 'vocab': len(words), 'per_conversation': per_conversation})
+            done = last * args.conversations * per_conversation
+            rate = done / (time.perf_counter() - started)
+            print(f"🌱 {done} messages seeded ({rate:,.0f}/s)", flush=True)
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text("SET statement_timeout = 0"))
+            connection.execute(text("VACUUM ANALYZE messages"))
+            connection.execute(text("ANALYZE conversations"))
+    return args.users * args.conversations * per_conversation
+
+
+def make_query(kind, words, rng):
+    if kind == 'common':
+        return rng.choice(words[:10])
+    if kind == 'medium':
+        return rng.choice(words[100:300])
+    if kind == 'rare':
+        return rng.choice(words[2000:])
+    if kind == 'phrase':
+        return f'"{rng.choice(words[:20])} {rng.choice(words[:20])}"'
+    return f'{rng.choice(words[:50])} {rng.choice(words[50:500])}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of full-text message search on a large seeded dataset')
+    parser.add_argument('--messages', type=int, default=10_000_000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--conversations', type=int, default=50, help='Conversations per user')
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--batch-users', type=int, default=50, help='Users seeded per transaction')
+    parser.add_argument('--reset', action='store_true', help='Delete previous bench_search_ rows first')
+    parser.add_argument('--reuse', action='store_true', help='Keep an existing seed instead of failing')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per class')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--target-p95-ms', type=float, default=150)
+    parser.add_argument('--port', type=int, default=5064)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', default='message-search.json')
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    words = vocabulary(args.vocabulary)
+
+    seeded = seed(args, words)
+    # Nothing here calls the upstream, so the mock URL is never reached
+    process, base_url = start_server(args.port, 1, 4, 'http://127.0.0.1:9/v1')
+    try:
+        session = requests.Session()
+        classes = {}
+        for kind in QUERY_CLASSES:
+            samples, hits = [], 0
+            for _ in range(args.queries):
+                params = {'user_id': f'{USER_PREFIX}{rng.randrange(args.users)}', 'q': make_query(kind, words, rng),
+                          'limit': args.limit}
+                started = time.perf_counter()
+                response = session.get(f'{base_url}/api/messages/search', params=params, timeout=60)
+                samples.append(time.perf_counter() - started)
+                response.raise_for_status()
+                hits += len(response.json()['results'])
+            classes[kind] = {
+                'p50_ms': round(percentile(samples, 50) * 1000, 1),
+                'p95_ms': round(percentile(samples, 95) * 1000, 1),
+                'p99_ms': round(percentile(samples, 99) * 1000, 1),
+                'mean_hits': round(hits / args.queries, 1),
+                'samples': samples,
+            }
+            print(f"📊 {kind:<7} p50/p95/p99={classes[kind]['p50_ms']:.1f}/{classes[kind]['p95_ms']:.1f}/"
+                  f"{classes[kind]['p99_ms']:.1f}ms  {classes[kind]['mean_hits']:.1f} hits per page")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    overall = [sample for stats in classes.values() for sample in stats.pop('samples')]
+    p95 = percentile(overall, 95) * 1000
+    ok = p95 <= args.target_p95_ms
+    print(f"{'✅' if ok else '❌'} {seeded} messages: overall p95 {p95:.1f}ms (target {args.target_p95_ms:.0f}ms)")
+
+    with open(args.output, 'w') as f:
+        json.dump({'messages': seeded, 'users': args.users, 'classes': classes, 'overall_p95_ms': round(p95, 1),
+                   'target_p95_ms': args.target_p95_ms}, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
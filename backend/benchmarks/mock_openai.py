@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Local mock of the OpenAI endpoints the backend calls
+
+Serves /v1/chat/completions (streamed SSE when the payload sets
+"stream": true, a single JSON completion otherwise) and
+/v1/audio/transcriptions (including chunked uploads) with configurable
+latency, so the backend can be load-tested without network access or API
+spend. GET /v1/_stats returns how many requests each path has completed.
+Point the backend at it with OPENAI_API_BASE=http://127.0.0.1:<port>/v1.
+
+Latency model:
+  --header-latency-ms  delay before response headers (connect + queueing)
+  --prefill-ms-per-1k  extra header delay per 1000 prompt tokens not served from cache
+  --token-delay-ms     delay between streamed chunks
+  --tokens             chunks per streamed completion
+  --completion-ms      total time for non-streamed completions and transcriptions
+
+Prompt caching works like the real API's: prompts are counted at ~4
+characters per token, and the longest previously seen prefix of at least
+1024 tokens (in 128-token steps) is reported as cached_tokens in the usage
+chunk sent when stream_options.include_usage is set. --no-prompt-cache
+turns it off.
+
+Usage:
+    python benchmarks/mock_openai.py --port 8765 --header-latency-ms 300 --token-delay-ms 20
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILENAME = re.compile(rb'filename="([^"]*)"')
+CHARS_PER_TOKEN = 4
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+CACHE_MAX_PREFIXES = 100000
+WORDS = ('that', 'sounds', 'so', 'fun', 'honestly', 'I', 'love', 'this', 'for', 'you', 'tell', 'me', 'more')
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = None  # set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            # Streamed uploads (transcription.py) arrive without a Content-Length
+            body = bytearray()
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    # Client abandoned the upload; like the real API, don't process a partial body
+                    return None
+                size = int(line.split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return bytes(body)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.endswith('/_stats'):
+            self._send_json(self.server.stats())
+        else:
+            self._send_json({'error': {'message': f'Unknown path {self.path}'}}, status=404)
+
+    def do_POST(self):
+        body = self._read_body()
+        if body is None:
+            self.close_connection = True
+            return
+        self.server.record(self.path)
+        config = self.config
+        if self.path.endswith('/chat/completions'):
+            payload = json.loads(body or b'{}')
+            prompt_tokens, cached_tokens = self.server.prompt_usage(payload, config.prompt_cache)
+            time.sleep((config.header_latency_ms + (prompt_tokens - cached_tokens) / 1000 * config.prefill_ms_per_1k) / 1000)
+            if payload.get('stream'):
+                self._stream_completion(payload, prompt_tokens, cached_tokens)
+            else:
+                time.sleep(max(0, config.completion_ms - config.header_latency_ms) / 1000)
+                self._send_json({
+                    'id': 'chatcmpl-mock',
+                    'object': 'chat.completion',
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': 'Mock Chat Title'}, 'finish_reason': 'stop'}],
+                    'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': 3, 'total_tokens': prompt_tokens + 3,
+                              'prompt_tokens_details': {'cached_tokens': cached_tokens}},
+                })
+        elif self.path.endswith('/audio/transcriptions'):
+            time.sleep(config.completion_ms / 1000)
+            # Echo the part name and size so callers can check segment order
+            match = FILENAME.search(body)
+            filename = match.group(1).decode() if match else 'audio'
+            self._send_json({'text': f'[{filename} {len(body)}B]'})
+        else:
+            self._send_json({'error': {'message': f'Unknown path {self.path}'}}, status=404)
+
+    def _stream_completion(self, payload, prompt_tokens, cached_tokens):
+        config = self.config
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(data):
+            frame = f'data: {data}\n\n'.encode()
+            self.wfile.write(f'{len(frame):x}\r\n'.encode() + frame + b'\r\n')
+            self.wfile.flush()
+
+        for i in range(config.tokens):
+            if config.token_delay_ms:
+                time.sleep(config.token_delay_ms / 1000)
+            chunk = {'choices': [{'index': 0, 'delta': {'content': WORDS[i % len(WORDS)] + ' '}}]}
+            send(json.dumps(chunk))
+        count = self.server.next_count()
+        if config.memory_every and count % config.memory_every == 0:
+            # A distinct fact each time, so the backend's near-duplicate check keeps them all
+            tag = hashlib.sha1(str(count).encode()).hexdigest()[:12]
+            send(json.dumps({'choices': [{'index': 0, 'delta': {'content': f'[MEMORY: user likes benchmark run {tag}]'}}]}))
+        if (payload.get('stream_options') or {}).get('include_usage'):
+            send(json.dumps({'choices': [], 'usage': {
+                'prompt_tokens': prompt_tokens, 'completion_tokens': config.tokens,
+                'total_tokens': prompt_tokens + config.tokens,
+                'prompt_tokens_details': {'cached_tokens': cached_tokens},
+            }}))
+        send('[DONE]')
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler):
+        super().__init__(address, handler)
+        self._count = 0
+        self._requests = {}
+        self._prefixes = {}  # hash of a cacheable prompt prefix -> None, oldest first
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections are expected under load
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def record(self, path):
+        with self._lock:
+            self._requests[path] = self._requests.get(path, 0) + 1
+
+    def stats(self):
+        """Completed requests per path (GET /v1/_stats)"""
+        with self._lock:
+            return dict(self._requests)
+
+    def prompt_usage(self, payload, cache=True):
+        """(prompt tokens, cached tokens) for a chat payload; remembers its prefixes for later requests"""
+        text = ''.join(f"{message.get('role')}:{message.get('content')}\n" for message in payload.get('messages', []))
+        prompt_tokens = len(text) // CHARS_PER_TOKEN
+        if not cache:
+            return prompt_tokens, 0
+        # Hash the prompt incrementally, snapshotting at every cacheable prefix length
+        digest = hashlib.sha256(str(payload.get('prompt_cache_key')).encode())
+        position, prefixes = 0, []
+        for tokens in range(CACHE_MIN_TOKENS, prompt_tokens + 1, CACHE_STEP_TOKENS):
+            end = tokens * CHARS_PER_TOKEN
+            digest.update(text[position:end].encode())
+            position = end
+            prefixes.append((tokens, digest.hexdigest()))
+        cached = 0
+        with self._lock:
+            for tokens, key in prefixes:
+                if key in self._prefixes:
+                    cached = tokens
+                self._prefixes.pop(key, None)
+                self._prefixes[key] = None
+            while len(self._prefixes) > CACHE_MAX_PREFIXES:
+                self._prefixes.pop(next(iter(self._prefixes)))
+        return prompt_tokens, cached
+
+    def next_count(self):
+        with self._lock:
+            self._count += 1
+            return self._count
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Mock OpenAI chat/transcription server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--header-latency-ms', type=float, default=300)
+    parser.add_argument('--token-delay-ms', type=float, default=20)
+    parser.add_argument('--tokens', type=int, default=60)
+    parser.add_argument('--completion-ms', type=float, default=500)
+    parser.add_argument('--prefill-ms-per-1k', type=float, default=0, help='Header delay per 1000 uncached prompt tokens')
+    parser.add_argument('--no-prompt-cache', dest='prompt_cache', action='store_false', help='Report no cached prompt tokens')
+    parser.add_argument('--memory-every', type=int, default=4, help='Append a [MEMORY: ...] tag to every Nth stream (0 = never)')
+    return parser
+
+
+def make_server(config):
+    handler = type('ConfiguredHandler', (MockOpenAIHandler,), {'config': config})
+    return MockOpenAIServer((config.host, config.port), handler)
+
+
+def start_in_thread(config):
+    """Start the mock on a daemon thread and return the server (call shutdown() to stop)"""
+    server = make_server(config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    config = build_parser().parse_args()
+    server = make_server(config)
+    print(f"🤖 Mock OpenAI listening on http://{config.host}:{config.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Connection pool load test
+
+Hammers a set of DB-backed endpoints with N concurrent clients and reads the
+pool counters from /api/metrics/pool before and after (sent METRICS_TOKEN
+from the environment, as the server expects outside development). Exits non-zero if any
+pool timeout or request error happened at the target concurrency.
+
+Usage:
+    python benchmarks/pool_load_test.py --base-url http://localhost:5001 \\
+        --concurrency 32 --duration 30 --user-id load_user
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+from bench_stats import percentile
+
+
+def fetch_pool_metrics(base_url):
+    token = os.getenv('METRICS_TOKEN')
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    response = requests.get(f'{base_url}/api/metrics/pool', headers=headers, timeout=10)
+    response.raise_for_status()
+    return response.json()['metrics']
+
+
+def worker(base_url, paths, deadline, latencies, errors, lock):
+    session = requests.Session()
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = session.get(f'{base_url}{path}', timeout=30)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code >= 500:
+                    errors.append(f'{path}: HTTP {response.status_code}')
+                else:
+                    latencies.append(elapsed)
+        except requests.RequestException as e:
+            with lock:
+                errors.append(f'{path}: {e}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test for DB connection pool sizing')
+    parser.add_argument('--base-url', default='http://localhost:5001')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds')
+    parser.add_argument('--user-id', default='default_user')
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip('/')
+    paths = [
+        f'/api/conversations?user_id={args.user_id}',
+        f'/api/memories?user_id={args.user_id}',
+        f'/api/current-user?username={args.user_id}',
+    ]
+
+    before = fetch_pool_metrics(base_url)
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, paths, deadline, latencies, errors, lock))
+        for _ in range(args.concurrency)
+    ]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - started
+
+    after = fetch_pool_metrics(base_url)
+    timeouts = after['timeouts'] - before['timeouts']
+    overflow_events = after['overflow_events'] - before['overflow_events']
+    connects = after['connects'] - before['connects']
+
+    print(f"🏋️ Concurrency: {args.concurrency}, duration: {wall:.1f}s")
+    print(f"📨 Requests: {len(latencies)} ok, {len(errors)} errors ({len(latencies) / wall:.1f} req/s)")
+    if latencies:
+        print(f"⏱️  Latency p50={percentile(latencies, 50) * 1000:.1f}ms "
+              f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+              f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+              f"mean={statistics.mean(latencies) * 1000:.1f}ms")
+    print(f"🐘 Pool: new connections={connects}, overflow connections opened={overflow_events}, "
+          f"timeouts={timeouts}, max wait={after['wait_time_max_ms']}ms, state={after['pool']}")
+
+    for error in errors[:10]:
+        print(f"❌ {error}")
+
+    if timeouts or errors:
+        print("❌ Pool load test failed")
+        sys.exit(1)
+    print("✅ No pool timeouts at target concurrency")
+
+
+if __name__ == '__main__':
+    main()
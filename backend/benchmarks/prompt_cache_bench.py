@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Prompt prefix caching benchmark
+
+Runs the same chat turns twice against a gunicorn server whose upstream is
+benchmarks/mock_openai.py with a prefill cost per uncached prompt token:
+once with the mock's prompt cache on (the versioned system prompt and
+growing histories are reused across turns) and once with it off. Turns mix
+new conversations (which share only the system prompt) and follow-ups in
+existing ones (which also share their history).
+
+For each mode it reports time to first chunk and the prompt/cached token
+totals the backend recorded from the upstream usage field
+(glow_openai_prompt_tokens_total and glow_openai_cached_prompt_tokens_total
+on /metrics), so the numbers also check that the usage is being counted.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python benchmarks/seed.py --reset
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/prompt_cache_bench.py --turns 40 --prefill-ms-per-1k 150
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import mock_openai  # noqa: E402
+from chat_load_test import load_conversations  # noqa: E402
+from chat_transport_bench import http_turn  # noqa: E402
+from bench_stats import percentile  # noqa: E402
+from endpoint_bench import start_server  # noqa: E402
+
+# The server this starts inherits the environment, so both sides agree on the token
+os.environ.setdefault('METRICS_TOKEN', 'benchmark')
+
+METRIC_LINE = re.compile(r'^(glow_openai_(?:cached_)?prompt_tokens_total)\{operation="chat_stream"\} (\S+)$', re.M)
+
+
+def prompt_token_counters(base_url):
+    response = requests.get(f'{base_url}/metrics', timeout=10,
+                            headers={'Authorization': f"Bearer {os.environ['METRICS_TOKEN']}"})
+    response.raise_for_status()
+    text = response.text
+    values = {name: float(value) for name, value in METRIC_LINE.findall(text)}
+    return (values.get('glow_openai_prompt_tokens_total', 0.0),
+            values.get('glow_openai_cached_prompt_tokens_total', 0.0))
+
+
+def run_mode(args, cache, port, mock_port):
+    mock_args = ['--port', str(mock_port), '--header-latency-ms', str(args.header_latency_ms),
+                 '--prefill-ms-per-1k', str(args.prefill_ms_per_1k), '--token-delay-ms', '5',
+                 '--tokens', str(args.tokens), '--memory-every', '0']
+    mock_config = mock_openai.build_parser().parse_args(mock_args + ([] if cache else ['--no-prompt-cache']))
+    mock_server = mock_openai.start_in_thread(mock_config)
+    process, base_url = start_server(port, 1, 8, f'http://{mock_config.host}:{mock_config.port}/v1')
+    try:
+        conversations = load_conversations(base_url, args.users)
+        rng = random.Random(args.seed)
+        session = requests.Session()
+        firsts = []
+        for _ in range(args.turns):
+            user = rng.choice(list(conversations))
+            conversation_id = None if rng.random() < args.new_share else rng.choice(conversations[user])
+            first, _, _, _ = http_turn(session, base_url, user, conversation_id)
+            firsts.append(first)
+        prompt_tokens, cached_tokens = prompt_token_counters(base_url)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        mock_server.shutdown()
+    return {
+        'mode': 'cache' if cache else 'no-cache',
+        'turns': len(firsts),
+        'first_chunk_p50_ms': round(percentile(firsts, 50) * 1000, 1),
+        'first_chunk_p95_ms': round(percentile(firsts, 95) * 1000, 1),
+        'prompt_tokens': int(prompt_tokens),
+        'cached_prompt_tokens': int(cached_tokens),
+        'cached_share': round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the effect of upstream prompt prefix caching on chat turns')
+    parser.add_argument('--turns', type=int, default=30)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--new-share', type=float, default=0.3, help='Share of turns that start a new conversation')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--port', type=int, default=5062)
+    parser.add_argument('--mock-port', type=int, default=8771)
+    parser.add_argument('--header-latency-ms', type=float, default=50)
+    parser.add_argument('--prefill-ms-per-1k', type=float, default=100, help='Mock cost of uncached prompt tokens')
+    parser.add_argument('--tokens', type=int, default=20)
+    parser.add_argument('--output', default='prompt-cache.json')
+    args = parser.parse_args()
+
+    results = []
+    for cache in (False, True):
+        # Fresh ports per mode so the second server never races the first one's shutdown
+        stats = run_mode(args, cache, args.port + cache, args.mock_port + cache)
+        results.append(stats)
+        print(f"📊 {stats['mode']:<9} first chunk p50/p95={stats['first_chunk_p50_ms']:.0f}/{stats['first_chunk_p95_ms']:.0f}ms  "
+              f"prompt tokens={stats['prompt_tokens']}  cached={stats['cached_prompt_tokens']} "
+              f"({stats['cached_share']:.0%})")
+
+    uncached, cached = results
+    saved = uncached['first_chunk_p50_ms'] - cached['first_chunk_p50_ms']
+    ok = cached['prompt_tokens'] > 0 and cached['cached_share'] > 0 and uncached['cached_prompt_tokens'] == 0
+    print(f"{'✅' if ok else '❌'} Cached prefixes cut first-chunk p50 by {saved:.0f}ms; "
+          f"{cached['cached_share']:.0%} of prompt tokens served from cache")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'mock': {'header_latency_ms': args.header_latency_ms, 'prefill_ms_per_1k': args.prefill_ms_per_1k,
+                     'tokens': args.tokens},
+            'modes': results,
+            'first_chunk_p50_saved_ms': round(saved, 1),
+        }, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Per-route SQL query budget check
+
+Seeds a small social graph (one user with conversations, messages,
+memories, followers and pending follow requests), then calls each route
+below through the Flask test client inside sql_profiler.query_budget()
+and fails when a route executes more statements than its budget. Repeated
+statement shapes (likely N+1 loops) are printed for every route, so the
+report doubles as a map of where per-row lazy loads remain.
+
+Budgets are for the seeded data set; a route whose count grows with the
+number of rows it returns will blow through its budget here.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/query_budget_check.py --rows 10
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from models import db, User, Conversation, Message, UserMemory, FollowRequest  # noqa: E402
+from sql_profiler import QueryBudgetExceeded, query_budget  # noqa: E402
+
+OWNER = 'budget_owner'
+PEER_PREFIX = 'budget_peer'
+
+# (label, method, path, json body, max statements)
+ROUTE_BUDGETS = (
+    ('search_users', 'GET', f'/api/search-users?username={PEER_PREFIX}&user_id={OWNER}', None, 6),
+    ('get_user_profile', 'GET', f'/api/user-profile/{PEER_PREFIX}_0?user_id={OWNER}', None, 8),
+    ('get_follow_requests', 'GET', f'/api/follow-requests?user_id={OWNER}', None, 4),
+    ('get_conversations', 'GET', f'/api/conversations?user_id={OWNER}', None, 4),
+    ('get_memories', 'GET', f'/api/memories?user_id={OWNER}', None, 6),
+)
+
+
+def seed(rows):
+    owner = User(username=OWNER, email=f'{OWNER}@glow.com', name='Budget Owner')
+    db.session.add(owner)
+    db.session.flush()
+    for i in range(rows):
+        peer = User(username=f'{PEER_PREFIX}_{i}', email=f'{PEER_PREFIX}_{i}@glow.com', name=f'Peer {i}')
+        db.session.add(peer)
+        db.session.flush()
+        if i % 2:
+            owner.following.append(peer)
+        else:
+            db.session.add(FollowRequest(from_user_id=peer.id, to_user_id=owner.id))
+
+        conversation = Conversation(user_id=owner.id, title=f'Budget chat {i}')
+        db.session.add(conversation)
+        db.session.flush()
+        db.session.add_all([
+            Message(conversation_id=conversation.id, role='user', content='I went to the beach and read a book'),
+            Message(conversation_id=conversation.id, role='assistant', content='That sounds lovely'),
+        ])
+        db.session.add(UserMemory(user_id=owner.id, fact=f'budget memory {i}'))
+    db.session.commit()
+
+
+def cleanup():
+    users = User.query.filter(User.username.like('budget_%')).all()
+    user_ids = [user.id for user in users]
+    FollowRequest.query.filter(
+        FollowRequest.from_user_id.in_(user_ids) | FollowRequest.to_user_id.in_(user_ids)
+    ).delete(synchronize_session=False)
+    for user in users:
+        user.following = []
+        db.session.delete(user)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when routes exceed their declared SQL query budget')
+    parser.add_argument('--rows', type=int, default=10, help='Peers, conversations and memories to seed')
+    parser.add_argument('--threshold', type=int, default=5, help='Repeats of one statement shape to report')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with app.app_context():
+        cleanup()
+        seed(args.rows)
+
+    failed = []
+    try:
+        for label, method, path, body, budget in ROUTE_BUDGETS:
+            try:
+                with query_budget(budget) as log:
+                    response = client.open(path, method=method, json=body)
+                status = '✅'
+            except QueryBudgetExceeded:
+                status = '❌'
+                failed.append(label)
+            print(f"{status} {label:<22} {log.count:>4} statements (budget {budget}, HTTP {response.status_code})")
+            for shape, n in log.repeated(args.threshold):
+                print(f"      {n:>4}x {shape[:110]}")
+    finally:
+        with app.app_context():
+            cleanup()
+
+    if failed:
+        print(f"❌ Over budget: {', '.join(failed)}")
+        sys.exit(1)
+    print("✅ All routes within their query budgets")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic dataset for the endpoint benchmarks
+
+Generates users, a follow graph with pending follow requests, conversations
+with a long-tailed number of messages, and memories, all derived from a
+fixed --seed so two runs with the same arguments produce the same data.
+Every generated username starts with `bench_`; --reset removes previous
+benchmark rows (and nothing else) first. Rows are written with bulk
+INSERTs in one transaction per table.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/seed.py --users 200 --reset
+"""
+
+import argparse
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import CURRENT_SYSTEM_PROMPT_VERSION  # noqa: E402
+
+USER_PREFIX = 'bench_user_'
+EPOCH = datetime(2025, 1, 1)
+
+TOPICS = (
+    ('beach', 'I spent the whole afternoon at the beach watching the waves'),
+    ('books', 'I finally finished the novel I was reading, the ending was wild'),
+    ('coffee', 'Tried a new cafe this morning, the latte art was adorable'),
+    ('fitness', 'Went for a run and then did a long yoga session'),
+    ('travel', 'Planning a trip to Italy next month, any ideas?'),
+    ('music', 'I have had the same song on repeat all week'),
+    ('nature', 'Went hiking in the forest and saw a waterfall'),
+    ('food', 'I cooked pasta from scratch for the first time'),
+    ('work', 'Big presentation tomorrow and I am kind of nervous'),
+    ('friends', 'Had the best dinner with friends last night'),
+)
+
+ASSISTANT_REPLIES = (
+    "That sounds amazing! Tell me more about how it felt.",
+    "Oh I love that for you. What was the best part?",
+    "Honestly that is such a vibe. How are you feeling about it now?",
+    "Wait that is so exciting! What happens next?",
+)
+
+
+def username(index):
+    return f'{USER_PREFIX}{index}'
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def message_count(rng, mean):
+    """Long-tailed turns per conversation: most chats are short, a few run long"""
+    return max(1, min(200, int(rng.lognormvariate(0, 0.9) * mean / 1.5)))
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    users, follows, requests_, conversations, messages, memories = [], [], [], [], [], []
+
+    for i in range(args.users):
+        users.append({
+            'id': _uuid(rng),
+            'username': username(i),
+            'email': f'{username(i)}@bench.glow.com',
+            'name': f'Bench User {i}',
+            'created_at': EPOCH + timedelta(minutes=i),
+        })
+    user_ids = [u['id'] for u in users]
+
+    for user in users:
+        others = rng.sample(user_ids, min(len(user_ids), args.follows + args.requests + 1))
+        others = [other for other in others if other != user['id']]
+        for other in others[:args.follows]:
+            follows.append({'follower_id': user['id'], 'following_id': other, 'created_at': EPOCH})
+        for other in others[args.follows:args.follows + args.requests]:
+            requests_.append({'id': _uuid(rng), 'from_user_id': other, 'to_user_id': user['id'], 'created_at': EPOCH})
+
+        for c in range(args.conversations):
+            started = EPOCH + timedelta(days=rng.randint(0, 180), minutes=rng.randint(0, 1440))
+            conversation_id = _uuid(rng)
+            topic, opener = rng.choice(TOPICS)
+            turns = message_count(rng, args.messages)
+            conversations.append({
+                'id': conversation_id,
+                'user_id': user['id'],
+                'title': f'{topic.title()} chat {c}',
+                'system_prompt_version': CURRENT_SYSTEM_PROMPT_VERSION,
+                'created_at': started,
+                'updated_at': started + timedelta(minutes=2 * turns),
+            })
+            for t in range(turns):
+                at = started + timedelta(minutes=2 * t, seconds=1)
+                messages.append({
+                    'id': _uuid(rng), 'conversation_id': conversation_id, 'role': 'user',
+                    'content': opener if t == 0 else f'{opener} ({t})', 'created_at': at, 'edited': False,
+                })
+                messages.append({
+                    'id': _uuid(rng), 'conversation_id': conversation_id, 'role': 'assistant',
+                    'content': rng.choice(ASSISTANT_REPLIES), 'created_at': at + timedelta(seconds=5), 'edited': False,
+                })
+            if rng.random() < args.memory_rate:
+                memories.append({
+                    'id': _uuid(rng), 'user_id': user['id'], 'fact': f'user talks about {topic}',
+                    'source_conversation_id': conversation_id, 'is_displayed': True, 'created_at': started,
+                })
+
+    return {
+        'users': users,
+        'user_follows': follows,
+        'follow_requests': requests_,
+        'conversations': conversations,
+        'messages': messages,
+        'user_memories': memories,
+    }
+
+
+def reset(connection, tables):
+    bench_users = tables['users'].c.username.like(f'{USER_PREFIX}%')
+    user_ids = [row.id for row in connection.execute(tables['users'].select().where(bench_users))]
+    if not user_ids:
+        return
+    conversation_ids = tables['conversations'].select().with_only_columns(tables['conversations'].c.id) \
+        .where(tables['conversations'].c.user_id.in_(user_ids))
+    connection.execute(tables['user_memories'].delete().where(tables['user_memories'].c.user_id.in_(user_ids)))
+    # Written by chat turns run against the seeded users
+    for table in ('user_profile_digests', 'song_recommendations'):
+        connection.execute(tables[table].delete().where(tables[table].c.user_id.in_(user_ids)))
+    connection.execute(tables['messages'].delete().where(tables['messages'].c.conversation_id.in_(conversation_ids)))
+    connection.execute(tables['conversations'].delete().where(tables['conversations'].c.user_id.in_(user_ids)))
+    connection.execute(tables['follow_requests'].delete().where(
+        tables['follow_requests'].c.from_user_id.in_(user_ids) | tables['follow_requests'].c.to_user_id.in_(user_ids)))
+    connection.execute(tables['user_follows'].delete().where(
+        tables['user_follows'].c.follower_id.in_(user_ids) | tables['user_follows'].c.following_id.in_(user_ids)))
+    connection.execute(tables['users'].delete().where(bench_users))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a deterministic benchmark dataset')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--follows', type=int, default=15, help='Accounts each user follows')
+    parser.add_argument('--requests', type=int, default=3, help='Pending follow requests per user')
+    parser.add_argument('--conversations', type=int, default=12, help='Conversations per user')
+    parser.add_argument('--messages', type=float, default=8, help='Mean user turns per conversation')
+    parser.add_argument('--memory-rate', type=float, default=0.5, help='Share of conversations that produced a memory')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--reset', action='store_true', help='Delete previous bench_ rows first')
+    args = parser.parse_args()
+
+    from app import app
+    from models import db
+
+    rows = generate(args)
+    with app.app_context():
+        tables = db.metadata.tables
+        with db.engine.begin() as connection:
+            if args.reset:
+                reset(connection, tables)
+            for name, table_rows in rows.items():
+                if table_rows:
+                    connection.execute(tables[name].insert(), table_rows)
+
+    print("🌱 Seeded " + ', '.join(f"{len(table_rows)} {name}" for name, table_rows in rows.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Cross-process Socket.IO fan-out check
+
+Starts the local backplane broker (socketio_broker.py), the mock OpenAI
+upstream (tagging every reply with a [MEMORY: ...]) and two separate
+gunicorn servers sharing SOCKETIO_MESSAGE_QUEUE. One Socket.IO client
+joins the user's room on each server, then chat turns are sent to the
+first server only. Every saved memory must reach both clients; the report
+gives the extra delay of the client on the other server over the one on
+the serving process.
+
+Pass --backplane none to run the two servers without a queue and see the
+remote client miss every update.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python benchmarks/seed.py --reset
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/socketio_fanout.py --turns 20
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import requests
+import socketio as socketio_client
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import mock_openai  # noqa: E402
+import socketio_broker  # noqa: E402
+from chat_load_test import chat_turn, load_conversations  # noqa: E402
+from bench_stats import percentile  # noqa: E402
+from endpoint_bench import start_server  # noqa: E402
+
+
+class RoomListener:
+    """A Socket.IO client in one user's room, recording when each memory arrives"""
+
+    def __init__(self, base_url, user):
+        self.arrivals = {}
+        self.updated = threading.Condition()
+        self.client = socketio_client.Client()
+        joined = threading.Event()
+        self.client.on('room_joined', lambda data: joined.set())
+        self.client.on('memory_updated', self._on_memory)
+        # Polling only needs no extra client packages; each server is one process, so no stickiness issue
+        self.client.connect(base_url, transports=['polling'])
+        self.client.emit('join_user_room', {'user_id': user})
+        if not joined.wait(10):
+            raise SystemExit(f'❌ Could not join the room on {base_url}')
+
+    def _on_memory(self, data):
+        with self.updated:
+            self.arrivals[data['memory']['id']] = time.perf_counter()
+            self.updated.notify_all()
+
+    def wait_for(self, count, timeout):
+        deadline = time.monotonic() + timeout
+        with self.updated:
+            while len(self.arrivals) < count and time.monotonic() < deadline:
+                self.updated.wait(deadline - time.monotonic())
+        return len(self.arrivals) >= count
+
+    def close(self):
+        self.client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify Socket.IO emits reach clients connected to another process')
+    parser.add_argument('--backplane', choices=['local', 'none'], default='local')
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--port', type=int, default=5058, help='First server; the second uses port + 1')
+    parser.add_argument('--broker-port', type=int, default=6391)
+    parser.add_argument('--mock-port', type=int, default=8768)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--user-index', type=int, default=0, help='Seeded user whose room is watched')
+    parser.add_argument('--timeout', type=float, default=5.0, help='Seconds to wait for each delivery')
+    args = parser.parse_args()
+
+    broker = socketio_broker.start_in_thread(port=args.broker_port) if args.backplane == 'local' else None
+    mock_config = mock_openai.build_parser().parse_args([
+        '--port', str(args.mock_port), '--header-latency-ms', '20', '--token-delay-ms', '0',
+        '--tokens', '10', '--memory-every', '1'])
+    mock_server = mock_openai.start_in_thread(mock_config)
+    mock_url = f'http://{mock_config.host}:{mock_config.port}/v1'
+
+    if broker:
+        os.environ['SOCKETIO_MESSAGE_QUEUE'] = f'local://127.0.0.1:{args.broker_port}'
+    else:
+        os.environ.pop('SOCKETIO_MESSAGE_QUEUE', None)
+    os.environ['SOCKETIO_CHANNEL'] = f'glow-fanout-{os.getpid()}'
+
+    processes, listeners = [], []
+    delivered_remote = 0
+    gaps = []
+    try:
+        for port in (args.port, args.port + 1):
+            process, base_url = start_server(port, 1, args.threads, mock_url)
+            processes.append((process, base_url))
+        serving_url, other_url = processes[0][1], processes[1][1]
+
+        conversations = load_conversations(serving_url, args.user_index + 1)
+        from seed import username
+        user = username(args.user_index)
+        if user not in conversations:
+            raise SystemExit(f'❌ Seeded user {user} has no conversations')
+        local, remote = RoomListener(serving_url, user), RoomListener(other_url, user)
+        listeners = [local, remote]
+
+        session = requests.Session()
+        for turn in range(1, args.turns + 1):
+            _, _, completed = chat_turn(session, serving_url, user, conversations[user][0], timeout=30)
+            if not completed or not local.wait_for(turn, args.timeout):
+                raise SystemExit(f'❌ Turn {turn} produced no memory update on the serving process')
+            remote.wait_for(turn, args.timeout if broker else 0.5)
+
+        for memory_id, local_at in local.arrivals.items():
+            remote_at = remote.arrivals.get(memory_id)
+            if remote_at is not None:
+                delivered_remote += 1
+                gaps.append(remote_at - local_at)
+    finally:
+        for listener in listeners:
+            listener.close()
+        for process, _ in processes:
+            process.terminate()
+            process.wait(timeout=10)
+        mock_server.shutdown()
+        if broker:
+            broker.shutdown()
+
+    ok = delivered_remote == args.turns
+    print(f"{'✅' if ok else '❌'} backplane={args.backplane}: {delivered_remote}/{args.turns} memory updates "
+          f"reached the client on the other server")
+    if gaps:
+        print(f"📊 Cross-process fan-out delay p50={percentile(gaps, 50) * 1000:.1f}ms "
+              f"p95={percentile(gaps, 95) * 1000:.1f}ms max={max(gaps) * 1000:.1f}ms")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
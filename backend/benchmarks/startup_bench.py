@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Worker startup benchmark
+
+Spawns fresh interpreters and measures, per run:
+  - import time of the app module (what every gunicorn worker pays on spawn)
+  - time to first request served through the app's test client
+
+Results can be appended to a JSON lines file so startup time is tracked
+across commits, and --budget-ms fails the run if the median import plus
+first request exceeds the budget.
+
+Usage:
+    python benchmarks/startup_bench.py --runs 10 --output startup_results.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+client = app_module.app.test_client()
+response = client.get('/api/health')
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (served - imported) * 1000,
+    "status": response.status_code,
+}))
+'''
+
+
+def run_probe():
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    # The app may print during startup; the probe result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure app import and time-to-first-request')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help='append a JSON result line to this file')
+    parser.add_argument('--budget-ms', type=float, help='fail if median startup exceeds this')
+    args = parser.parse_args()
+
+    results = [run_probe() for _ in range(args.runs)]
+    import_ms = [r['import_ms'] for r in results]
+    first_request_ms = [r['first_request_ms'] for r in results]
+    total_ms = [r['import_ms'] + r['first_request_ms'] for r in results]
+
+    summary = {
+        'timestamp': time.time(),
+        'runs': args.runs,
+        'import_ms_median': round(statistics.median(import_ms), 2),
+        'import_ms_max': round(max(import_ms), 2),
+        'first_request_ms_median': round(statistics.median(first_request_ms), 2),
+        'startup_ms_median': round(statistics.median(total_ms), 2),
+    }
+
+    print(f"🚀 Import: median {summary['import_ms_median']}ms (max {summary['import_ms_max']}ms)")
+    print(f"📨 First request: median {summary['first_request_ms_median']}ms")
+    print(f"⏱️  Startup total: median {summary['startup_ms_median']}ms")
+
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(summary) + '\n')
+
+    if args.budget_ms is not None and summary['startup_ms_median'] > args.budget_ms:
+        print(f"❌ Startup exceeds budget of {args.budget_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
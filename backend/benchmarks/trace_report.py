@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Chat turn trace report
+
+Summarizes the OTLP/JSON traces written to TRACE_SINK_PATH by tracing.py:
+for every span, the distribution of its duration and of its start offset
+from the beginning of the turn, and for every milestone event
+(first_upstream_byte, first_token, first_client_chunk, last_token) its
+offset from the start of the turn. Reading the offsets top to bottom
+shows where the time to first token goes.
+
+Usage:
+    TRACE_SINK_PATH=/tmp/glow_traces.jsonl python app.py   # collect
+    python benchmarks/trace_report.py /tmp/glow_traces.jsonl
+    python benchmarks/trace_report.py /tmp/glow_traces.jsonl --last 200
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+from bench_stats import percentile
+
+
+def statistics_key(values):
+    # Order rows by when they typically happen within a turn
+    return percentile(values, 50)
+
+
+def load_turns(path):
+    """Yield the span list of each recorded turn"""
+    with open(path, encoding='utf-8') as sink:
+        for line in sink:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            for resource in record.get('resourceSpans', []):
+                for scope in resource.get('scopeSpans', []):
+                    yield scope.get('spans', [])
+
+
+def summarize(turns):
+    durations = defaultdict(list)
+    offsets = defaultdict(list)
+    events = defaultdict(list)
+    errors = 0
+
+    for spans in turns:
+        root = next((s for s in spans if 'parentSpanId' not in s), None)
+        if root is None:
+            continue
+        turn_start = int(root['startTimeUnixNano'])
+        if root.get('status', {}).get('code') == 2:
+            errors += 1
+        for span in spans:
+            start = int(span['startTimeUnixNano'])
+            end = int(span['endTimeUnixNano'])
+            durations[span['name']].append((end - start) / 1e6)
+            offsets[span['name']].append((start - turn_start) / 1e6)
+            for event in span.get('events', []):
+                events[event['name']].append((int(event['timeUnixNano']) - turn_start) / 1e6)
+
+    return durations, offsets, events, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize chat turn traces')
+    parser.add_argument('path', help='Trace sink file (TRACE_SINK_PATH)')
+    parser.add_argument('--last', type=int, default=0, help='Only use the most recent N turns')
+    args = parser.parse_args()
+
+    turns = list(load_turns(args.path))
+    if args.last:
+        turns = turns[-args.last:]
+    if not turns:
+        print("❌ No traces found")
+        sys.exit(1)
+
+    durations, offsets, events, errors = summarize(turns)
+    print(f"📊 {len(turns)} turns ({errors} with errors)")
+
+    print(f"\n{'span':<24} {'n':>5} {'start p50':>10} {'dur p50':>9} {'dur p95':>9} {'dur max':>9}")
+    for name in sorted(durations, key=lambda n: statistics_key(offsets[n])):
+        values = durations[name]
+        print(f"{name:<24} {len(values):>5} {percentile(offsets[name], 50):>8.1f}ms "
+              f"{percentile(values, 50):>7.1f}ms {percentile(values, 95):>7.1f}ms {max(values):>7.1f}ms")
+
+    if events:
+        print(f"\n{'milestone':<24} {'n':>5} {'p50':>9} {'p95':>9} {'max':>9}")
+        for name in sorted(events, key=lambda n: statistics_key(events[n])):
+            values = events[name]
+            print(f"{name:<24} {len(values):>5} {percentile(values, 50):>7.1f}ms "
+                  f"{percentile(values, 95):>7.1f}ms {max(values):>7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
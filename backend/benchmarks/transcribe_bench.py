@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Streaming transcription check and benchmark
+
+Runs the app on a local werkzeug server with the upstream pointed at
+benchmarks/mock_openai.py and uploads synthetic recordings to
+/api/transcribe with a chunked (streamed) multipart body:
+
+  - a PCM WAV of --seconds, which must come back as segments stitched in order
+  - an opaque webm-like blob, which must be forwarded as one streamed request
+  - a WAV whose header declares more than TRANSCRIBE_MAX_SECONDS, which
+    must be rejected with 413 before its samples are read
+  - both of the first two uploads again, which must be answered from the
+    transcript cache without an upstream call, and --duplicates identical
+    new uploads at once, which must share a single upstream call
+  - --live-seconds of raw PCM sent over Socket.IO (transcribe_start /
+    transcribe_chunk / transcribe_stop) at --live-speed times real time,
+    which must produce in-order partials and a final transcript roughly one
+    upstream call after the stop
+
+Reports wall time and the peak traced Python allocation during each
+upload, which stays near segment size x workers rather than upload size.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/transcribe_bench.py --seconds 300 --segment-seconds 30
+"""
+
+import argparse
+import math
+import os
+import re
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_RATE = 16000
+BOUNDARY = 'transcribebenchboundary'
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f'❌ Nothing listening on port {port}')
+
+
+def wav_stream(seconds, declared_seconds=None, chunk_seconds=1):
+    """Yield a 16 kHz mono 16-bit sine WAV a second at a time"""
+    declared = int((declared_seconds or seconds) * SAMPLE_RATE * 2)
+    fmt = struct.pack('<HHIIHH', 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16)
+    yield b'RIFF' + struct.pack('<I', 36 + declared) + b'WAVE' + b'fmt ' + struct.pack('<I', 16) + fmt \
+        + b'data' + struct.pack('<I', declared)
+    samples = SAMPLE_RATE * chunk_seconds
+    second = struct.pack(f'<{samples}h', *(int(8000 * math.sin(2 * math.pi * 440 * i / SAMPLE_RATE)) for i in range(samples)))
+    for n in range(int(seconds // chunk_seconds)):
+        # Stamp each chunk so segments differ and aren't deduplicated by the transcript cache
+        yield struct.pack('<h', n % 32768) + second[2:]
+
+
+def blob_stream(size, chunk=64 * 1024):
+    pattern = bytes(range(256)) * (chunk // 256)
+    for offset in range(0, size, chunk):
+        yield pattern[:min(chunk, size - offset)]
+
+
+def multipart(filename, mimetype, chunks):
+    yield (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="audio"; filename="{filename}"\r\n'
+           f'Content-Type: {mimetype}\r\n\r\n').encode()
+    yield from chunks
+    yield f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+def upload(base_url, filename, mimetype, chunks):
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    response = requests.post(
+        f'{base_url}/api/transcribe',
+        data=multipart(filename, mimetype, chunks),
+        headers={'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'},
+        timeout=300,
+    )
+    elapsed = time.perf_counter() - started
+    peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+    return response, elapsed, peak_mb
+
+
+def upstream_transcriptions(mock_url):
+    return requests.get(f'{mock_url}/_stats', timeout=5).json().get('/v1/audio/transcriptions', 0)
+
+
+def dedup_check(base_url, mock_url, wav_seconds, blob_bytes, duplicates):
+    """Resubmit both earlier uploads, then race identical new ones; returns upstream calls made per step"""
+    results = []
+    before = upstream_transcriptions(mock_url)
+    response, elapsed, _ = upload(base_url, 'recording.wav', 'audio/wav', wav_stream(wav_seconds))
+    results.append(('WAV resubmitted', response.status_code == 200, upstream_transcriptions(mock_url) - before, 0, elapsed))
+
+    before = upstream_transcriptions(mock_url)
+    response, elapsed, _ = upload(base_url, 'recording.webm', 'audio/webm', blob_stream(blob_bytes))
+    results.append(('webm resubmitted', response.status_code == 200, upstream_transcriptions(mock_url) - before, 0, elapsed))
+
+    # A blob nobody has sent yet, uploaded by several clients at once
+    before = upstream_transcriptions(mock_url)
+    responses = []
+    started = time.perf_counter()
+    threads = [threading.Thread(target=lambda: responses.append(
+        upload(base_url, 'retry.webm', 'audio/webm', blob_stream(blob_bytes // 2))[0])) for _ in range(duplicates)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    texts = {r.json().get('text') for r in responses if r.status_code == 200}
+    ok = len(responses) == duplicates and all(r.status_code == 200 for r in responses) and len(texts) == 1
+    results.append((f'{duplicates} concurrent duplicates', ok, upstream_transcriptions(mock_url) - before, 1,
+                    time.perf_counter() - started))
+    return results
+
+
+def live_check(base_url, seconds, speed, chunk_seconds=0.25):
+    """Stream PCM over Socket.IO; returns (partial indexes, final payload, stop->final seconds)"""
+    import socketio as socketio_client
+
+    partials, done = [], threading.Event()
+    final = {}
+    client = socketio_client.Client()
+    client.on('transcribe_partial', lambda data: partials.append(data['index']))
+    client.on('transcribe_final', lambda data: (final.update(data), done.set()))
+    client.on('transcribe_error', lambda data: (final.update(data), done.set()))
+    client.connect(base_url, transports=['polling'])
+    try:
+        client.emit('transcribe_start', {'format': 'pcm_s16le', 'sample_rate': SAMPLE_RATE, 'channels': 1})
+        wav = b''.join(wav_stream(seconds, chunk_seconds=1))[44:]
+        chunk_bytes = int(SAMPLE_RATE * 2 * chunk_seconds)
+        for seq, offset in enumerate(range(0, len(wav), chunk_bytes)):
+            client.emit('transcribe_chunk', {'seq': seq, 'audio': wav[offset:offset + chunk_bytes]})
+            time.sleep(chunk_seconds / speed)
+        stopped = time.perf_counter()
+        client.emit('transcribe_stop')
+        done.wait(60)
+        return partials, final, time.perf_counter() - stopped
+    finally:
+        client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exercise the streaming transcription path against a mock upstream')
+    parser.add_argument('--seconds', type=float, default=300, help='Length of the synthetic WAV')
+    parser.add_argument('--segment-seconds', type=float, default=30)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--blob-mb', type=float, default=5, help='Size of the non-WAV upload')
+    parser.add_argument('--upstream-ms', type=float, default=400, help='Mock time per transcription call')
+    parser.add_argument('--duplicates', type=int, default=4, help='Concurrent identical uploads to coalesce')
+    parser.add_argument('--live-seconds', type=float, default=20, help='Length of the live Socket.IO stream')
+    parser.add_argument('--live-speed', type=float, default=4, help='Multiple of real time to send live audio at')
+    parser.add_argument('--port', type=int, default=5057)
+    parser.add_argument('--mock-port', type=int, default=8767)
+    args = parser.parse_args()
+
+    # The mock runs in its own process so it doesn't show up in the traced allocations
+    mock_process = subprocess.Popen([
+        sys.executable, os.path.join(BENCH_DIR, 'mock_openai.py'),
+        '--port', str(args.mock_port), '--completion-ms', str(args.upstream_ms)],
+        stdout=subprocess.DEVNULL)
+    wait_for_port(args.mock_port)
+
+    # Settings are read at import time, so configure before importing the app
+    os.environ.update({
+        'OPENAI_API_BASE': f'http://127.0.0.1:{args.mock_port}/v1',
+        'OPENAI_API_KEY': 'sk-benchmark',
+        'TRANSCRIBE_SEGMENT_SECONDS': str(args.segment_seconds),
+        'TRANSCRIBE_WORKERS': str(args.workers),
+        'TRANSCRIBE_MAX_SECONDS': str(max(args.seconds, 60) + 1),
+        'TRANSCRIBE_CACHE_DIR': tempfile.mkdtemp(prefix='transcribe-bench-'),
+        'LOG_LEVEL': 'WARNING',
+    })
+    import logging
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from app import app
+
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    tracemalloc.start()
+    failed = False
+    try:
+        expected_segments = math.ceil(args.seconds / args.segment_seconds)
+        response, elapsed, peak = upload(base_url, 'recording.wav', 'audio/wav', wav_stream(args.seconds))
+        body = response.json()
+        order = [int(n) for n in re.findall(r'recording-(\d+)\.wav', body.get('text', ''))]
+        ok = response.status_code == 200 and body.get('segments') == expected_segments \
+            and order == list(range(expected_segments))
+        failed |= not ok
+        serial = expected_segments * args.upstream_ms / 1000
+        print(f"{'✅' if ok else '❌'} WAV {args.seconds:.0f}s: {body.get('segments')} segments in {elapsed:.2f}s "
+              f"(serial upstream would be {serial:.1f}s), peak {peak:.1f}MB")
+
+        blob_bytes = int(args.blob_mb * 1024 * 1024)
+        response, elapsed, peak = upload(base_url, 'recording.webm', 'audio/webm', blob_stream(blob_bytes))
+        body = response.json()
+        ok = response.status_code == 200 and body.get('segments') == 1 and 'recording.webm' in body.get('text', '')
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} webm {args.blob_mb:.0f}MB streamed in {elapsed:.2f}s, peak {peak:.1f}MB")
+
+        too_long = float(os.environ['TRANSCRIBE_MAX_SECONDS']) * 2
+        response, elapsed, _ = upload(base_url, 'long.wav', 'audio/wav', wav_stream(1, declared_seconds=too_long))
+        ok = response.status_code == 413
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} over-long WAV rejected with HTTP {response.status_code} in {elapsed * 1000:.0f}ms")
+
+        mock_url = os.environ['OPENAI_API_BASE']
+        for label, ok, calls, expected_calls, elapsed in dedup_check(
+                base_url, mock_url, args.seconds, blob_bytes, args.duplicates):
+            ok = ok and calls == expected_calls
+            failed |= not ok
+            print(f"{'✅' if ok else '❌'} {label}: {calls} upstream call(s) (expected {expected_calls}) in {elapsed:.2f}s")
+
+        partials, final, latency = live_check(base_url, args.live_seconds, args.live_speed)
+        order = [int(n) for n in re.findall(r'live-(\d+)\.wav', final.get('text', ''))]
+        ok = bool(final.get('segments')) and partials == list(range(final['segments'])) \
+            and order == partials
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} live {args.live_seconds:.0f}s: {len(partials)} partials in order, "
+              f"final transcript {latency * 1000:.0f}ms after stop")
+    finally:
+        server.shutdown()
+        mock_process.terminate()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
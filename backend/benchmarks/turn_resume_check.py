@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Resumable chat turn check
+
+Starts the mock upstream (slow enough that a turn is still streaming when
+the client drops) and a gunicorn server, then for each scenario verifies
+the full reply is recovered and the upstream was called only once:
+
+  - HTTP drop + resume: read --drop-after chunks of /api/chatOpenAI, close
+    the connection, resume with GET /api/chat/turns/<turn_id>?offset=N
+  - vanished client: drop after a few chunks and never come back; the
+    assistant message must still be saved once the turn finishes
+  - Socket.IO drop + resume: chat_send on one connection, disconnect,
+    chat_resume on a new one from the last chunk offset received
+  - idempotent retries: --duplicates concurrent POSTs with one
+    Idempotency-Key, then one more after the turn finished, must all get
+    the same turn and reply from a single upstream call and user message
+
+Usage:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python benchmarks/seed.py --reset
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench python benchmarks/turn_resume_check.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+import requests
+import socketio as socketio_client
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import mock_openai  # noqa: E402
+from chat_load_test import load_conversations  # noqa: E402
+from endpoint_bench import start_server  # noqa: E402
+
+MESSAGE = 'resume check message, tell me something nice'
+
+
+def sse_events(response):
+    buffer = ''
+    for data in response.iter_content(chunk_size=None, decode_unicode=True):
+        buffer += data
+        while '\n\n' in buffer:
+            frame, buffer = buffer.split('\n\n', 1)
+            if frame.startswith('data: '):
+                yield json.loads(frame[6:])
+
+
+def upstream_streams(mock_url):
+    return requests.get(f'{mock_url}/_stats', timeout=5).json().get('/v1/chat/completions', 0)
+
+
+def start_and_drop(base_url, user, conversation_id, drop_after):
+    """Start a turn over HTTP, keep `drop_after` chunks, then hang up; returns (turn_id, content)"""
+    response = requests.post(f'{base_url}/api/chatOpenAI', json={
+        'message': MESSAGE, 'user_id': user, 'conversation_id': conversation_id,
+    }, stream=True, timeout=60)
+    turn_id, content, chunks = None, '', 0
+    for event in sse_events(response):
+        if event['type'] == 'turn':
+            turn_id = event['turn_id']
+        elif event['type'] == 'chunk':
+            content += event['content']
+            chunks += 1
+            if chunks == drop_after:
+                break
+    response.close()
+    return turn_id, content, chunks
+
+
+def http_resume(base_url, mock_url, user, conversation_id, expected, drop_after):
+    before = upstream_streams(mock_url)
+    turn_id, content, offset = start_and_drop(base_url, user, conversation_id, drop_after)
+    started = time.perf_counter()
+    response = requests.get(f'{base_url}/api/chat/turns/{turn_id}', params={'offset': offset}, stream=True, timeout=60)
+    first = None
+    complete = False
+    for event in sse_events(response):
+        if event['type'] == 'chunk':
+            first = first or time.perf_counter() - started
+            content += event['content']
+        elif event['type'] == 'complete':
+            complete = True
+    calls = upstream_streams(mock_url) - before
+    ok = complete and content == expected and calls == 1
+    return ok, f'{offset} chunks before the drop, first resumed chunk after {(first or 0) * 1000:.0f}ms, {calls} upstream call'
+
+
+def vanished_client(base_url, user, conversation_id, expected, drop_after, timeout):
+    start_and_drop(base_url, user, conversation_id, drop_after)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = requests.get(f'{base_url}/api/conversations/{conversation_id}/messages', timeout=10)
+        messages = response.json()['conversation'].get('messages', [])
+        if messages and messages[-1]['role'] == 'assistant' and messages[-2]['content'] == MESSAGE:
+            saved = messages[-1]['content']
+            return saved == expected, f'assistant message saved ({len(saved)} chars) after the client left'
+        time.sleep(0.2)
+    return False, 'assistant message was never saved'
+
+
+def socket_resume(base_url, mock_url, user, conversation_id, expected, drop_after):
+    before = upstream_streams(mock_url)
+    state = {'turn_id': None, 'content': '', 'offset': 0}
+    dropped = threading.Event()
+    first = socketio_client.Client()
+
+    def on_chunk(data):
+        if dropped.is_set():
+            return True
+        state['content'] += data['content']
+        state['offset'] = data['offset']
+        if data['offset'] >= drop_after:
+            dropped.set()
+        return True
+
+    first.on('chat_started', lambda data: state.update(turn_id=data['turn_id']))
+    first.on('chat_chunk', on_chunk)
+    first.connect(base_url, transports=['polling'])
+    first.emit('chat_send', {'message': MESSAGE, 'user_id': user, 'conversation_id': conversation_id})
+    if not dropped.wait(30):
+        return False, 'no chunks received before the drop'
+    first.disconnect()
+
+    done = threading.Event()
+    second = socketio_client.Client()
+    second.on('chat_chunk', lambda data: state.update(content=state['content'] + data['content']) or True)
+    second.on('chat_complete', lambda data: done.set())
+    second.on('chat_error', lambda data: (state.update(error=data['error']), done.set()))
+    second.connect(base_url, transports=['polling'])
+    second.emit('chat_resume', {'turn_id': state['turn_id'], 'offset': state['offset']})
+    finished = done.wait(60)
+    second.disconnect()
+    calls = upstream_streams(mock_url) - before
+    ok = finished and 'error' not in state and state['content'] == expected and calls == 1
+    return ok, f"resumed at offset {state['offset']}, {calls} upstream call" + (f", error: {state['error']}" if 'error' in state else '')
+
+
+def idempotent_retries(base_url, mock_url, user, conversation_id, expected, duplicates):
+    def messages():
+        response = requests.get(f'{base_url}/api/conversations/{conversation_id}/messages', timeout=10)
+        return response.json()['conversation'].get('messages', [])
+
+    def send(results, index):
+        response = requests.post(f'{base_url}/api/chatOpenAI', json={
+            'message': MESSAGE, 'user_id': user, 'conversation_id': conversation_id,
+        }, headers={'Idempotency-Key': key}, stream=True, timeout=60)
+        content = ''
+        for event in sse_events(response):
+            if event['type'] == 'chunk':
+                content += event['content']
+        results[index] = (response.headers.get('X-Turn-ID'), content)
+
+    key = uuid.uuid4().hex
+    before_calls, before_messages = upstream_streams(mock_url), len(messages())
+    results = [None] * (duplicates + 1)
+    threads = [threading.Thread(target=send, args=(results, i)) for i in range(duplicates)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    send(results, duplicates)  # a late retry, after the turn has finished
+    calls = upstream_streams(mock_url) - before_calls
+    added = len(messages()) - before_messages
+    turns = {turn_id for turn_id, _ in results}
+    ok = len(turns) == 1 and all(content == expected for _, content in results) and calls == 1 and added == 2
+    return ok, f'{len(results)} requests -> {len(turns)} turn, {calls} upstream call, {added} messages saved'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify chat turns survive client drops and resume without a new upstream call')
+    parser.add_argument('--port', type=int, default=5061)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--mock-port', type=int, default=8770)
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--token-delay-ms', type=float, default=40)
+    parser.add_argument('--drop-after', type=int, default=5, help='Chunks received before the client drops')
+    parser.add_argument('--duplicates', type=int, default=4, help='Concurrent requests sharing one Idempotency-Key')
+    args = parser.parse_args()
+
+    mock_config = mock_openai.build_parser().parse_args([
+        '--port', str(args.mock_port), '--header-latency-ms', '50', '--token-delay-ms', str(args.token_delay_ms),
+        '--tokens', str(args.tokens), '--memory-every', '0'])
+    mock_server = mock_openai.start_in_thread(mock_config)
+    mock_url = f'http://{mock_config.host}:{mock_config.port}/v1'
+    expected = ''.join(mock_openai.WORDS[i % len(mock_openai.WORDS)] + ' ' for i in range(args.tokens))
+    turn_seconds = (50 + args.tokens * args.token_delay_ms) / 1000
+
+    process, base_url = start_server(args.port, 1, args.threads, mock_url)
+    failed = False
+    try:
+        conversations = load_conversations(base_url, 3)
+        users = list(conversations)
+        checks = [
+            ('HTTP drop + resume', lambda: http_resume(
+                base_url, mock_url, users[0], conversations[users[0]][0], expected, args.drop_after)),
+            ('vanished client', lambda: vanished_client(
+                base_url, users[1 % len(users)], conversations[users[1 % len(users)]][0], expected,
+                args.drop_after, turn_seconds + 10)),
+            ('Socket.IO drop + resume', lambda: socket_resume(
+                base_url, mock_url, users[2 % len(users)], conversations[users[2 % len(users)]][0], expected,
+                args.drop_after)),
+            ('idempotent retries', lambda: idempotent_retries(
+                base_url, mock_url, users[0], conversations[users[0]][0], expected, args.duplicates)),
+        ]
+        for label, check in checks:
+            ok, detail = check()
+            failed |= not ok
+            print(f"{'✅' if ok else '❌'} {label}: {detail}")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        mock_server.shutdown()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
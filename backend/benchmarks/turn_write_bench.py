@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Per-turn write latency benchmark
+
+Compares the end-of-turn writes done the old way (ORM add + commit for the
+assistant message, a second commit for the title, a separate session commit
+for the memory) with turn_writer.write_turn, which pipelines the same
+statements as prepared statements in one round trip.
+
+Run against a local PostgreSQL:
+    DATABASE_URL=postgresql+psycopg://localhost:5432/glow_bench \\
+        python benchmarks/turn_write_bench.py --turns 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy.orm import sessionmaker
+
+from models import db, User, Conversation, Message, UserMemory
+from turn_writer import write_turn
+
+DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql+psycopg://localhost:5432/glow_bench')
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def legacy_turn(conversation_id, user_id, content, fact):
+    """The pre-pipeline write sequence: three separate commits"""
+    conversation = db.session.get(Conversation, conversation_id)
+    db.session.add(Message(role='assistant', content=content, conversation_id=conversation_id))
+    db.session.commit()
+    conversation.title = 'Benchmark Chat'
+    db.session.commit()
+
+    Session = sessionmaker(bind=db.engine)
+    memory_session = Session()
+    memory_session.add(UserMemory(user_id=user_id, fact=fact, source_conversation_id=conversation_id))
+    memory_session.commit()
+    memory_session.close()
+
+
+def pipelined_turn(conversation_id, user_id, content, fact):
+    write_turn(
+        db.engine,
+        conversation_id,
+        messages=[('assistant', content)],
+        title='Benchmark Chat',
+        memory=(user_id, fact)
+    )
+
+
+def measure(fn, turns, conversation_id, user_id):
+    timings = []
+    content = 'x' * 800
+    for i in range(turns):
+        started = time.perf_counter()
+        fn(conversation_id, user_id, content, f'benchmark fact {i}')
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(name, timings):
+    ordered = sorted(timings)
+    p = lambda pct: ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))] * 1000
+    print(f"{name:>10}: mean={statistics.mean(timings) * 1000:.2f}ms "
+          f"p50={p(50):.2f}ms p95={p(95):.2f}ms p99={p(99):.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-turn write latency')
+    parser.add_argument('--turns', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        username = f'bench_{uuid.uuid4().hex[:8]}'
+        user = User(username=username, email=f'{username}@glow.app', name='Bench')
+        db.session.add(user)
+        db.session.commit()
+        conversation = Conversation(user_id=user.id, title='New Chat')
+        db.session.add(conversation)
+        db.session.commit()
+        user_id, conversation_id = user.id, conversation.id
+
+        try:
+            measure(legacy_turn, args.warmup, conversation_id, user_id)
+            measure(pipelined_turn, args.warmup, conversation_id, user_id)
+
+            print(f"📊 {args.turns} turns against {db.engine.url.render_as_string(hide_password=True)}")
+            summarize('legacy', measure(legacy_turn, args.turns, conversation_id, user_id))
+            summarize('pipelined', measure(pipelined_turn, args.turns, conversation_id, user_id))
+        finally:
+            db.session.rollback()
+            UserMemory.query.filter_by(user_id=user_id).delete()
+            Message.query.filter_by(conversation_id=conversation_id).delete()
+            Conversation.query.filter_by(id=conversation_id).delete()
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,511 @@
+"""
+The chat turn pipeline shared by the HTTP stream and the Socket.IO channel.
+
+prepare_turn() does everything that happens before the first token:
+resolve or create the conversation, store the user message, build the
+payload and open the upstream stream. Anything the caller should answer
+with an error response is raised as TurnError. ChatTurn.events() then
+relays the upstream tokens and, once the stream ends, saves the turn and
+yields the completion. /api/chatOpenAI writes each event as an SSE frame;
+the chat_send Socket.IO event (sockets.py) emits them to the sender.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+
+from flask import current_app
+
+from logging_setup import bind_request_id, get_request_id
+from memory_index import dedup_action, get_index, relevant_memories
+from metrics import (
+    chat_stream_duration, chat_stream_tokens, chat_stream_tokens_per_second, memory_dedup_total,
+    openai_cached_prompt_tokens, openai_prompt_tokens, openai_total_seconds, openai_ttft_seconds,
+)
+from models import db, User, Conversation, Message
+from openai_api import post_chat_completion
+from profile_digest import record_user_message
+from prompts import CURRENT_SYSTEM_PROMPT_VERSION, system_prompt
+from settings import openai_available
+from sockets import emit_memory_update
+from tracing import start_trace
+from turn_writer import write_turn
+
+logger = logging.getLogger('glow.chat')
+
+# Matches the [MEMORY: ...] note the model appends to a response
+MEMORY_PATTERN = re.compile(r'\[MEMORY:\s*([^\]]+)\]')
+
+# Saved memories most relevant to the new message are sent with each turn, so
+# the model keeps its personalization without the full history (0 = off)
+MEMORY_CONTEXT_K = int(os.getenv('MEMORY_CONTEXT_K', '5'))
+MEMORY_CONTEXT_MIN_SCORE = float(os.getenv('MEMORY_CONTEXT_MIN_SCORE', '0.1'))
+# Most recent conversation messages sent upstream (0 = all of them)
+CHAT_HISTORY_MESSAGES = int(os.getenv('CHAT_HISTORY_MESSAGES', '40'))
+
+
+class TurnError(Exception):
+    """A turn that can't start; the message and status go back to the client as-is"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def extract_memory_from_response(response_content):
+    """
+    Extract memory from GPT response if it contains [MEMORY: ...] format
+    Returns the memory fact or None if no memory found
+    """
+    # Look for [MEMORY: ...] pattern at the end of the response
+    matches = MEMORY_PATTERN.findall(response_content)
+
+    if matches:
+        # Return the last (most recent) memory found
+        return matches[-1].strip()
+
+    return None
+
+
+def generate_conversation_title(messages):
+    """Generate a title for a conversation using GPT"""
+    try:
+        if not openai_available or len(messages) < 2:
+            return "New Chat"
+
+        # Get first few messages to generate title
+        first_messages = messages[:3]  # Use first 3 messages
+
+        prompt = "Based on this conversation, generate a short, descriptive title (max 5 words):\n\n"
+        for msg in first_messages:
+            if msg['role'] != 'system':
+                prompt += f"{msg['role']}: {msg['content'][:100]}...\n"
+
+        payload = {
+            'model': 'gpt-4o',
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': 'Generate a short, descriptive title for this conversation. Keep it under 5 words and make it descriptive of the main topic.'
+                },
+                {
+                    'role': 'user',
+                    'content': prompt
+                }
+            ],
+            'max_tokens': 20,
+            'temperature': 0.3
+        }
+
+        response = post_chat_completion(payload, timeout=10)
+
+        if response.status_code == 200:
+            result = response.json()
+            title = result['choices'][0]['message']['content'].strip()
+            # Remove quotes if present
+            title = title.strip('"\'')
+            return title
+        else:
+            return "New Chat"
+
+    except Exception as e:
+        logger.warning("Error generating title: %s", e)
+        return "New Chat"
+
+
+def history_window(messages, limit=CHAT_HISTORY_MESSAGES):
+    """
+    The conversation messages to send: leading system rows (prompts stored
+    before they were versioned) plus at most `limit` of the rest. The cut
+    moves in steps of half the limit rather than on every turn, so
+    consecutive turns keep sharing a cacheable prefix, and then forward to
+    the next user message, so the window never opens on a reply.
+    """
+    pinned = 0
+    while pinned < len(messages) and messages[pinned].role == 'system':
+        pinned += 1
+    rest = messages[pinned:]
+    if limit <= 0 or len(rest) <= limit:
+        return messages
+    step = max(1, limit // 2)
+    start = -(-(len(rest) - limit) // step) * step
+    user_start = next((i for i in range(start, len(rest)) if rest[i].role == 'user'), None)
+    if user_start is not None:
+        start = user_start
+    return messages[:pinned] + rest[start:]
+
+
+def memory_context(facts):
+    """The system message listing retrieved memories"""
+    lines = '\n'.join(f'- {fact}' for fact in facts)
+    return {
+        'role': 'system',
+        'content': f'Things you remember about this user from earlier conversations, most relevant first:\n{lines}'
+    }
+
+
+def prepare_turn(data, transport='http'):
+    """Store the user message and open the upstream stream; returns a ChatTurn or raises TurnError"""
+    data = data or {}
+    trace = start_trace('chat_turn', **{
+        'glow.request_id': get_request_id(),
+        'glow.new_conversation': not data.get('conversation_id'),
+        'glow.regenerate': bool(data.get('regenerate_from_message')),
+        'glow.transport': transport,
+    })
+    try:
+        return _start_turn(data, trace)
+    except Exception as e:
+        # Failed turns are reported too; a started turn's trace is finished by ChatTurn
+        trace.finish(error=str(e))
+        raise
+
+
+def _start_turn(data, trace):
+    if 'message' not in data:
+        raise TurnError('Message is required', 400)
+
+    user_message = data['message']
+    conversation_id = data.get('conversation_id')  # Optional for existing conversations
+    user_id = data.get('user_id', 'default_user')  # For now, use a default user
+    regenerate_from_message = data.get('regenerate_from_message')  # For message editing
+
+    # Check if conversation exists or create new one
+    if conversation_id:
+        conversation = Conversation.query.get(conversation_id)
+        if not conversation:
+            raise TurnError('Conversation not found', 404)
+
+        # Handle message regeneration (editing case)
+        if regenerate_from_message:
+            # Find the message that was edited
+            edited_message = Message.query.filter_by(
+                id=regenerate_from_message,
+                conversation_id=conversation.id
+            ).first()
+
+            if not edited_message:
+                raise TurnError('Edited message not found', 404)
+
+            # Remove all messages after the edited message
+            messages_to_remove = Message.query.filter(
+                Message.conversation_id == conversation.id,
+                Message.created_at > edited_message.created_at
+            ).all()
+
+            for msg in messages_to_remove:
+                db.session.delete(msg)
+
+            db.session.commit()
+    else:
+        # Create new conversation
+        # First, ensure user exists (use the actual user_id from request)
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            user = User(
+                username=user_id,
+                email=f'{user_id}@glow.com',
+                name=user_id.title()
+            )
+            db.session.add(user)
+            db.session.commit()
+
+        # Create new conversation; the system prompt is referenced by version, not copied into a message
+        conversation = Conversation(
+            user_id=user.id,
+            title="New Chat",  # Will be updated after first response
+            system_prompt_version=CURRENT_SYSTEM_PROMPT_VERSION
+        )
+        db.session.add(conversation)
+        db.session.commit()
+
+    # Add user message to conversation (skip if regenerating from an edited message)
+    if not regenerate_from_message:
+        with trace.span('db.commit_user_message'):
+            user_msg = Message(
+                conversation_id=conversation.id,
+                role='user',
+                content=user_message
+            )
+            db.session.add(user_msg)
+            db.session.commit()
+
+    # Prepare messages for OpenAI API. The upstream caches prompt prefixes it has
+    # seen recently (from 1024 tokens, in 128-token steps), so the payload is
+    # ordered from most to least shared: the versioned system prompt, identical
+    # for every conversation on that version, then the history, which only
+    # grows at the end. Anything that changes per turn must go after both.
+    with trace.span('payload.build') as span:
+        messages_for_api = []
+        prompt = system_prompt(conversation.system_prompt_version)
+        if prompt:
+            messages_for_api.append({'role': 'system', 'content': prompt})
+        history = history_window(conversation.messages)
+        for msg in history:
+            messages_for_api.append({
+                'role': msg.role,
+                'content': msg.content
+            })
+        span.set_attribute('glow.message_count', len(messages_for_api))
+        span.set_attribute('glow.history_dropped', len(conversation.messages) - len(history))
+
+    memory_index = None
+    if MEMORY_CONTEXT_K > 0:
+        with trace.span('memory.retrieve') as span:
+            try:
+                # Kept on the turn so the end-of-turn duplicate check needn't look it up again
+                memory_index = get_index(conversation.user_id)
+                facts = relevant_memories(conversation.user_id, user_message, MEMORY_CONTEXT_K,
+                                          MEMORY_CONTEXT_MIN_SCORE, index=memory_index)
+            except Exception as retrieval_error:
+                # The turn still works without memory context
+                db.session.rollback()
+                memory_index, facts = None, []
+                span.set_attribute('error', str(retrieval_error))
+                logger.warning("⚠️ Memory retrieval failed (continuing without it): %s", retrieval_error)
+            span.set_attribute('glow.memories', len(facts))
+        if facts:
+            # Just before the new user message: it changes every turn, so it sits after the cached prefix
+            at = len(messages_for_api) - 1 if messages_for_api and messages_for_api[-1]['role'] == 'user' \
+                else len(messages_for_api)
+            messages_for_api.insert(at, memory_context(facts))
+
+    # Call OpenAI API directly
+    if not openai_available:
+        raise TurnError('OpenAI API key is not properly configured.', 500)
+
+    payload = {
+        'model': 'gpt-4o',
+        'messages': messages_for_api,
+        'max_tokens': 1000,
+        'temperature': 0.7,
+        'stream': True,  # Enable streaming
+        # The last chunk then carries usage, including prompt tokens served from cache
+        'stream_options': {'include_usage': True}
+    }
+    if conversation.system_prompt_version is not None:
+        # Routes turns sharing the prompt to the same upstream cache
+        payload['prompt_cache_key'] = f'glow-system-v{conversation.system_prompt_version}'
+
+    # For streaming, we need to handle the response differently
+    upstream_started = time.perf_counter()
+    with trace.span('upstream.connect') as span:
+        response = post_chat_completion(
+            payload,
+            timeout=(10, 25),  # (connection timeout, read timeout) - fail faster
+            stream=True  # Enable streaming in requests
+        )
+        span.set_attribute('http.status_code', response.status_code)
+
+    if response.status_code != 200:
+        raise TurnError(f'OpenAI API error: {response.status_code} - {response.text}', 500)
+
+    trace.set_attribute('glow.conversation_id', conversation.id)
+    return ChatTurn(
+        conversation=conversation,
+        user_message=user_message,
+        regenerate_from_message=regenerate_from_message,
+        messages_for_api=messages_for_api,
+        response=response,
+        trace=trace,
+        upstream_started=upstream_started,
+        memory_index=memory_index,
+    )
+
+
+class ChatTurn:
+    """A started turn: the open upstream stream plus what is needed to save it afterwards"""
+
+    def __init__(self, conversation, user_message, regenerate_from_message, messages_for_api,
+                 response, trace, upstream_started, memory_index=None):
+        # Store conversation and user info for the stream, which outlives the request
+        self.conversation_id = conversation.id
+        self.conversation_title = conversation.title
+        self.conversation_user_id = conversation.user_id
+        self.conversation_username = conversation.user.username
+        self.user_message = user_message
+        self.regenerate_from_message = regenerate_from_message
+        self.messages_for_api = messages_for_api
+        self.response = response
+        self.trace = trace
+        self.upstream_started = upstream_started
+        self.memory_index = memory_index
+        # The stream outlives the request context, so keep a handle on the app
+        # and the correlation id for its log records
+        self.app = current_app._get_current_object()
+        self.request_id = get_request_id()
+
+    def _record_usage(self, usage, span):
+        prompt_tokens = usage.get('prompt_tokens') or 0
+        cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+        openai_prompt_tokens.inc(prompt_tokens, operation='chat_stream')
+        openai_cached_prompt_tokens.inc(cached_tokens, operation='chat_stream')
+        span.set_attribute('glow.prompt_tokens', prompt_tokens)
+        span.set_attribute('glow.cached_prompt_tokens', cached_tokens)
+
+    def _dedup_memory(self, fact):
+        """(fact to save or None, memory id it replaces or None) after the near-duplicate check"""
+        with self.app.app_context(), self.trace.span('memory.dedup') as span:
+            try:
+                action, memory_id = dedup_action(self.conversation_user_id, fact, self.memory_index)
+            except Exception as dedup_error:
+                # Saving a possible duplicate beats losing the memory
+                db.session.rollback()
+                logger.warning("⚠️ Memory dedup failed (saving anyway): %s", dedup_error)
+                return fact, None
+            span.set_attribute('glow.memory_dedup', action)
+        memory_dedup_total.inc(action=action)
+        if action == 'skip':
+            logger.debug("🧠 Memory repeats %s, not saved", memory_id)
+            return None, None
+        return fact, memory_id
+
+    def events(self):
+        """
+        Yield {'type': 'chunk', 'content'} per token, then one 'complete' (after
+        the turn is saved) or 'error' event.
+        """
+        bind_request_id(self.request_id)
+        app = self.app
+        trace = self.trace
+        conversation_id = self.conversation_id
+        conversation_title = self.conversation_title
+        assistant_content = ""  # 📝 The notepad starts empty
+        token_count = 0
+        first_token_at = None
+        logger.debug("🎬 STREAMING STARTED for conversation %s", conversation_id)
+        # Runs from headers received to the last token; milestones are span events
+        stream_span = trace.start_span('upstream.stream')
+        first_line_seen = False
+
+        try:
+            for line in self.response.iter_lines():
+                if line and not first_line_seen:
+                    first_line_seen = True
+                    stream_span.add_event('first_upstream_byte')
+                if line:
+                    line = line.decode('utf-8')
+                    if line.startswith('data: '):
+                        data_str = line[6:]  # Remove 'data: ' prefix
+                        if data_str.strip() == '[DONE]':
+                            logger.debug("🔚 [DONE] signal received! Breaking out of streaming loop...")
+                            break
+                        try:
+                            data = json.loads(data_str)
+                            if data.get('usage'):
+                                self._record_usage(data['usage'], stream_span)
+                            if 'choices' in data and len(data['choices']) > 0:
+                                delta = data['choices'][0].get('delta', {})
+                                if 'content' in delta:
+                                    chunk = delta['content']
+                                    assistant_content += chunk  # 🧩 Add to the notepad
+                                    token_count += 1
+                                    if first_token_at is None:
+                                        first_token_at = time.perf_counter()
+                                        openai_ttft_seconds.observe(first_token_at - self.upstream_started, operation='chat_stream')
+                                        stream_span.add_event('first_token')
+                                    # Stream chunk to frontend
+                                    yield {'content': chunk, 'type': 'chunk'}
+                        except json.JSONDecodeError:
+                            continue
+
+            # Upstream is finished once the last token is in
+            last_token_at = time.perf_counter()
+            openai_total_seconds.observe(last_token_at - self.upstream_started, operation='chat_stream', status=200)
+            chat_stream_duration.observe(last_token_at - self.upstream_started)
+            chat_stream_tokens.inc(token_count)
+            if first_token_at is not None and last_token_at > first_token_at:
+                chat_stream_tokens_per_second.observe(token_count / (last_token_at - first_token_at))
+            stream_span.add_event('last_token')
+            stream_span.set_attribute('glow.tokens', token_count)
+            stream_span.end()
+
+            # 🚨 CRITICAL FIX: Even if no [DONE] received, still process if we have content
+            logger.debug("🔄 Stream ended naturally (no [DONE] signal). Processing anyway...")
+
+            # 🏁 [DONE] received, notepad is complete
+            logger.debug("🏁 STREAMING FINISHED. Notepad content length: %s", len(assistant_content))
+            logger.debug("📝 First 100 chars: %s...", assistant_content[:100])
+
+            # Title generation is an upstream call, so do it before touching the database
+            new_title = None
+            if conversation_title == "New Chat":
+                with trace.span('title.generate') as span:
+                    try:
+                        logger.debug("📝 Generating title for new conversation...")
+                        # Just this exchange: the API payload starts with system prompts and memory context
+                        new_title = generate_conversation_title([
+                            {'role': 'user', 'content': self.user_message},
+                            {'role': 'assistant', 'content': assistant_content},
+                        ])
+                        logger.debug("📝 Generated title: %s", new_title)
+                    except Exception as title_error:
+                        span.set_attribute('error', str(title_error))
+                        logger.warning("⚠️ Title generation failed (continuing anyway): %s", title_error)
+
+            memory_extracted = extract_memory_from_response(assistant_content)
+            merge_memory_id = None
+            if memory_extracted:
+                logger.debug("🧠 Extracted memory: %s...", memory_extracted[:50])
+                memory_extracted, merge_memory_id = self._dedup_memory(memory_extracted)
+
+            # ✅ Save assistant message + title + memory in one round trip
+            with app.app_context(), trace.span('db.commit_turn') as span:
+                logger.debug("💾 Saving chat turn for conversation %s...", conversation_id)
+                records = write_turn(
+                    db.engine,
+                    conversation_id,
+                    messages=[('assistant', assistant_content)],
+                    title=new_title,
+                    memory=(self.conversation_user_id, memory_extracted) if memory_extracted else None,
+                    merge_memory_id=merge_memory_id
+                )
+                span.set_attribute('glow.memory_saved', bool(records['memory']))
+                logger.debug("✅ Chat turn saved successfully")
+
+            # Fold the new user message into the profile digest (edits don't add one)
+            if not self.regenerate_from_message:
+                with app.app_context(), trace.span('db.update_profile_digest'):
+                    try:
+                        record_user_message(self.conversation_user_id, self.user_message)
+                    except Exception as digest_error:
+                        db.session.rollback()
+                        logger.warning("⚠️ Profile digest update failed (turn still saved): %s", digest_error)
+
+            # Emit real-time memory update via WebSocket (after successful save)
+            if records['memory']:
+                # The row itself is written in db.commit_turn; this covers the fanout
+                with trace.span('memory.save'):
+                    try:
+                        emit_memory_update(self.conversation_username, records['memory'])
+                        logger.debug("📢 Memory update emitted via WebSocket")
+                    except Exception as ws_error:
+                        logger.warning("⚠️ WebSocket emit failed (memory still saved): %s", ws_error)
+
+            # Send completion message
+            trace.finish()
+            yield {'type': 'complete', 'conversation_id': conversation_id, 'conversation_title': new_title or conversation_title}
+
+        except Exception as e:
+            logger.exception("💥 CRITICAL ERROR in streaming: %s", e)
+            trace.finish(error=str(e))
+
+            # 🚨 CRITICAL FIX: Wrap database rollback in app context
+            try:
+                with app.app_context():
+                    db.session.rollback()  # Clean rollback on any error
+                    logger.debug("🔄 Database session rolled back successfully")
+            except Exception as rollback_error:
+                logger.warning("⚠️ Failed to rollback database session: %s", rollback_error)
+
+            # Better error messages for common issues
+            if "Read timed out" in str(e) or "timeout" in str(e).lower():
+                error_message = "OpenAI service is experiencing delays. Please try again in a moment."
+            elif "Connection" in str(e):
+                error_message = "Connection to AI service failed. Please check your internet connection and try again."
+            else:
+                error_message = f"An error occurred: {str(e)}"
+
+            yield {'type': 'error', 'error': error_message}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Batch job that compacts near-duplicate memories already in user_memories.
+
+Walks each user's memories oldest first and applies the same rules as the
+insert-time check (memory_index.classify_duplicate) against the earlier
+memories that were kept: a memory that repeats one of them is deleted, and
+one that restates it with more detail replaces that memory's fact and is
+deleted, so the oldest row (its id, created_at and image) survives.
+Candidates come from the user's memory index, so each memory is compared
+with a handful of neighbours rather than everything before it.
+
+Usage:
+    python compact_memories.py --dry-run
+    python compact_memories.py --user archu
+"""
+
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from memory_index import DEDUP_CANDIDATES, MemoryIndex, classify_duplicate
+from models import db, User, UserMemory
+
+DELETE_BATCH = 500
+
+
+def plan_compaction(rows):
+    """
+    rows: (memory id, fact) oldest first. Returns (deletes, rewrites): memory
+    ids to delete, and {kept memory id: new fact} for merged ones.
+    """
+    index = MemoryIndex.build(rows)
+    position = {memory_id: i for i, (memory_id, _) in enumerate(rows)}
+    current = dict(rows)  # kept memory id -> its fact, after any merges
+    deletes, rewrites = [], {}
+    for i, (memory_id, fact) in enumerate(rows):
+        # One extra hit, since the memory finds itself
+        neighbours = index.search(fact, DEDUP_CANDIDATES + 1)
+        candidates = [(other, current[other]) for _, other, _ in neighbours
+                      if position[other] < i and other in current]
+        action, other = classify_duplicate(fact, candidates)
+        if action == 'insert':
+            continue
+        if action == 'merge':
+            current[other] = rewrites[other] = fact
+        del current[memory_id]
+        deletes.append(memory_id)
+    return deletes, rewrites
+
+
+def compact_user(user, dry_run):
+    rows = db.session.query(UserMemory.id, UserMemory.fact)\
+        .filter(UserMemory.user_id == user.id)\
+        .order_by(UserMemory.created_at, UserMemory.id)\
+        .all()
+    deletes, rewrites = plan_compaction([tuple(row) for row in rows])
+    if dry_run or not (deletes or rewrites):
+        return len(rows), deletes, rewrites
+    for memory_id, fact in rewrites.items():
+        UserMemory.query.filter_by(id=memory_id).update({'fact': fact})
+    for start in range(0, len(deletes), DELETE_BATCH):
+        UserMemory.query.filter(UserMemory.id.in_(deletes[start:start + DELETE_BATCH]))\
+            .delete(synchronize_session=False)
+    db.session.commit()
+    return len(rows), deletes, rewrites
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Delete or merge near-duplicate user memories')
+    parser.add_argument('--user', help='Only compact this username')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    with app.app_context():
+        users = db.session.query(User).filter(User.id.in_(db.session.query(UserMemory.user_id)))
+        if args.user:
+            users = users.filter(User.username == args.user)
+        total = removed = merged = 0
+        for user in users.order_by(User.username).all():
+            count, deletes, rewrites = compact_user(user, args.dry_run)
+            total += count
+            removed += len(deletes)
+            merged += len(rewrites)
+            if deletes:
+                print(f"🧹 {user.username}: {len(deletes)} of {count} memories are near-duplicates "
+                      f"({len(rewrites)} merged into an older memory)")
+
+    verb = 'would be' if args.dry_run else 'were'
+    print(f"✅ {removed} of {total} memories {verb} removed, {merged} kept memories {verb} rewritten")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Streaming export of a user's conversations as JSONL or Markdown.
+
+The user's conversations are listed first (ids and titles only), then each
+one's messages are read in order through a server-side cursor (yield_per),
+so memory stays flat however long the history is and the first line goes
+out as soon as the first conversation is read. After that, output is
+batched into CHUNK_BYTES pieces rather than one write per message.
+
+JSONL has one object per line: a {"type": "conversation", ...} line
+followed by a {"type": "message", ...} line per message, with the same
+fields as Conversation.to_dict() and Message.to_dict().
+"""
+
+import json
+
+from sqlalchemy import select
+
+from models import db, Conversation, Message
+
+FORMATS = {
+    # format: (mimetype, file extension)
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'markdown': ('text/markdown; charset=utf-8', 'md'),
+}
+ROWS_PER_FETCH = 1000
+CHUNK_BYTES = 64 * 1024
+SPEAKERS = {'user': 'You', 'assistant': 'Glow', 'system': 'System'}
+
+
+def _conversations(user_id, conversation_id=None):
+    query = select(Conversation.id, Conversation.title, Conversation.created_at, Conversation.updated_at)\
+        .where(Conversation.user_id == user_id)
+    if conversation_id is not None:
+        query = query.where(Conversation.id == conversation_id)
+    return db.session.execute(query.order_by(Conversation.updated_at.desc(), Conversation.id)).all()
+
+
+def _messages(conversation_id):
+    query = select(Message.id, Message.role, Message.content, Message.created_at, Message.edited)\
+        .where(Message.conversation_id == conversation_id)\
+        .order_by(Message.created_at, Message.id)\
+        .execution_options(yield_per=ROWS_PER_FETCH)
+    return db.session.execute(query)
+
+
+def _jsonl(conversation, messages):
+    yield json.dumps({
+        'type': 'conversation',
+        'id': conversation.id,
+        'title': conversation.title,
+        'created_at': conversation.created_at.isoformat(),
+        'updated_at': conversation.updated_at.isoformat(),
+    }) + '\n'
+    for message in messages:
+        yield json.dumps({
+            'type': 'message',
+            'id': message.id,
+            'conversation_id': conversation.id,
+            'role': message.role,
+            'content': message.content,
+            'created_at': message.created_at.isoformat(),
+            'edited': message.edited,
+        }) + '\n'
+
+
+def _markdown(conversation, messages):
+    yield f"# {conversation.title or 'Untitled chat'}\n\n_{conversation.created_at:%Y-%m-%d %H:%M} UTC_\n\n"
+    for message in messages:
+        edited = ' (edited)' if message.edited else ''
+        yield (f"**{SPEAKERS.get(message.role, message.role)}** · {message.created_at:%Y-%m-%d %H:%M}{edited}\n\n"
+               f"{message.content}\n\n")
+    yield '---\n\n'
+
+
+def export_conversations(user_id, fmt, conversation_id=None):
+    """Yield the export as UTF-8 chunks of about CHUNK_BYTES (fmt is a FORMATS key)"""
+    render = _jsonl if fmt == 'jsonl' else _markdown
+    pending, size, started = [], 0, False
+    for conversation in _conversations(user_id, conversation_id):
+        for text in render(conversation, _messages(conversation.id)):
+            data = text.encode('utf-8')
+            pending.append(data)
+            size += len(data)
+            # The first line goes out on its own so the download starts right away
+            if size >= CHUNK_BYTES or not started:
+                yield b''.join(pending)
+                pending, size, started = [], 0, True
+    if pending:
+        yield b''.join(pending)
@@ -0,0 +1,169 @@
+"""
+Connection pool configuration and instrumentation for the SQLAlchemy engine.
+
+Engine options are read from environment variables so pool sizing can be
+tuned per deployment without code changes. Pool events (checkouts, checkout
+wait time, overflow connections, invalidations) are counted in-process and
+exposed through the metrics endpoint.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return int(value)
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options_from_env(database_url):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from environment variables.
+
+    DB_POOL_SIZE             persistent connections per process (default 5)
+    DB_MAX_OVERFLOW          extra connections allowed under burst (default 10)
+    DB_POOL_TIMEOUT          seconds to wait for a free connection (default 10)
+    DB_POOL_RECYCLE          seconds before a connection is replaced (default 1800)
+    DB_POOL_PRE_PING         test connections on checkout (default true)
+    DB_STATEMENT_TIMEOUT_MS  PostgreSQL statement_timeout, 0 disables (default 15000)
+
+    Pool sizing options only apply to PostgreSQL; other backends (e.g. SQLite
+    used for local experiments) keep SQLAlchemy's defaults.
+    """
+    if not database_url.startswith('postgresql'):
+        return {}
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 15000)
+    if statement_timeout > 0:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+
+    return options
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that reports how long each checkout waited for a connection
+    (including connect and pre-ping time) to pool_metrics. Pools recreated by
+    engine.dispose() are built from the same class, so they keep reporting.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_metrics._record_timeout()
+            raise
+        finally:
+            pool_metrics._record_wait(time.perf_counter() - started)
+
+
+class PoolMetrics:
+    """Thread-safe counters fed by SQLAlchemy pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.waits = 0
+
+    def instrument(self, engine):
+        """Attach pool listeners to an engine (idempotent per engine)"""
+        if self.engine is engine:
+            return
+        self.engine = engine
+        pool = engine.pool
+
+        event.listen(pool, 'connect', self._on_connect)
+        event.listen(pool, 'checkout', self._on_checkout)
+        event.listen(pool, 'checkin', self._on_checkin)
+        event.listen(pool, 'invalidate', self._on_invalidate)
+
+    def _record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _record_wait(self, elapsed):
+        with self._lock:
+            self.waits += 1
+            self.wait_time_total += elapsed
+            if elapsed > self.wait_time_max:
+                self.wait_time_max = elapsed
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            self.connects += 1
+            # QueuePool counts a new connection towards overflow before opening it,
+            # so a positive overflow here means this one is beyond pool_size
+            overflow = getattr(pool, 'overflow', None)
+            if callable(overflow) and overflow() > 0:
+                self.overflow_events += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        """Return current pool state plus cumulative event counters"""
+        pool = self.engine.pool if self.engine is not None else None
+        state = {}
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if callable(method):
+                state[name] = method()
+
+        with self._lock:
+            return {
+                'pool': state,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'overflow_events': self.overflow_events,
+                'timeouts': self.timeouts,
+                'wait_time_total_ms': round(self.wait_time_total * 1000, 3),
+                'wait_time_avg_ms': round(self.wait_time_total * 1000 / self.waits, 3) if self.waits else 0.0,
+                'wait_time_max_ms': round(self.wait_time_max * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,117 @@
+"""
+Structured, level-gated logging for the backend.
+
+All loggers live under the 'glow' namespace with one child per subsystem
+(glow.chat, glow.memories, glow.sockets, ...). Records are handed to a
+QueueHandler so request threads never block on stdout; a QueueListener
+thread formats and writes them. Every record carries the id of the request
+that produced it, taken from X-Request-ID or generated per request.
+
+LOG_LEVEL   root level for 'glow' loggers (default DEBUG in development, INFO otherwise)
+LOG_FORMAT  'json' for one JSON object per line, 'text' for human-readable lines
+SOCKETIO_LOG_LEVEL  level for Socket.IO's per-emit logging (default INFO in development, WARNING otherwise)
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+
+from flask import g, request
+
+_request_id = contextvars.ContextVar('request_id', default='-')
+
+_listener = None
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+def bind_request_id(request_id):
+    """Set the correlation id for records logged from the current context"""
+    _request_id.set(request_id)
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current correlation id to every record"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _build_formatter(log_format):
+    if log_format == 'json':
+        return JsonFormatter()
+    return logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+
+def configure_logging(app):
+    """Install the queue-backed 'glow' logger tree and per-request correlation ids"""
+    global _listener
+
+    default_level = 'DEBUG' if os.getenv('FLASK_ENV') == 'development' else 'INFO'
+    level = os.getenv('LOG_LEVEL', default_level).upper()
+    log_format = os.getenv('LOG_FORMAT', 'text' if os.getenv('FLASK_ENV') == 'development' else 'json')
+
+    root = logging.getLogger('glow')
+    root.setLevel(level)
+    root.propagate = False
+
+    # python-socketio logs every emit at INFO; keep that out of production logs
+    socketio_default = 'INFO' if os.getenv('FLASK_ENV') == 'development' else 'WARNING'
+    logging.getLogger('glow.socketio').setLevel(os.getenv('SOCKETIO_LOG_LEVEL', socketio_default).upper())
+
+    if _listener is None:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(_build_formatter(log_format))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        # The filter runs on the calling thread, where the request id is bound
+        queue_handler.addFilter(RequestIdFilter())
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    @app.before_request
+    def assign_request_id():
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_id = request_id
+        bind_request_id(request_id)
+
+    @app.after_request
+    def echo_request_id(response):
+        request_id = getattr(g, 'request_id', None)
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
+
+    @app.teardown_request
+    def clear_request_id(exc):
+        # Worker threads are reused; don't leak the id into the next request
+        bind_request_id('-')
+
+    return root
@@ -0,0 +1,224 @@
+"""
+Per-user retrieval over UserMemory facts.
+
+Facts are embedded as hashed TF-IDF vectors (unigrams and bigrams hashed
+into 2^20 buckets, sublinear term frequency, IDF over the user's own
+memories), which needs no model download and runs in microseconds per
+fact on CPU. Each user's vectors are kept as an inverted index in a few
+NumPy arrays, so a query only touches the postings of its own terms:
+scoring 10k memories is a searchsorted, a gather and a bincount.
+
+Indexes are cached per process (MEMORY_INDEX_CACHE_USERS users, least
+recently used dropped first) and checked against the user's memory count
+and newest created_at on every lookup: new memories are appended without
+re-reading the rest, anything else (a delete, a merged fact) rebuilds from
+the database. NumPy is imported on first use, so it isn't part of app
+startup (see benchmarks/import_time_check.py).
+
+The same index finds near-duplicates of a new memory before it is stored
+(dedup_action), and compact_memories.py uses it to clean up old ones.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+
+from sqlalchemy import func
+
+from models import db, UserMemory
+
+logger = logging.getLogger('glow.memory_index')
+
+CACHE_USERS = int(os.getenv('MEMORY_INDEX_CACHE_USERS', '256'))
+# Near-duplicate memories: candidates come from the index, then their character
+# shingles are compared. A new fact is skipped if SKIP_CONTAINMENT of it is in an
+# existing one or their Jaccard similarity reaches MEMORY_DEDUP_JACCARD, and merged
+# into (replaces) an existing fact it contains MERGE_CONTAINMENT of
+DEDUP_JACCARD = float(os.getenv('MEMORY_DEDUP_JACCARD', '0.7'))
+DEDUP_CANDIDATES = 5
+SKIP_CONTAINMENT = 0.9
+MERGE_CONTAINMENT = 0.95
+HASH_BUCKETS = 1 << 20
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset('''
+a an and are as at be but by for from has have i in is it its me my of on or so that the their they this to
+was were with user users about likes like often
+'''.split())
+
+
+def features(text):
+    """Hashed term counts for a text: {bucket: count} over unigrams and bigrams"""
+    words = [w for w in TOKEN.findall(text.lower()) if w not in STOPWORDS]
+    terms = words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+    return Counter(zlib.crc32(term.encode()) % HASH_BUCKETS for term in terms)
+
+
+class MemoryIndex:
+    """An immutable inverted index over one user's facts"""
+
+    def __init__(self, ids, facts, doc, bucket, tf):
+        import numpy as np
+        self.ids = ids
+        self.facts = facts
+        # Raw (document, bucket, sublinear tf) entries, kept so extend() needn't re-tokenize
+        self._doc, self._bucket, self._tf = doc, bucket, tf
+        n = len(ids)
+        order = np.argsort(bucket, kind='stable')
+        self._posting_doc = doc[order]
+        sorted_buckets = bucket[order]
+        self._terms, self._term_start, df = np.unique(sorted_buckets, return_index=True, return_counts=True)
+        self._term_end = self._term_start + df
+        self._idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        self._posting_weight = tf[order] * np.repeat(self._idf, df)
+        norms = np.sqrt(np.bincount(self._posting_doc, weights=self._posting_weight ** 2, minlength=n))
+        self._norms = np.where(norms > 0, norms, 1.0).astype(np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _entries(facts, first_doc):
+        import numpy as np
+        doc, bucket, tf = [], [], []
+        for i, fact in enumerate(facts):
+            for term, count in features(fact).items():
+                doc.append(first_doc + i)
+                bucket.append(term)
+                tf.append(1 + math.log(count))
+        return (np.array(doc, dtype=np.int32), np.array(bucket, dtype=np.int32),
+                np.array(tf, dtype=np.float32))
+
+    @classmethod
+    def build(cls, rows):
+        """rows: (memory id, fact) pairs"""
+        ids = [row[0] for row in rows]
+        facts = [row[1] for row in rows]
+        return cls(ids, facts, *cls._entries(facts, 0))
+
+    def extend(self, rows):
+        """A new index with `rows` appended (IDF is recomputed; existing facts aren't re-tokenized)"""
+        import numpy as np
+        facts = [row[1] for row in rows]
+        doc, bucket, tf = self._entries(facts, len(self.ids))
+        return MemoryIndex(self.ids + [row[0] for row in rows], self.facts + facts,
+                           np.concatenate([self._doc, doc]), np.concatenate([self._bucket, bucket]),
+                           np.concatenate([self._tf, tf]))
+
+    def search(self, query, k=5, min_score=0.0):
+        """Top-k (score, memory id, fact) by cosine similarity to the query, best first"""
+        import numpy as np
+        if not self.ids or len(self._terms) == 0:
+            # No memory has a searchable term (only stopwords, or no [a-z0-9] words at all)
+            return []
+        query_terms = features(query)
+        if not query_terms:
+            return []
+        buckets = np.fromiter(query_terms.keys(), dtype=np.int32, count=len(query_terms))
+        counts = np.fromiter(query_terms.values(), dtype=np.float32, count=len(query_terms))
+        positions = np.searchsorted(self._terms, buckets)
+        positions[positions == len(self._terms)] = 0
+        known = self._terms[positions] == buckets
+        if not known.any():
+            return []
+        # Terms no memory has still count towards the query's norm, at the IDF of an unseen term
+        idf = np.where(known, self._idf[positions], np.log(1 + len(self.ids)) + 1)
+        query_norm = np.sqrt(np.sum(((1 + np.log(counts)) * idf) ** 2))
+        positions, counts = positions[known], counts[known]
+        query_weight = (1 + np.log(counts)) * self._idf[positions]
+        starts, ends = self._term_start[positions], self._term_end[positions]
+        # Gather every posting of the query's terms, each scaled by its term's query weight
+        lengths = ends - starts
+        entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        scores = np.bincount(self._posting_doc[entries],
+                             weights=self._posting_weight[entries] * np.repeat(query_weight, lengths),
+                             minlength=len(self.ids))
+        scores /= self._norms * query_norm
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(float(scores[i]), self.ids[i], self.facts[i]) for i in top if scores[i] > min_score]
+
+
+_cache = OrderedDict()  # user id -> ((count, newest created_at), MemoryIndex)
+_cache_lock = threading.Lock()
+
+
+def _load(user_id, after=None):
+    query = db.session.query(UserMemory.id, UserMemory.fact).filter(UserMemory.user_id == user_id)
+    if after is not None:
+        query = query.filter(UserMemory.created_at > after)
+    return query.order_by(UserMemory.created_at, UserMemory.id).all()
+
+
+def get_index(user_id):
+    """The user's current MemoryIndex, refreshed from the database only if their memories changed"""
+    version = tuple(db.session.query(func.count(UserMemory.id), func.max(UserMemory.created_at))
+                    .filter(UserMemory.user_id == user_id).one())
+    with _cache_lock:
+        cached = _cache.get(user_id)
+        if cached is not None:
+            _cache.move_to_end(user_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = None
+    if cached is not None and cached[0][1] is not None and version[0] > cached[0][0]:
+        # Only additions since the cached version: append them
+        added = _load(user_id, after=cached[0][1])
+        if cached[0][0] + len(added) == version[0]:
+            index = cached[1].extend(added)
+    if index is None:
+        index = MemoryIndex.build(_load(user_id))
+    with _cache_lock:
+        _cache[user_id] = (version, index)
+        _cache.move_to_end(user_id)
+        while len(_cache) > CACHE_USERS:
+            _cache.popitem(last=False)
+    return index
+
+
+def relevant_memories(user_id, query, k=5, min_score=0.0, index=None):
+    """The user's k memory facts most similar to `query`, best first"""
+    index = index if index is not None else get_index(user_id)
+    return [fact for _, _, fact in index.search(query, k, min_score)]
+
+
+def shingles(fact):
+    """Character 3-grams of the fact's words (the 'user ...' preamble doesn't count)"""
+    text = ' '.join(w for w in TOKEN.findall(fact.lower()) if w not in ('user', 'users'))
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+
+def classify_duplicate(fact, candidates, jaccard=DEDUP_JACCARD):
+    """
+    Compare a new fact with existing (memory id, fact) candidates:
+    ('skip', id) if it says nothing the existing fact doesn't, ('merge', id)
+    if it restates the existing fact with more detail (replace that fact's
+    text), else ('insert', None).
+    """
+    new = shingles(fact)
+    merge = None
+    for memory_id, existing in candidates:
+        old = shingles(existing)
+        shared = len(new & old)
+        if shared / len(new) >= SKIP_CONTAINMENT or shared / len(new | old) >= jaccard:
+            return 'skip', memory_id
+        if merge is None and shared / len(old) >= MERGE_CONTAINMENT:
+            merge = memory_id
+    return ('merge', merge) if merge is not None else ('insert', None)
+
+
+def dedup_action(user_id, fact, index=None):
+    """classify_duplicate() against the user's memories closest to `fact` (candidates come from the index)"""
+    index = index if index is not None else get_index(user_id)
+    if features(fact):
+        candidates = [(memory_id, existing) for _, memory_id, existing in index.search(fact, DEDUP_CANDIDATES)]
+    else:
+        # Only stopwords, so no vector to search with: compare with the most recent facts instead
+        candidates = list(zip(index.ids[-DEDUP_CANDIDATES:], index.facts[-DEDUP_CANDIDATES:]))
+    return classify_duplicate(fact, candidates)
@@ -0,0 +1,73 @@
+"""
+Full-text search over one user's messages.
+
+Messages carry a to_tsvector('english', content) column kept current by a
+trigger and covered by a GIN index (add_message_search.py). A search is a
+websearch_to_tsquery (quoted phrases, OR and -exclusions work as on search
+engines) ranked with ts_rank_cd. Snippets come from ts_headline, which has
+to re-parse the whole message, so it only runs for the page being returned.
+
+Every vector also holds one lexeme naming the user the conversation belongs
+to (SCOPE_PREFIX + user id), and searches AND it into the query. Scoping in
+the index matters at scale: filtering by the user's conversations after the
+GIN lookup walks a frequent word's postings for every user, while the GIN
+scan of an AND follows the user's short posting list and skips ahead in
+the word's.
+"""
+
+import html
+
+from sqlalchemy import text
+
+from models import db
+
+SCOPE_PREFIX = '~u'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+# ts_headline marks matches with control characters, so the snippet can be HTML-escaped before <mark> goes in
+HEADLINE_OPTIONS = 'StartSel=\x01, StopSel=\x02, MaxWords=30, MinWords=12, MaxFragments=2, FragmentDelimiter=" … "'
+
+SEARCH_SQL = text("""
+    WITH hits AS (
+        SELECT m.id, m.conversation_id, m.role, m.content, m.created_at,
+               ts_rank_cd(m.search_vector, websearch_to_tsquery('english', :query)) AS rank
+        FROM messages m
+        WHERE m.search_vector @@ (websearch_to_tsquery('english', :query) && CAST(:scope AS tsquery))
+          AND numnode(websearch_to_tsquery('english', :query)) > 0
+          AND m.role IN ('user', 'assistant')
+        ORDER BY rank DESC, m.created_at DESC, m.id
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT hits.id, hits.conversation_id, c.title, hits.role, hits.created_at, hits.rank,
+           ts_headline('english', hits.content, websearch_to_tsquery('english', :query), :options) AS snippet
+    FROM hits
+    JOIN conversations c ON c.id = hits.conversation_id
+    ORDER BY hits.rank DESC, hits.created_at DESC, hits.id
+""")
+
+
+def highlight(snippet):
+    """Escape a ts_headline snippet and turn its match markers into <mark> tags"""
+    return html.escape(snippet).replace('\x01', '<mark>').replace('\x02', '</mark>')
+
+
+def search_messages(user_id, query, limit=DEFAULT_LIMIT, offset=0):
+    """
+    One page of the user's messages matching `query`, best first.
+    Returns (hits, next_offset); next_offset is None on the last page.
+    """
+    # One extra row tells whether there is another page without counting every match
+    rows = db.session.execute(SEARCH_SQL, {
+        'query': query, 'scope': f"'{SCOPE_PREFIX}{user_id}'", 'limit': limit + 1, 'offset': offset,
+        'options': HEADLINE_OPTIONS,
+    }).all()
+    hits = [{
+        'message_id': row.id,
+        'conversation_id': row.conversation_id,
+        'conversation_title': row.title,
+        'role': row.role,
+        'created_at': row.created_at.isoformat(),
+        'rank': round(float(row.rank), 4),
+        'snippet': highlight(row.snippet),
+    } for row in rows[:limit]]
+    return hits, (offset + limit if len(rows) > limit else None)
@@ -0,0 +1,273 @@
+"""
+In-process metrics exported in Prometheus text format at /metrics.
+
+A small registry of counters, gauges and histograms (no client library
+dependency) plus the hooks that feed it: per-route request latency, DB
+query count and time per request, OpenAI upstream timings and prompt cache
+hits, chat stream throughput and Socket.IO connection state.
+
+Values are per worker process and a scrape is answered by whichever worker
+accepts it. With more than one gunicorn worker behind one port, successive
+scrapes read different workers' registries, so counters jump back and
+forth and undercount: the numbers are only correct with a single worker
+(WEB_CONCURRENCY=1) or when each worker is scraped on its own.
+"""
+
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        # Optional callable computing the value(s) at scrape time: a number,
+        # or a {label tuple: value} dict for labelled metrics
+        self._callback = callback
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _items(self):
+        if self._callback is not None:
+            try:
+                result = self._callback()
+            except Exception:
+                return []
+            return sorted(result.items()) if isinstance(result, dict) else [((), result)]
+        with self._lock:
+            return sorted(self._values.items())
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in self._items()
+        )
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", _format_value(float(bound))))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", "+Inf"))} {series[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # create_app can run more than once per process (migrate.py, benchmarks);
+        # keep the first registration of each name
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# HTTP
+http_request_duration = REGISTRY.register(Histogram(
+    'glow_http_request_duration_seconds', 'HTTP request latency by route', ('route', 'method', 'status')))
+
+# Database
+db_queries_per_request = REGISTRY.register(Histogram(
+    'glow_db_queries_per_request', 'SQL statements executed per HTTP request', ('route',), buckets=COUNT_BUCKETS))
+db_time_per_request = REGISTRY.register(Histogram(
+    'glow_db_time_per_request_seconds', 'Total SQL execution time per HTTP request', ('route',)))
+
+# OpenAI upstream
+openai_connect_seconds = REGISTRY.register(Histogram(
+    'glow_openai_connect_seconds', 'Time until upstream response headers (connect, TLS and queueing)', ('operation',)))
+openai_ttft_seconds = REGISTRY.register(Histogram(
+    'glow_openai_time_to_first_token_seconds', 'Time from upstream request to first streamed token', ('operation',)))
+openai_total_seconds = REGISTRY.register(Histogram(
+    'glow_openai_request_duration_seconds', 'Total upstream call duration', ('operation', 'status')))
+openai_prompt_tokens = REGISTRY.register(Counter(
+    'glow_openai_prompt_tokens_total', 'Prompt tokens reported in the upstream usage field', ('operation',)))
+openai_cached_prompt_tokens = REGISTRY.register(Counter(
+    'glow_openai_cached_prompt_tokens_total', 'Prompt tokens the upstream served from its prompt cache', ('operation',)))
+
+# Chat streams
+chat_stream_duration = REGISTRY.register(Histogram(
+    'glow_chat_stream_duration_seconds', 'Duration of chat_openai streams from upstream start to last token'))
+chat_stream_tokens = REGISTRY.register(Counter(
+    'glow_chat_stream_tokens_total', 'Content chunks (approximately tokens) streamed to clients'))
+chat_stream_tokens_per_second = REGISTRY.register(Histogram(
+    'glow_chat_stream_tokens_per_second', 'Streaming throughput per chat turn',
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 400)))
+
+# Memories
+memory_dedup_total = REGISTRY.register(Counter(
+    'glow_memory_dedup_total', 'Extracted memories by near-duplicate outcome (insert, merge, skip)', ('action',)))
+
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def init_metrics(app, engine):
+    """Install request timing and per-request SQL accounting"""
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.db_query_count = 0
+        g.db_query_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = _route_label()
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                route=route, method=request.method, status=response.status_code)
+            db_queries_per_request.observe(g.get('db_query_count', 0), route=route)
+            db_time_per_request.observe(g.get('db_query_time', 0.0), route=route)
+        return response
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if has_request_context() and 'db_query_count' in g:
+            g.db_query_count += 1
+            g.db_query_time += elapsed
+
+
+def register_pool_metrics(pool_metrics):
+    """Export db_pool.PoolMetrics counters alongside the request metrics"""
+    def snapshot_value(key):
+        return lambda: pool_metrics.snapshot()[key]
+
+    def pool_state(key):
+        return lambda: pool_metrics.snapshot()['pool'].get(key, 0)
+
+    REGISTRY.register(Gauge('glow_db_pool_checked_out', 'Connections currently checked out', callback=pool_state('checkedout')))
+    REGISTRY.register(Gauge('glow_db_pool_overflow', 'Current pool overflow', callback=pool_state('overflow')))
+    for key, doc in (
+        ('checkouts', 'Connection checkouts'),
+        ('overflow_events', 'Overflow connections opened beyond pool_size'),
+        ('timeouts', 'Pool checkout timeouts'),
+        ('invalidations', 'Invalidated connections'),
+    ):
+        REGISTRY.register(Counter(f'glow_db_pool_{key}_total', doc, callback=snapshot_value(key)))
+
+
+def register_socketio_metrics(socketio):
+    """Connected clients and rooms are read from the Socket.IO manager at scrape time"""
+    def namespace_rooms():
+        if socketio.server is None:
+            return {}
+        return socketio.server.manager.rooms.get('/', {})
+
+    def connected_clients():
+        # The None room holds every connected client in the namespace
+        return len(namespace_rooms().get(None, {}))
+
+    def room_count():
+        rooms = namespace_rooms()
+        connected = rooms.get(None, {})
+        # Every client also has a private room named after its sid; only count named rooms
+        return sum(1 for name in rooms if name is not None and name not in connected)
+
+    REGISTRY.register(Gauge('glow_socketio_connected_clients', 'Socket.IO clients connected to this worker', callback=connected_clients))
+    REGISTRY.register(Gauge('glow_socketio_rooms', 'Named Socket.IO rooms on this worker', callback=room_count))
+
+
+def render_metrics():
+    return REGISTRY.render()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Release-time schema management
+Creates any missing tables, then runs the incremental migrations in order.
+This is the only place the schema is touched; app workers never call
+db.create_all() on boot.
+"""
+
+import sys
+import os
+
+# Add the backend directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from models import db
+
+
+def run_migrations():
+    """Create missing tables and apply all idempotent migrations"""
+    with app.app_context():
+        print("🔄 Creating missing database tables...")
+        db.create_all()
+        print("✅ Database tables created successfully!")
+
+    # Incremental migrations for databases created before these columns/tables existed
+    from migrate_social_features import migrate_database
+    from migrate_google_oauth import migrate_google_oauth
+    from add_edited_column import add_edited_column
+    from migrate_system_prompts import migrate_system_prompts
+    from add_memory_user_index import add_memory_user_index
+    from add_message_search import add_message_search
+
+    migrate_database()
+    migrate_google_oauth()
+    add_edited_column()
+    migrate_system_prompts()
+    add_memory_user_index()
+    add_message_search()
+
+    print("🎉 All migrations completed!")
+
+
+if __name__ == "__main__":
+    run_migrations()
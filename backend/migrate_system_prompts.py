@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Migration script to stop storing the system prompt in every conversation.
+Adds conversations.system_prompt_version, then replaces each system message
+whose text is a known prompt version (prompts.SYSTEM_PROMPTS) with that
+version on its conversation. System messages with any other text are left
+in place and still sent upstream as before.
+Safe to run more than once; deletes go in primary-key batches so it can
+run live, and a failure exits non-zero.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+from prompts import SYSTEM_PROMPTS
+from sqlalchemy import text
+
+BATCH_SIZE = 5000
+
+def migrate_system_prompts():
+    """Add the version column and fold duplicated system messages into it"""
+    with app.app_context():
+        try:
+            result = db.session.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='conversations' AND column_name='system_prompt_version'
+            """))
+
+            if result.fetchone():
+                print("✅ 'system_prompt_version' column already exists in conversations table")
+            else:
+                db.session.execute(text("""
+                    ALTER TABLE conversations
+                    ADD COLUMN system_prompt_version INTEGER
+                """))
+                db.session.commit()
+                print("✅ Added 'system_prompt_version' column to conversations table")
+
+            # Walk the primary key once, so each batch is an index range rather than
+            # another scan from the start of the table for the remaining prompt rows
+            removed = dict.fromkeys(SYSTEM_PROMPTS, 0)
+            after = ''
+            while True:
+                # A batch is bounded, but the app's statement_timeout is sized for requests
+                db.session.execute(text("SET LOCAL statement_timeout = 0"))
+                last = db.session.execute(text("""
+                    SELECT max(id) FROM (
+                        SELECT id FROM messages WHERE id > :after ORDER BY id LIMIT :batch_size
+                    ) AS batch
+                """), {'after': after, 'batch_size': BATCH_SIZE}).scalar()
+                if last is None:
+                    db.session.commit()
+                    break
+                for version, prompt in SYSTEM_PROMPTS.items():
+                    # Tag the conversations and delete their prompt rows in one statement
+                    removed[version] += db.session.execute(text("""
+                        WITH batch AS (
+                            SELECT id, conversation_id FROM messages
+                            WHERE id > :after AND id <= :last AND role = 'system' AND content = :prompt
+                        ), tagged AS (
+                            UPDATE conversations SET system_prompt_version = :version
+                            FROM batch WHERE conversations.id = batch.conversation_id
+                        )
+                        DELETE FROM messages USING batch WHERE messages.id = batch.id
+                    """), {'after': after, 'last': last, 'prompt': prompt, 'version': version}).rowcount
+                db.session.commit()
+                after = last
+            for version, count in removed.items():
+                print(f"✅ System prompt v{version}: removed {count} duplicated system messages")
+
+            db.session.execute(text("SET LOCAL statement_timeout = 0"))
+            remaining = db.session.execute(text(
+                "SELECT count(*) FROM messages WHERE role = 'system'"
+            )).scalar()
+            db.session.commit()
+            if remaining:
+                print(f"ℹ️ {remaining} system messages don't match a known prompt version and were kept")
+            print("💡 Run VACUUM ANALYZE messages to hand the freed space back to Postgres")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error migrating system prompts: {e}")
+            # Fail the release step rather than report a half-done migration as success
+            raise
+
+if __name__ == '__main__':
+    migrate_system_prompts()
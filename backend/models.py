@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import datetime
 import uuid
 
@@ -30,6 +31,8 @@ class User(db.Model):
     # Relationship with conversations and memories
     conversations = db.relationship('Conversation', backref='user', lazy=True, cascade='all, delete-orphan')
     memories = db.relationship('UserMemory', backref='user', lazy=True, cascade='all, delete-orphan')
+    profile_digest = db.relationship('UserProfileDigest', backref='user', uselist=False, cascade='all, delete-orphan')
+    song_recommendation = db.relationship('SongRecommendation', backref='user', uselist=False, cascade='all, delete-orphan')
     
     # Social relationships
     # Users I'm following
@@ -88,10 +91,13 @@ class User(db.Model):
 
 class Conversation(db.Model):
     __tablename__ = 'conversations'
+    # The sidebar lists a user's conversations, most recently updated first
+    __table_args__ = (db.Index('ix_conversations_user_id_updated_at', 'user_id', 'updated_at'),)
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=True)  # Optional: first message preview
+    system_prompt_version = db.Column(db.Integer, nullable=True)  # prompts.SYSTEM_PROMPTS key; None = no prompt
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -114,6 +120,10 @@ class Conversation(db.Model):
 
 class Message(db.Model):
     __tablename__ = 'messages'
+    __table_args__ = (
+        db.Index('ix_messages_conversation_id_created_at', 'conversation_id', 'created_at'),
+        db.Index('ix_messages_search_vector', 'search_vector', postgresql_using='gin'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id = db.Column(db.String(36), db.ForeignKey('conversations.id'), nullable=False)
@@ -121,6 +131,10 @@ class Message(db.Model):
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     edited = db.Column(db.Boolean, default=False)
+    # to_tsvector('english', content) plus the owner's scope lexeme, kept current by a trigger
+    # (add_message_search.py); only message_search reads it
+    search_vector = db.deferred(db.Column(TSVECTOR, server_default=db.FetchedValue(),
+                                          server_onupdate=db.FetchedValue()))
     
     def to_dict(self):
         return {
@@ -134,6 +148,8 @@ class Message(db.Model):
 
 class UserMemory(db.Model):
     __tablename__ = 'user_memories'
+    # memory_index checks a user's count and newest created_at on every chat turn
+    __table_args__ = (db.Index('ix_user_memories_user_id_created_at', 'user_id', 'created_at'),)
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -152,6 +168,43 @@ class UserMemory(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+class UserProfileDigest(db.Model):
+    """Bounded per-user summary of what they talk about, maintained as chat turns land"""
+    __tablename__ = 'user_profile_digests'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    recent_excerpts = db.Column(db.JSON, nullable=False, default=list)  # Newest last, capped length
+    theme_counts = db.Column(db.JSON, nullable=False, default=dict)  # Theme -> user messages mentioning it
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'recent_excerpts': self.recent_excerpts,
+            'theme_counts': self.theme_counts,
+            'message_count': self.message_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class SongRecommendation(db.Model):
+    """Cached song pick per user, refreshed in the background when stale"""
+    __tablename__ = 'song_recommendations'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    artist = db.Column(db.String(200), nullable=False)
+    reason = db.Column(db.Text, nullable=True)
+    digest_message_count = db.Column(db.Integer, nullable=False, default=0)  # Digest size when generated
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'artist': self.artist,
+            'reason': self.reason
+        }
+
 class FollowRequest(db.Model):
     __tablename__ = 'follow_requests'
     
@@ -0,0 +1,96 @@
+"""
+Thin helpers for calling the OpenAI HTTP API.
+
+`requests` is imported on first use rather than at module import so that
+worker startup does not pay for it until an upstream call is made.
+Each call records its time-to-headers (and, when not streaming, its total
+duration) in the upstream histograms exported at /metrics.
+"""
+
+import time
+import uuid
+
+from metrics import openai_connect_seconds, openai_total_seconds
+from settings import OPENAI_API_BASE, OPENAI_API_KEY
+
+OPENAI_API_URL = OPENAI_API_BASE
+
+
+def openai_headers(content_type='application/json'):
+    headers = {'Authorization': f'Bearer {OPENAI_API_KEY}'}
+    if content_type:
+        headers['Content-Type'] = content_type
+    return headers
+
+
+def _observe_call(operation, started, response, streaming=False):
+    elapsed = time.perf_counter() - started
+    openai_connect_seconds.observe(elapsed, operation=operation)
+    # A streamed body is still being read; the caller records its total
+    if not streaming:
+        openai_total_seconds.observe(elapsed, operation=operation, status=response.status_code)
+
+
+def post_chat_completion(payload, timeout, stream=False):
+    """POST to the chat completions endpoint and return the requests Response"""
+    import requests
+
+    started = time.perf_counter()
+    response = requests.post(
+        f'{OPENAI_API_URL}/chat/completions',
+        headers=openai_headers(),
+        json=payload,
+        timeout=timeout,
+        stream=stream
+    )
+    _observe_call('chat_stream' if stream else 'chat_completion', started, response, streaming=stream)
+    return response
+
+
+def post_transcription(files, timeout):
+    """POST a multipart upload to the Whisper transcription endpoint"""
+    import requests
+
+    started = time.perf_counter()
+    response = requests.post(
+        f'{OPENAI_API_URL}/audio/transcriptions',
+        headers=openai_headers(content_type=None),
+        files=files,
+        timeout=timeout
+    )
+    _observe_call('transcription', started, response)
+    return response
+
+
+def post_transcription_stream(filename, mimetype, chunks, timeout, model='whisper-1'):
+    """
+    POST an upload to the transcription endpoint without buffering it.
+
+    `chunks` is an iterator of the file's bytes; the multipart body is
+    generated around it and sent with chunked transfer encoding.
+    """
+    import requests
+
+    boundary = uuid.uuid4().hex
+    safe_name = filename.replace('"', '')
+
+    def body():
+        yield (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="model"\r\n\r\n{model}\r\n'
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+            f'Content-Type: {mimetype}\r\n\r\n'
+        ).encode()
+        yield from chunks
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+    started = time.perf_counter()
+    response = requests.post(
+        f'{OPENAI_API_URL}/audio/transcriptions',
+        headers=openai_headers(content_type=f'multipart/form-data; boundary={boundary}'),
+        data=body(),
+        timeout=timeout
+    )
+    _observe_call('transcription', started, response)
+    return response
@@ -0,0 +1,110 @@
+"""
+Incrementally maintained per-user profile digests.
+
+A digest keeps the last DIGEST_RECENT_LIMIT user messages (truncated to
+EXCERPT_CHARS) and running theme counts over everything the user has
+said. Each chat turn folds its user message in, so consumers such as the
+song recommendation read one bounded row instead of the whole message
+history. Users who predate the digest get one built lazily the first time
+it is needed: counts from one aggregate query over all their messages,
+excerpts from the most recent ones.
+"""
+
+import logging
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Conversation, Message, UserProfileDigest
+from themes import THEME_KEYWORDS, analyze_content_for_themes
+
+logger = logging.getLogger('glow.digest')
+
+DIGEST_RECENT_LIMIT = 20
+EXCERPT_CHARS = 280
+
+
+def _excerpt(content):
+    content = ' '.join(content.split())
+    return content if len(content) <= EXCERPT_CHARS else content[:EXCERPT_CHARS - 1] + '…'
+
+
+def fold_message(digest, content):
+    """Add one user message to the digest (assigns new JSON values so changes are tracked)"""
+    digest.recent_excerpts = (list(digest.recent_excerpts or []) + [_excerpt(content)])[-DIGEST_RECENT_LIMIT:]
+    theme_counts = dict(digest.theme_counts or {})
+    for theme in analyze_content_for_themes(content):
+        theme_counts[theme] = theme_counts.get(theme, 0) + 1
+    digest.theme_counts = theme_counts
+    digest.message_count = (digest.message_count or 0) + 1
+
+
+def build_digest(user_id):
+    """Seed a digest: counts over all of the user's messages, excerpts from the most recent"""
+    def user_messages(*columns):
+        return db.session.query(*columns).select_from(Message)\
+            .join(Conversation, Message.conversation_id == Conversation.id)\
+            .filter(Conversation.user_id == user_id, Message.role == 'user')
+
+    recent = user_messages(Message.content)\
+        .order_by(Message.created_at.desc())\
+        .limit(DIGEST_RECENT_LIMIT)\
+        .all()
+    # Same substring test as analyze_content_for_themes, counted in the database
+    content = func.lower(Message.content)
+    counts = user_messages(func.count(), *(
+        func.count().filter(or_(*(content.contains(keyword, autoescape=True) for keyword in keywords)))
+        for keywords in THEME_KEYWORDS.values()
+    )).one()
+    digest = UserProfileDigest(
+        user_id=user_id,
+        recent_excerpts=[_excerpt(content) for (content,) in reversed(recent)],
+        theme_counts={theme: count for theme, count in zip(THEME_KEYWORDS, counts[1:]) if count},
+        message_count=counts[0],
+    )
+    db.session.add(digest)
+    return digest
+
+
+def get_or_build_digest(user_id, digest=None):
+    """Return the stored digest, building and committing one if the user has none yet"""
+    if digest is not None:
+        return digest
+    digest = build_digest(user_id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request built it first
+        db.session.rollback()
+        digest = UserProfileDigest.query.get(user_id)
+    return digest
+
+
+def record_user_message(user_id, content):
+    """Fold a newly committed user message into the user's digest"""
+    for _ in range(2):
+        digest = UserProfileDigest.query.filter_by(user_id=user_id).with_for_update().first()
+        if digest is None:
+            # The message is already committed, so the backfill includes it
+            build_digest(user_id)
+        else:
+            fold_message(digest, content)
+        try:
+            db.session.commit()
+            return
+        except IntegrityError:
+            # Lost a race creating the row; retry against the winner's row
+            db.session.rollback()
+    logger.warning("⚠️ Could not update profile digest for user %s", user_id)
+
+
+def digest_context(digest):
+    """Render the digest as compact prompt context"""
+    lines = []
+    if digest.theme_counts:
+        top = sorted(digest.theme_counts.items(), key=lambda item: item[1], reverse=True)[:5]
+        lines.append('Recurring themes: ' + ', '.join(f'{theme} ({count})' for theme, count in top))
+    if digest.recent_excerpts:
+        lines.append('Recent things they said:')
+        lines.extend(f'- {excerpt}' for excerpt in digest.recent_excerpts)
+    return '\n'.join(lines)
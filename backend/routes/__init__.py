@@ -0,0 +1,16 @@
+"""
+HTTP blueprints, one module per area of the API.
+
+Route modules are imported by register_blueprints() when the app is built,
+not when this package is imported.
+"""
+
+import importlib
+
+BLUEPRINT_MODULES = ('system', 'chat', 'memories', 'social', 'auth', 'media')
+
+
+def register_blueprints(app):
+    for name in BLUEPRINT_MODULES:
+        module = importlib.import_module(f'routes.{name}')
+        app.register_blueprint(module.bp)
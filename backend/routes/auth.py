@@ -0,0 +1,162 @@
+"""
+Authentication routes: username and Google login, current user lookups
+"""
+
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from models import db, User
+
+bp = Blueprint('auth', __name__)
+logger = logging.getLogger('glow.auth')
+
+# ================ AUTHENTICATION ROUTES ================
+
+@bp.route('/api/login', methods=['POST'])
+def login():
+    """Simple username-based login"""
+    try:
+        data = request.get_json()
+        username = data.get('username', '').strip()
+        
+        if not username:
+            return jsonify({'error': 'Username is required'}), 400
+        
+        # Find user by username
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'message': f'Welcome back, {user.name}!',
+            'user': user.to_dict(include_social=True)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/google-login', methods=['POST'])
+def google_login():
+    """Google OAuth login endpoint"""
+    try:
+        data = request.get_json()
+        
+        # Extract Google user info from the request
+        email = data.get('email')
+        name = data.get('name')
+        given_name = data.get('given_name')
+        family_name = data.get('family_name')
+        picture = data.get('picture')
+        google_id = data.get('google_id')
+        
+        if not email or not google_id:
+            return jsonify({'error': 'Email and Google ID are required'}), 400
+        
+        # Check if user already exists by email or google_id
+        user = User.query.filter((User.email == email) | (User.google_id == google_id)).first()
+        
+        if user:
+            # Update existing user with Google info if not already set
+            if not user.google_id:
+                user.google_id = google_id
+            if not user.given_name:
+                user.given_name = given_name
+            if not user.family_name:
+                user.family_name = family_name
+            if not user.picture:
+                user.picture = picture
+            # Update name if Google provides a full name and current name is just username
+            if name and (user.name == user.username or not user.name):
+                user.name = name
+                
+            db.session.commit()
+        else:
+            # Create new user from Google info
+            # Generate username from email (before @)
+            username_base = email.split('@')[0]
+            username = username_base
+            counter = 1
+            
+            # Ensure username is unique
+            while User.query.filter_by(username=username).first():
+                username = f"{username_base}_{counter}"
+                counter += 1
+            
+            user = User(
+                username=username,
+                email=email,
+                name=name or given_name or username,
+                google_id=google_id,
+                given_name=given_name,
+                family_name=family_name,
+                picture=picture
+            )
+            
+            db.session.add(user)
+            db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Welcome, {user.name}!',
+            'user': user.to_dict(include_social=True)
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("❌ Google login error: %s", e)
+        return jsonify({'error': f'Login failed: {str(e)}'}), 500
+
+@bp.route('/api/logout', methods=['POST'])
+def logout():
+    """Simple logout endpoint"""
+    try:
+        return jsonify({
+            'success': True,
+            'message': 'Logged out successfully'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/current-user', methods=['GET'])
+def get_current_user():
+    """Get current user info - useful for checking login status"""
+    try:
+        username = request.args.get('username')
+        
+        if not username:
+            return jsonify({'error': 'Username parameter required'}), 400
+        
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'user': user.to_dict(include_social=True)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/user-greeting/<username>', methods=['GET'])
+def get_user_greeting(username):
+    """Get user's given name for greeting display"""
+    try:
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        # Return given_name, fallback to name, then username
+        display_name = user.given_name or user.name or user.username
+        
+        return jsonify({
+            'success': True,
+            'given_name': display_name,
+            'username': user.username
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,364 @@
+"""
+Chat routes: conversations, messages and the streaming OpenAI chat endpoint
+(the turn itself lives in chat_turn.py)
+"""
+
+import json
+import logging
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from chat_turn import TurnError, prepare_turn
+from conversation_export import FORMATS, export_conversations
+from message_search import DEFAULT_LIMIT, MAX_LIMIT, search_messages
+from models import db, User, Conversation, Message, UserMemory
+from turn_buffer import KeyConflict, ResumeGone, TurnsBusy, get_turn, start_turn_once
+
+bp = Blueprint('chat', __name__)
+logger = logging.getLogger('glow.chat')
+
+@bp.route('/api/conversations', methods=['GET'])
+def get_conversations():
+    """Get all conversations for a user"""
+    try:
+        user_id = request.args.get('user_id', 'default_user')
+        
+        # Get user
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            return jsonify({
+                'success': True,
+                'conversations': []
+            })
+        
+        # Get conversations ordered by most recent first
+        conversations = Conversation.query.filter_by(user_id=user.id)\
+                                         .order_by(Conversation.updated_at.desc())\
+                                         .all()
+        
+        return jsonify({
+            'success': True,
+            'conversations': [conv.to_dict(include_messages=False) for conv in conversations]
+        })
+        
+    except Exception as e:
+        logger.exception("Error getting conversations: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get conversations'
+        }), 500
+
+@bp.route('/api/conversations/<conversation_id>/messages', methods=['GET'])
+def get_conversation_messages(conversation_id):
+    """Get all messages for a specific conversation"""
+    try:
+        conversation = Conversation.query.get(conversation_id)
+        if not conversation:
+            return jsonify({
+                'success': False,
+                'error': 'Conversation not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'conversation': conversation.to_dict(include_messages=True)
+        })
+        
+    except Exception as e:
+        logger.exception("Error getting conversation messages: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get conversation messages'
+        }), 500
+
+@bp.route('/api/messages/search', methods=['GET'])
+def search_user_messages():
+    """Full-text search over a user's messages: ?q=, &limit=, &offset= (see message_search.py)"""
+    try:
+        user_id = request.args.get('user_id', 'default_user')
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if not query:
+            return jsonify({'success': False, 'error': 'q is required'}), 400
+        if not 1 <= limit <= MAX_LIMIT or offset < 0:
+            return jsonify({
+                'success': False,
+                'error': f'limit must be between 1 and {MAX_LIMIT} and offset non-negative'
+            }), 400
+
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            return jsonify({'success': True, 'results': [], 'next_offset': None})
+
+        results, next_offset = search_messages(user.id, query, limit, offset)
+        return jsonify({
+            'success': True,
+            'results': results,
+            'next_offset': next_offset
+        })
+
+    except Exception as e:
+        logger.exception("Error searching messages: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to search messages'
+        }), 500
+
+@bp.route('/api/conversations/export', methods=['GET'])
+def export_user_conversations():
+    """Download a user's conversations as ?format=jsonl|markdown, all of them or one ?conversation_id="""
+    try:
+        user_id = request.args.get('user_id', 'default_user')
+        fmt = request.args.get('format', 'jsonl')
+        conversation_id = request.args.get('conversation_id')
+        if fmt not in FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f"format must be one of: {', '.join(FORMATS)}"
+            }), 400
+
+        user = User.query.filter_by(username=user_id).first()
+        if conversation_id is not None:
+            conversation = Conversation.query.get(conversation_id)
+            if not user or not conversation or conversation.user_id != user.id:
+                return jsonify({
+                    'success': False,
+                    'error': 'Conversation not found'
+                }), 404
+        mimetype, extension = FORMATS[fmt]
+        filename = f"glow-export-{datetime.utcnow():%Y%m%d}.{extension}"
+        if not user:
+            return Response(b'', mimetype=mimetype,
+                            headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+        # Rows are read while the response is sent, so the request context has to outlive the view
+        return Response(stream_with_context(export_conversations(user.id, fmt, conversation_id)),
+                        mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no',  # Disable nginx buffering
+        })
+
+    except Exception as e:
+        logger.exception("Error exporting conversations: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to export conversations'
+        }), 500
+
+@bp.route('/api/conversations', methods=['POST'])
+def create_conversation():
+    """Create a new conversation"""
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id', 'default_user')
+        title = data.get('title', 'New Chat')
+        
+        # Ensure user exists
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            user = User(
+                username=user_id,
+                email=f'{user_id}@glow.com'
+            )
+            db.session.add(user)
+            db.session.commit()
+        
+        # Create new conversation
+        conversation = Conversation(
+            user_id=user.id,
+            title=title
+        )
+        db.session.add(conversation)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'conversation': conversation.to_dict(include_messages=False)
+        })
+        
+    except Exception as e:
+        logger.exception("Error creating conversation: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to create conversation'
+        }), 500
+
+@bp.route('/api/chatOpenAI', methods=['POST'])
+def chat_openai():
+    logger.debug("🚀 CHAT ENDPOINT CALLED at %s", datetime.utcnow())
+    data = request.get_json()
+    try:
+        # The turn runs on its own thread; this response only follows its buffer,
+        # so a client that drops doesn't lose (or re-pay for) the reply. A repeat
+        # of the Idempotency-Key follows the turn the first request started.
+        buffer, replayed = start_turn_once(request.headers.get('Idempotency-Key'), data or {},
+                                           lambda: prepare_turn(data))
+    except (TurnError, KeyConflict, TurnsBusy) as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': f'An error occurred: {str(e)}'
+        }), 500
+
+    response = _stream_turn(buffer, 0, announce=True)
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+@bp.route('/api/chat/turns/<turn_id>', methods=['GET'])
+def resume_chat_turn(turn_id):
+    """Resume a turn's stream after ?offset= chunks (the number the client already has)"""
+    buffer = get_turn(turn_id)
+    if buffer is None:
+        return jsonify({'error': 'Turn not found or expired'}), 404
+    offset = request.args.get('offset', 0, type=int)
+    if offset < 0:
+        return jsonify({'error': 'offset must be a non-negative chunk count'}), 400
+    if offset < buffer.first_offset:
+        return jsonify({'error': 'Chunks before this offset are no longer buffered'}), 410
+    return _stream_turn(buffer, offset)
+
+def _stream_turn(buffer, offset, announce=False):
+    """One SSE frame per turn event from `offset` on"""
+    def generate():
+        if announce:
+            # Lets the client resume with /api/chat/turns/<turn_id> if the connection drops
+            yield f"data: {json.dumps({'type': 'turn', 'turn_id': buffer.turn_id, 'conversation_id': buffer.conversation_id})}\n\n"
+        try:
+            for event in buffer.follow(offset):
+                yield f"data: {json.dumps(event)}\n\n"
+                # The server has written the frame by the time the generator resumes
+                if event['type'] == 'chunk':
+                    buffer.delivered()
+        except (ResumeGone, TimeoutError) as e:
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return Response(generate(), mimetype='text/plain', headers={
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no',  # Disable nginx buffering
+        'X-Turn-ID': buffer.turn_id,
+    })
+
+@bp.route('/api/conversations/<conversation_id>', methods=['GET'])
+def get_conversation(conversation_id):
+    """Get a specific conversation with all messages"""
+    try:
+        conversation = Conversation.query.get(conversation_id)
+        
+        if not conversation:
+            return jsonify({'error': 'Conversation not found'}), 404
+            
+        return jsonify({
+            'conversation': conversation.to_dict()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/conversations/<conversation_id>', methods=['DELETE'])
+def delete_conversation(conversation_id):
+    """Delete a conversation and all its messages"""
+    try:
+        conversation = Conversation.query.get(conversation_id)
+        
+        if not conversation:
+            return jsonify({'error': 'Conversation not found'}), 404
+        
+        # Delete all messages in the conversation first
+        Message.query.filter_by(conversation_id=conversation.id).delete()
+        
+        # Update memories to remove the conversation reference (set to NULL instead of deleting memories)
+        UserMemory.query.filter_by(source_conversation_id=conversation.id).update({'source_conversation_id': None})
+        
+        # Delete the conversation
+        db.session.delete(conversation)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Conversation deleted successfully'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/conversations/<conversation_id>', methods=['PATCH'])
+def update_conversation(conversation_id):
+    """Update conversation title"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'title' not in data:
+            return jsonify({'error': 'Title is required'}), 400
+        
+        conversation = Conversation.query.get(conversation_id)
+        
+        if not conversation:
+            return jsonify({'error': 'Conversation not found'}), 404
+        
+        # Update the title
+        conversation.title = data['title']
+        conversation.updated_at = datetime.utcnow()
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'conversation': conversation.to_dict(include_messages=False)
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/messages/<message_id>', methods=['PATCH'])
+def edit_message(message_id):
+    """Edit a message content"""
+    try:
+        data = request.get_json()
+        new_content = data.get('new_content')
+        
+        if not new_content or not new_content.strip():
+            return jsonify({
+                'success': False,
+                'error': 'New content is required'
+            }), 400
+        
+        # Find the message
+        message = Message.query.filter_by(id=message_id).first()
+        if not message:
+            return jsonify({
+                'success': False,
+                'error': 'Message not found'
+            }), 404
+        
+        # Only allow editing user messages
+        if message.role != 'user':
+            return jsonify({
+                'success': False,
+                'error': 'Only user messages can be edited'
+            }), 403
+        
+        # Update the message
+        message.content = new_content.strip()
+        message.edited = True
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': message.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error editing message: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
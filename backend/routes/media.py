@@ -0,0 +1,142 @@
+"""
+Media routes: theme image replacement and audio transcription
+"""
+
+import logging
+import os
+import random
+
+from flask import Blueprint, jsonify, request
+
+from models import User, UserMemory
+from settings import openai_available
+from themes import ALL_THEMES, IMAGE_EXTENSIONS, PUBLIC_IMAGES_DIR, analyze_content_for_themes
+from transcription import TranscriptionError, transcribe_upload
+
+bp = Blueprint('media', __name__)
+logger = logging.getLogger('glow.media')
+
+
+@bp.route('/api/replacement-image', methods=['GET'])
+def get_replacement_image():
+    """Get a replacement image that hasn't been used yet"""
+    try:
+        # Get list of excluded images from query params
+        exclude_param = request.args.get('exclude', '')
+        excluded_images = [img.strip() for img in exclude_param.split(',') if img.strip()]
+        
+        logger.debug("Getting replacement image, excluding: %s", excluded_images)
+        
+        # Get user_id from query parameter, default to 'default_user'
+        user_id = request.args.get('user_id', 'default_user')
+        
+        # Find user by username
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            return jsonify({'success': False, 'error': 'User not found'}), 404
+        
+        # Get user's memory themes to find relevant images (only displayed ones)
+        memories = UserMemory.query.filter_by(user_id=user.id, is_displayed=True).all()
+        memory_themes_count = {}
+        
+        for memory in memories:
+            themes = analyze_content_for_themes(memory.fact)
+            for theme in themes:
+                memory_themes_count[theme] = memory_themes_count.get(theme, 0) + 1
+        
+        # Get all available themes if no memory themes
+        if not memory_themes_count:
+            memory_themes_count = {theme: 1 for theme in ALL_THEMES}
+        
+        # Try to find a replacement image from user's themes
+        theme_entries = sorted(memory_themes_count.items(), key=lambda x: x[1], reverse=True)
+        
+        for theme, weight in theme_entries:
+            # Get all images from this theme folder (using public/images)
+            public_images_path = os.path.join(PUBLIC_IMAGES_DIR, theme)
+            
+            if os.path.exists(public_images_path):
+                available_images = [f for f in os.listdir(public_images_path) 
+                                 if f.lower().endswith(IMAGE_EXTENSIONS)]
+                
+                # Filter out excluded images
+                unused_images = []
+                for img in available_images:
+                    img_path = f"/images/{theme}/{img}"
+                    if img_path not in excluded_images:
+                        unused_images.append(img)
+                
+                if unused_images:
+                    # Return a random unused image from this theme
+                    selected_image = random.choice(unused_images)
+                    image_path = f"/images/{theme}/{selected_image}"
+                    
+                    replacement_image = {
+                        'theme': theme,
+                        'image_path': image_path,
+                        'weight': weight
+                    }
+                    
+                    return jsonify({
+                        'success': True,
+                        'replacement_image': replacement_image
+                    })
+        
+        # If no unused images found in any theme, return a fallback
+        return jsonify({
+            'success': False,
+            'error': 'No replacement images available'
+        }), 404
+        
+    except Exception as e:
+        logger.exception("Error getting replacement image: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get replacement image'
+        }), 500
+
+@bp.route('/api/transcribe', methods=['POST'])
+def transcribe_audio():
+    """
+    Transcribe audio using OpenAI's Whisper API.
+    
+    The upload is read straight from the request stream (see transcription.py):
+    WAV recordings are split into segments transcribed concurrently, other
+    formats are forwarded to Whisper as they arrive.
+    """
+    try:
+        # Check if OpenAI API is available
+        if not openai_available:
+            return jsonify({
+                'success': False,
+                'error': 'OpenAI API key is not properly configured'
+            }), 500
+
+        logger.debug("Transcription request - Size: %s, Type: %s", request.content_length, request.content_type)
+        
+        # Don't touch request.files: that would buffer the whole upload first
+        transcribed_text, segments = transcribe_upload(
+            request.stream,
+            request.headers.get('Content-Type'),
+            request.content_length
+        )
+        
+        return jsonify({
+            'success': True,
+            'text': transcribed_text,
+            'segments': segments
+        })
+
+    except TranscriptionError as e:
+        logger.warning("Transcription rejected: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), e.status_code
+
+    except Exception as e:
+        logger.exception("Error in transcribe_audio: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error during transcription'
+        }), 500
@@ -0,0 +1,325 @@
+"""
+Memory and profile routes: memories with personality images, song picks
+"""
+
+import logging
+
+from flask import Blueprint, current_app, jsonify, request
+
+from models import db, User, UserMemory, UserProfileDigest, SongRecommendation
+from profile_digest import get_or_build_digest
+from settings import openai_available
+from song_recommendations import DEFAULT_SONG, FALLBACK_SONG, generate_song, is_stale, save_song, schedule_refresh
+from themes import ALL_THEMES, analyze_content_for_themes, analyze_recent_conversations_for_themes, get_random_image_from_folder
+
+bp = Blueprint('memories', __name__)
+logger = logging.getLogger('glow.memories')
+
+
+@bp.route('/api/memories', methods=['GET'])
+def get_memories():
+    """Get all memories for the user with associated images (privacy-aware)"""
+    try:
+        # Get user_id from query parameter, default to 'default_user'
+        target_user_id = request.args.get('user_id', 'default_user')
+        current_user_id = request.args.get('current_user_id', target_user_id)  # Who is viewing
+        
+        # Find target user by username (for backwards compatibility) or create if not exists
+        target_user = User.query.filter_by(username=target_user_id).first()
+        if not target_user:
+            # Create default user if it doesn't exist
+            target_user = User(
+                username=target_user_id,
+                email=f"{target_user_id}@glow.app",
+                name=target_user_id.title()
+            )
+            db.session.add(target_user)
+            db.session.commit()
+        
+        # Find current user (viewer)
+        current_user = User.query.filter_by(username=current_user_id).first()
+        if not current_user:
+            current_user = User(
+                username=current_user_id,
+                email=f"{current_user_id}@glow.app",
+                name=current_user_id.title()
+            )
+            db.session.add(current_user)
+            db.session.commit()
+        
+        # Check access permissions
+        is_own_profile = current_user.id == target_user.id
+        is_following = current_user.is_following(target_user)
+        has_access = is_own_profile or is_following
+        
+        # If no access, return private profile indication
+        if not has_access:
+            return jsonify({
+                'success': True,
+                'memories': [],
+                'memory_themes': {},
+                'personality_images': [],
+                'is_private': True,
+                'message': 'This profile is private. Follow this user to see their memories.'
+            })
+        
+        # Get memories for this specific user (only displayed ones)
+        memories = UserMemory.query.filter_by(user_id=target_user.id, is_displayed=True).order_by(UserMemory.created_at.desc()).all()
+        
+        # Process each memory to add image suggestions based on memory content
+        processed_memories = []
+        memory_themes_count = {}
+        
+        for memory in memories:
+            memory_dict = memory.to_dict()
+            
+            # Analyze memory content for themes
+            themes = analyze_content_for_themes(memory.fact)
+            
+            # Count themes from memories for personality pins
+            for theme in themes:
+                memory_themes_count[theme] = memory_themes_count.get(theme, 0) + 1
+            
+            # Get image for the first matching theme
+            image_path = None
+            if themes:
+                image_path = get_random_image_from_folder(themes[0])
+            
+            memory_dict['themes'] = themes
+            memory_dict['image_path'] = image_path
+            processed_memories.append(memory_dict)
+        
+        # ENHANCED: Combine themes from MEMORIES + RECENT CONVERSATIONS for dynamic personality images
+        logger.debug("🎭 Generating personality images from memories + recent conversations...")
+        
+        # Get themes from recent conversations (last 3 conversations)
+        conversation_themes = analyze_recent_conversations_for_themes(target_user_id, limit=3)
+        
+        # Combine memory themes and conversation themes (conversations get double weight)
+        combined_themes_count = memory_themes_count.copy()
+        for theme, weight in conversation_themes.items():
+            combined_themes_count[theme] = combined_themes_count.get(theme, 0) + weight
+        
+        logger.debug("🧠 Memory themes: %s", memory_themes_count)
+        logger.debug("💬 Conversation themes: %s", conversation_themes)
+        logger.debug("🎨 Combined themes: %s", combined_themes_count)
+        
+        personality_images = []
+        used_image_paths = set()  # Track used images to prevent duplicates
+        theme_entries = sorted(combined_themes_count.items(), key=lambda x: x[1], reverse=True)
+        
+        # Enhanced function to get unique images
+        def get_unique_images_from_theme(theme, count, max_attempts=20):
+            """Get unique images from a theme folder, avoiding duplicates"""
+            unique_images = []
+            attempts = 0
+            while len(unique_images) < count and attempts < max_attempts:
+                image_path = get_random_image_from_folder(theme)
+                if image_path and image_path not in used_image_paths:
+                    unique_images.append(image_path)
+                    used_image_paths.add(image_path)
+                attempts += 1
+            return unique_images
+        
+        # Get more themes from memories+conversations, or fallback to comprehensive default themes if no themes found
+        if not theme_entries:
+            # Comprehensive default themes if user has no memories yet
+            for theme in ALL_THEMES:
+                # Get 4-6 unique images per theme to make profiles much richer
+                unique_images = get_unique_images_from_theme(theme, count=5)
+                for image_path in unique_images:
+                    personality_images.append({
+                        'theme': theme,
+                        'image_path': image_path,
+                        'weight': 1
+                    })
+        else:
+            # Use all available themes from memories (not just top 5)
+            for theme, weight in theme_entries:
+                # Get more images per theme based on weight (3-8 images)
+                images_per_theme = min(max(3, weight * 2), 8)  # 3-8 images per theme based on weight
+                unique_images = get_unique_images_from_theme(theme, count=images_per_theme)
+                for image_path in unique_images:
+                    personality_images.append({
+                        'theme': theme,
+                        'image_path': image_path,
+                        'weight': weight
+                    })
+        
+        # Fill remaining slots with diverse themes to reach 50+ images
+        target_image_count = 50  # Target for rich profiles
+        
+        # Add more images from all themes if we haven't reached our target
+        while len(personality_images) < target_image_count:
+            for theme in ALL_THEMES:
+                if len(personality_images) >= target_image_count:
+                    break
+                # Get 1-2 more unique images from each theme
+                additional_images = get_unique_images_from_theme(theme, count=2)
+                for image_path in additional_images:
+                    personality_images.append({
+                        'theme': theme,
+                        'image_path': image_path,
+                        'weight': 0.5  # Lower weight for filler images
+                    })
+                    if len(personality_images) >= target_image_count:
+                        break
+        
+        logger.debug("🎨 Generated %s unique personality images for %s", len(personality_images), target_user_id)
+        logger.debug("🔄 Used %s unique image paths (no duplicates)", len(used_image_paths))
+        
+        return jsonify({
+            'success': True,
+            'memories': processed_memories,
+            'memory_themes': memory_themes_count,  # Themes from memories only
+            'conversation_themes': conversation_themes,  # Themes from recent conversations
+            'combined_themes': combined_themes_count,  # Combined themes used for personality images
+            'personality_images': personality_images
+        })
+        
+    except Exception as e:
+        logger.exception("Error getting memories: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get memories'
+        }), 500
+
+@bp.route('/api/hide-memory', methods=['POST'])
+def hide_memory():
+    """Hide a memory from display permanently"""
+    try:
+        data = request.get_json()
+        memory_id = data.get('memory_id')
+        user_id = data.get('user_id', 'default_user')
+        
+        if not memory_id:
+            return jsonify({'success': False, 'error': 'memory_id is required'}), 400
+        
+        # Find user by username
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            return jsonify({'success': False, 'error': 'User not found'}), 404
+        
+        # Find the memory
+        memory = UserMemory.query.filter_by(id=memory_id, user_id=user.id).first()
+        if not memory:
+            return jsonify({'success': False, 'error': 'Memory not found'}), 404
+        
+        # Hide the memory
+        memory.is_displayed = False
+        db.session.commit()
+        
+        logger.debug("Hidden memory %s for user %s", memory_id, user_id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Memory hidden successfully'
+        })
+        
+    except Exception as e:
+        logger.exception("Error hiding memory: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to hide memory'
+        }), 500
+
+@bp.route('/api/memories/<memory_id>', methods=['DELETE'])
+def delete_memory(memory_id):
+    """Delete a specific memory from the database"""
+    try:
+        memory = UserMemory.query.get(memory_id)
+        
+        if not memory:
+            return jsonify({'error': 'Memory not found'}), 404
+        
+        # Log the deletion
+        logger.debug("🗑️ Deleting memory: %s... (ID: %s)", memory.fact[:50], memory_id)
+        
+        # Delete the memory
+        db.session.delete(memory)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Memory deleted successfully'
+        })
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("❌ Error deleting memory: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/user-song/<username>', methods=['GET'])
+def get_user_song(username):
+    """
+    Get a personalized song recommendation for a user based on their conversation history.
+    
+    Served from the per-user cache; stale picks are refreshed in the background.
+    Pass ?reroll=true to wait for a fresh pick instead.
+    """
+    try:
+        reroll = request.args.get('reroll', '').lower() in ('1', 'true', 'yes')
+        
+        # Get user, profile digest and cached pick in one query
+        row = db.session.query(User, UserProfileDigest, SongRecommendation)\
+            .outerjoin(UserProfileDigest, UserProfileDigest.user_id == User.id)\
+            .outerjoin(SongRecommendation, SongRecommendation.user_id == User.id)\
+            .filter(User.username == username)\
+            .first()
+        if not row:
+            return jsonify({
+                'success': False,
+                'error': 'User not found'
+            }), 404
+        user, digest, recommendation = row
+        digest = get_or_build_digest(user.id, digest)
+        
+        if not digest.message_count:
+            # Default song for new users
+            return jsonify({
+                'success': True,
+                'song': DEFAULT_SONG
+            })
+        
+        if recommendation and not reroll:
+            stale = is_stale(recommendation, digest)
+            if stale and openai_available:
+                schedule_refresh(current_app._get_current_object(), user.id, user.name)
+            return jsonify({
+                'success': True,
+                'song': recommendation.to_dict(),
+                'cached': True,
+                'stale': stale,
+                'generated_at': recommendation.generated_at.isoformat()
+            })
+        
+        if not openai_available:
+            return jsonify({
+                'success': True,
+                'song': FALLBACK_SONG
+            })
+        
+        # Nothing cached yet, or the user asked for a new pick: generate now
+        try:
+            song = generate_song(user.name, digest, previous=recommendation)
+        except Exception as e:
+            logger.exception("Error generating song: %s", e)
+            # Fallback song (keep serving the cached pick if there is one)
+            return jsonify({
+                'success': True,
+                'song': recommendation.to_dict() if recommendation else FALLBACK_SONG
+            })
+        
+        generated_at = save_song(user.id, song, digest.message_count, recommendation)
+        return jsonify({
+            'success': True,
+            'song': song,
+            'cached': False,
+            'generated_at': generated_at.isoformat()
+        })
+        
+    except Exception as e:
+        logger.exception("Error getting user song: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get song recommendation'
+        }), 500
@@ -0,0 +1,352 @@
+"""
+Social network routes: user search, profiles and follow requests
+"""
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from models import db, User, FollowRequest, user_follows
+
+bp = Blueprint('social', __name__)
+
+
+def _social_summaries(users, current_user):
+    """
+    {user id: (followers, following, pending requests, relationship status)}
+    for a page of users, in three grouped queries instead of six per user
+    """
+    ids = [user.id for user in users]
+    followers = {
+        user_id: (count, bool(followed))
+        for user_id, count, followed in db.session.query(
+            user_follows.c.following_id, func.count(),
+            func.count().filter(user_follows.c.follower_id == current_user.id)
+        ).filter(user_follows.c.following_id.in_(ids)).group_by(user_follows.c.following_id)
+    }
+    following = dict(db.session.query(user_follows.c.follower_id, func.count())
+                     .filter(user_follows.c.follower_id.in_(ids)).group_by(user_follows.c.follower_id))
+    # Requests to these users, plus theirs to the current user
+    requests = [tuple(row) for row in db.session.query(FollowRequest.from_user_id, FollowRequest.to_user_id).filter(
+        FollowRequest.to_user_id.in_(ids)
+        | ((FollowRequest.to_user_id == current_user.id) & FollowRequest.from_user_id.in_(ids))
+    )]
+
+    summaries = {}
+    for user_id in ids:
+        follower_count, followed = followers.get(user_id, (0, False))
+        if followed:
+            status = 'following'
+        elif (user_id, current_user.id) in requests:
+            status = 'pending_incoming'
+        elif (current_user.id, user_id) in requests:
+            status = 'pending_outgoing'
+        else:
+            status = 'none'
+        pending = sum(1 for _, to_user_id in requests if to_user_id == user_id)
+        summaries[user_id] = (follower_count, following.get(user_id, 0), pending, status)
+    return summaries
+
+# ================ SOCIAL NETWORK ROUTES ================
+
+@bp.route('/api/search-users', methods=['GET'])
+def search_users():
+    """Search for users by username"""
+    try:
+        username = request.args.get('username', '').strip()
+        current_user_id = request.args.get('user_id', 'default_user')
+        
+        if not username:
+            return jsonify({'error': 'Username is required'}), 400
+            
+        # Search for users with matching username (exact match for now)
+        users = User.query.filter(User.username.ilike(f'%{username}%')).limit(10).all()
+        
+        # Get current user for relationship checking - try by username first, then by id
+        current_user = User.query.filter_by(username=current_user_id).first()
+        if not current_user:
+            current_user = User.query.filter_by(id=current_user_id).first()
+        if not current_user:
+            return jsonify({'error': 'Current user not found'}), 404
+        
+        users = [user for user in users if user.id != current_user.id]  # Don't include self in search results
+        summaries = _social_summaries(users, current_user)
+
+        result = []
+        for user in users:
+            followers_count, following_count, pending_count, status = summaries[user.id]
+            user_data = user.to_dict()
+            user_data.update({
+                'followers_count': followers_count,
+                'following_count': following_count,
+                'pending_requests_count': pending_count,
+                'relationship_status': status
+            })
+            result.append(user_data)
+        
+        return jsonify({
+            'success': True,
+            'users': result
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/user-profile/<username>', methods=['GET'])
+def get_user_profile(username):
+    """Get a user's profile by username"""
+    try:
+        current_user_id = request.args.get('user_id', 'default_user')
+        
+        # Find the target user
+        target_user = User.query.filter_by(username=username).first()
+        if not target_user:
+            return jsonify({'error': 'User not found'}), 404
+            
+        # Get current user - try by username first, then by id
+        current_user = User.query.filter_by(username=current_user_id).first()
+        if not current_user:
+            current_user = User.query.filter_by(id=current_user_id).first()
+        if not current_user:
+            return jsonify({'error': 'Current user not found'}), 404
+        
+        # Determine relationship status and access level
+        is_following = current_user.is_following(target_user)
+        is_own_profile = current_user.id == target_user.id
+        has_access = is_following or is_own_profile
+        
+        # Basic profile data
+        profile_data = target_user.to_dict(include_social=True)
+        
+        # Add relationship status
+        if is_own_profile:
+            profile_data['relationship_status'] = 'own_profile'
+        elif is_following:
+            profile_data['relationship_status'] = 'following'
+        elif current_user.has_follow_request_from(target_user):
+            profile_data['relationship_status'] = 'pending_incoming'
+        elif target_user.has_follow_request_from(current_user):
+            profile_data['relationship_status'] = 'pending_outgoing'
+        else:
+            profile_data['relationship_status'] = 'none'
+        
+        profile_data['has_access'] = has_access
+        profile_data['is_private'] = not has_access
+        
+        return jsonify({
+            'success': True,
+            'profile': profile_data
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/send-follow-request', methods=['POST'])
+def send_follow_request():
+    """Send a follow request to another user"""
+    try:
+        data = request.get_json()
+        from_user_id = data.get('from_user_id')
+        to_username = data.get('to_username')
+        
+        if not from_user_id or not to_username:
+            return jsonify({'error': 'from_user_id and to_username are required'}), 400
+        
+        # Get users (from_user_id can be username or id)
+        from_user = User.query.filter_by(username=from_user_id).first()
+        if not from_user:
+            from_user = User.query.filter_by(id=from_user_id).first()
+        to_user = User.query.filter_by(username=to_username).first()
+        
+        if not from_user or not to_user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if from_user.id == to_user.id:
+            return jsonify({'error': 'Cannot follow yourself'}), 400
+            
+        # Check if already following
+        if from_user.is_following(to_user):
+            return jsonify({'error': 'Already following this user'}), 400
+            
+        # Check if follow request already exists
+        existing_request = FollowRequest.query.filter_by(
+            from_user_id=from_user.id,
+            to_user_id=to_user.id
+        ).first()
+        
+        if existing_request:
+            return jsonify({'error': 'Follow request already sent'}), 400
+        
+        # Create follow request
+        follow_request = FollowRequest(
+            from_user_id=from_user.id,
+            to_user_id=to_user.id
+        )
+        
+        db.session.add(follow_request)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Follow request sent to {to_user.username}'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/cancel-follow-request', methods=['POST'])
+def cancel_follow_request():
+    """Cancel/unsend a follow request"""
+    try:
+        data = request.get_json()
+        from_user_id = data.get('from_user_id')
+        to_username = data.get('to_username')
+        
+        if not from_user_id or not to_username:
+            return jsonify({'error': 'from_user_id and to_username are required'}), 400
+        
+        # Get users (from_user_id can be username or id)
+        from_user = User.query.filter_by(username=from_user_id).first()
+        if not from_user:
+            from_user = User.query.filter_by(id=from_user_id).first()
+        to_user = User.query.filter_by(username=to_username).first()
+        
+        if not from_user or not to_user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        # Find and delete the follow request
+        follow_request = FollowRequest.query.filter_by(
+            from_user_id=from_user.id,
+            to_user_id=to_user.id
+        ).first()
+        
+        if not follow_request:
+            return jsonify({'error': 'No follow request found to cancel'}), 404
+        
+        db.session.delete(follow_request)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Follow request to {to_user.username} cancelled'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/follow-requests', methods=['GET'])
+def get_follow_requests():
+    """Get all pending follow requests for a user"""
+    try:
+        user_id = request.args.get('user_id', 'default_user')
+        
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            user = User.query.filter_by(id=user_id).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        # Get all follow requests for this user
+        follow_requests = user.received_follow_requests.options(joinedload(FollowRequest.from_user)).all()
+        
+        return jsonify({
+            'success': True,
+            'follow_requests': [req.to_dict() for req in follow_requests]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/respond-follow-request', methods=['POST'])
+def respond_follow_request():
+    """Accept or decline a follow request"""
+    try:
+        data = request.get_json()
+        request_id = data.get('request_id')
+        action = data.get('action')  # 'accept' or 'decline'
+        user_id = data.get('user_id')
+        
+        if not request_id or not action or not user_id:
+            return jsonify({'error': 'request_id, action, and user_id are required'}), 400
+        
+        if action not in ['accept', 'decline']:
+            return jsonify({'error': 'action must be accept or decline'}), 400
+        
+        # Get the user first to get their actual ID
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            user = User.query.filter_by(id=user_id).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        # Get the follow request
+        follow_request = FollowRequest.query.filter_by(
+            id=request_id,
+            to_user_id=user.id
+        ).first()
+        
+        if not follow_request:
+            return jsonify({'error': 'Follow request not found'}), 404
+        
+        from_user = User.query.filter_by(id=follow_request.from_user_id).first()
+        to_user = User.query.filter_by(id=follow_request.to_user_id).first()
+        
+        if not from_user or not to_user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if action == 'accept':
+            # Add to followers/following relationship
+            to_user.followers.append(from_user)
+            db.session.commit()
+            
+            message = f'You are now following {to_user.username}'
+        else:
+            message = f'Follow request from {from_user.username} declined'
+        
+        # Remove the follow request
+        db.session.delete(follow_request)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': message
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/unfollow', methods=['POST'])
+def unfollow_user():
+    """Unfollow a user"""
+    try:
+        data = request.get_json()
+        follower_id = data.get('follower_id')
+        following_username = data.get('following_username')
+        
+        if not follower_id or not following_username:
+            return jsonify({'error': 'follower_id and following_username are required'}), 400
+        
+        follower = User.query.filter_by(id=follower_id).first()
+        following = User.query.filter_by(username=following_username).first()
+        
+        if not follower or not following:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if not follower.is_following(following):
+            return jsonify({'error': 'Not following this user'}), 400
+        
+        # Remove from following relationship
+        follower.following.remove(following)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Unfollowed {following.username}'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,63 @@
+"""
+Service routes: root banner, health check, pool metrics and the Prometheus scrape endpoint
+"""
+
+import hmac
+import os
+from functools import wraps
+
+from flask import Blueprint, Response, jsonify, request
+
+from db_pool import pool_metrics
+from metrics import render_metrics
+from settings import METRICS_TOKEN
+
+bp = Blueprint('system', __name__)
+
+
+def metrics_auth(view):
+    """Require `Authorization: Bearer $METRICS_TOKEN`; with no token set, serve only in development"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not METRICS_TOKEN:
+            if os.getenv('FLASK_ENV') != 'development':
+                return jsonify({'error': 'Not found'}), 404
+        elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@bp.route('/')
+def hello_world():
+    return jsonify({
+        "message": "Hello from Glow! 🎉",
+        "status": "success",
+        "data": {
+            "app_name": "Glow Social Chat",
+            "version": "1.0.0"
+        }
+    })
+
+@bp.route('/api/health')
+def health_check():
+    return jsonify({
+        "status": "healthy",
+        "message": "Backend is running smoothly! ✨"
+    })
+
+@bp.route('/api/metrics/pool')
+@metrics_auth
+def pool_metrics_endpoint():
+    """Connection pool state and cumulative pool event counters of the worker that answers (see metrics.py)"""
+    return jsonify({
+        "success": True,
+        "pid": os.getpid(),
+        "metrics": pool_metrics.snapshot()
+    })
+
+@bp.route('/metrics')
+@metrics_auth
+def prometheus_metrics():
+    """Prometheus text exposition of the answering worker's request, DB, upstream and Socket.IO metrics"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
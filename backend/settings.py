@@ -0,0 +1,42 @@
+"""
+Environment-driven settings shared by the app factory and the blueprints
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Import config
+try:
+    from config import OPENAI_API_KEY, DATABASE_URL, SECRET_KEY
+except ImportError:
+    # Fallback values if config.py doesn't exist
+    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'your_openai_api_key_here')
+    raw_db_url = os.getenv('DATABASE_URL', 'postgresql+psycopg://architanemalikanti@localhost:5432/glow_db')
+    # Ensure the URL uses psycopg3 format
+    if raw_db_url.startswith('postgresql://'):
+        DATABASE_URL = raw_db_url.replace('postgresql://', 'postgresql+psycopg://', 1)
+    else:
+        DATABASE_URL = raw_db_url
+    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
+
+# Check OpenAI API key
+openai_available = bool(OPENAI_API_KEY and OPENAI_API_KEY != "your_openai_api_key_here")
+
+# Bearer token for /metrics and /api/metrics/pool; without one they're only served in development
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Upstream base URL; point at benchmarks/mock_openai.py for load tests
+OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1').rstrip('/')
+
+# CORS configuration for production and development
+frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+allowed_origins = [
+    frontend_url,
+    'http://localhost:3000',  # Development
+    'https://localhost:3000',  # Development HTTPS
+    'https://glow-desktop-project.vercel.app',  # Production frontend
+]
@@ -0,0 +1,119 @@
+"""
+Socket.IO backplane for running more than one backend process.
+
+Without a message queue every process only knows its own connections, so
+an emit such as emit_memory_update() reaches just the clients that happen
+to be connected to the worker that served the chat request. With
+SOCKETIO_MESSAGE_QUEUE set, every emit is also published to the queue and
+each process delivers it to its own clients.
+
+SOCKETIO_MESSAGE_QUEUE  redis://host:6379/0 (needs the redis package), or
+                        local://host:port for socketio_broker.py; unset runs single-process
+SOCKETIO_CHANNEL        pub/sub channel (default glow-socketio); give each deployment sharing a broker its own
+SOCKETIO_TRANSPORTS     comma-separated engine.io transports (default polling,websocket)
+
+Sticky sessions: a polling client sends each request separately, and all
+of them must reach the process that owns its session. Behind a load
+balancer without session affinity, or with more than one gunicorn worker
+on the same port, set SOCKETIO_TRANSPORTS=websocket so a session is one
+long-lived connection to one process.
+"""
+
+import logging
+import os
+import socket
+import threading
+from urllib.parse import urlparse
+
+from socketio import PubSubManager
+
+logger = logging.getLogger('glow.sockets')
+
+MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', '').strip()
+CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'glow-socketio')
+TRANSPORTS = [t.strip() for t in os.getenv('SOCKETIO_TRANSPORTS', 'polling,websocket').split(',') if t.strip()]
+
+# Reconnect backoff for the listener when the broker goes away
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 10
+
+
+class LocalBrokerManager(PubSubManager):
+    """Client manager that relays through socketio_broker.py (local://host:port)"""
+
+    name = 'local'
+
+    def __init__(self, url, channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or '127.0.0.1', parsed.port or 6390)
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+    def _connect(self, mode):
+        sock = socket.create_connection(self.address, timeout=5)
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(f'{mode} {self.channel}\n'.encode())
+        return sock
+
+    def _publish(self, data):
+        line = (self.json.dumps(data) + '\n').encode()
+        with self._publish_lock:
+            # One retry on a fresh connection covers a broker restart between emits
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = self._connect('PUB')
+                    self._publisher.sendall(line)
+                    return
+                except OSError as e:
+                    if self._publisher is not None:
+                        self._publisher.close()
+                    self._publisher = None
+                    if attempt:
+                        logger.warning("⚠️ Socket.IO backplane publish failed: %s", e)
+
+    def _listen(self):
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                sock = self._connect('SUB')
+            except OSError as e:
+                logger.warning("⚠️ Socket.IO backplane unreachable at %s:%s (%s); retrying in %.1fs",
+                               *self.address, e, delay)
+                self.server.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+                continue
+            delay = RECONNECT_MIN_SECONDS
+            with sock, sock.makefile('rb') as lines:
+                for line in lines:
+                    yield line
+            logger.warning("⚠️ Socket.IO backplane connection closed; reconnecting")
+
+
+def socketio_options(worker_count=None):
+    """Keyword arguments for socketio.init_app() that select the backplane and transports"""
+    if worker_count is None:
+        worker_count = int(os.getenv('WEB_CONCURRENCY', '1') or 1)
+
+    options = {'transports': TRANSPORTS}
+    if not MESSAGE_QUEUE:
+        if worker_count > 1:
+            logger.warning("⚠️ %s workers without SOCKETIO_MESSAGE_QUEUE: real-time updates only reach "
+                           "clients connected to the worker that emits them", worker_count)
+        return options
+
+    scheme = urlparse(MESSAGE_QUEUE).scheme
+    if scheme == 'local':
+        options['client_manager'] = LocalBrokerManager(MESSAGE_QUEUE, channel=CHANNEL,
+                                                       logger=logging.getLogger('glow.socketio'))
+    else:
+        # redis://, rediss://, amqp://, ... are handled by Flask-SocketIO's own managers
+        options['message_queue'] = MESSAGE_QUEUE
+        options['channel'] = CHANNEL
+    if worker_count > 1 and 'polling' in TRANSPORTS:
+        logger.warning("⚠️ %s workers with long-polling enabled: the load balancer must pin each session to one "
+                       "worker, or set SOCKETIO_TRANSPORTS=websocket", worker_count)
+    logger.info("📡 Socket.IO backplane: %s (channel %s)", scheme, CHANNEL)
+    return options
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Local stand-in broker for the Socket.IO backplane
+
+A dependency-free pub/sub relay for running several backend processes on
+one machine (or in CI) without Redis. Point every process at it with
+SOCKETIO_MESSAGE_QUEUE=local://127.0.0.1:<port>; see socketio_backplane.py.
+
+Protocol: a connection's first line is "SUB <channel>" or "PUB <channel>".
+Every later line from a publisher is one JSON message and is written
+verbatim to each subscriber of that channel. Nothing is persisted, so a
+process that is disconnected misses what is published meanwhile, exactly
+as with Redis pub/sub.
+
+Usage:
+    python socketio_broker.py --port 6390
+"""
+
+import argparse
+import logging
+import socketserver
+import threading
+
+logger = logging.getLogger('glow.broker')
+
+
+class BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        hello = self.rfile.readline().decode('utf-8', 'replace').split()
+        if len(hello) != 2 or hello[0] not in ('SUB', 'PUB'):
+            return
+        mode, channel = hello
+        if mode == 'SUB':
+            self.server.subscribe(channel, self.wfile)
+            try:
+                # Subscribers never send anything; this returns when they hang up
+                self.rfile.read()
+            finally:
+                self.server.unsubscribe(channel, self.wfile)
+            return
+        for line in self.rfile:
+            self.server.publish(channel, line)
+
+
+class Broker(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, BrokerHandler)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, wfile):
+        with self._lock:
+            self._subscribers.setdefault(channel, {})[wfile] = threading.Lock()
+
+    def unsubscribe(self, channel, wfile):
+        with self._lock:
+            self._subscribers.get(channel, {}).pop(wfile, None)
+
+    def publish(self, channel, line):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, {}).items())
+        for wfile, write_lock in subscribers:
+            try:
+                with write_lock:
+                    wfile.write(line)
+                    wfile.flush()
+            except OSError:
+                self.unsubscribe(channel, wfile)
+
+
+def start_in_thread(host='127.0.0.1', port=6390):
+    """Start a broker on a daemon thread and return it (call shutdown() to stop)"""
+    broker = Broker((host, port))
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    return broker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local pub/sub broker for the Socket.IO backplane')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+
+    broker = Broker((args.host, args.port))
+    print(f"📡 Socket.IO broker listening on local://{args.host}:{args.port}")
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
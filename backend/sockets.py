@@ -0,0 +1,285 @@
+"""
+Socket.IO instance and real-time event handlers
+"""
+
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from flask import request
+from flask_socketio import SocketIO, emit, join_room, leave_room
+
+from logging_setup import bind_request_id
+from models import db
+from transcription import LiveTranscription, TranscriptionError
+from turn_buffer import KeyConflict, ResumeGone, TurnsBusy, get_turn, start_turn_once
+
+# Bound to the Flask app in create_app()
+socketio = SocketIO()
+
+logger = logging.getLogger('glow.sockets')
+
+# Unacknowledged chat_chunk events allowed per turn before tokens are merged
+CHAT_ACK_WINDOW = int(os.getenv('SOCKETIO_CHAT_ACK_WINDOW', '8'))
+
+# Live transcription sessions by socket id (one per connection at a time)
+_transcriptions = {}
+_transcriptions_lock = threading.Lock()
+
+# ================ WEBSOCKET EVENTS ================
+
+@socketio.on('connect')
+def handle_connect():
+    logger.debug("🔌 Client connected: %s", request.sid)
+    emit('connected', {'status': 'connected', 'sid': request.sid})
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    logger.debug("🔌 Client disconnected: %s", request.sid)
+    with _transcriptions_lock:
+        session = _transcriptions.pop(request.sid, None)
+    if session:
+        session.close()
+
+@socketio.on('join_user_room')
+def handle_join_user_room(data):
+    """Join a room for real-time updates specific to a user"""
+    user_id = data.get('user_id')
+    if user_id:
+        join_room(f'user_{user_id}')
+        logger.debug("🏠 Client %s joined room: user_%s", request.sid, user_id)
+        emit('room_joined', {'room': f'user_{user_id}'})
+
+@socketio.on('leave_user_room')
+def handle_leave_user_room(data):
+    """Leave a user-specific room"""
+    user_id = data.get('user_id')
+    if user_id:
+        leave_room(f'user_{user_id}')
+        logger.debug("🏠 Client %s left room: user_%s", request.sid, user_id)
+        emit('room_left', {'room': f'user_{user_id}'})
+
+# ================ LIVE TRANSCRIPTION ================
+#
+# transcribe_start  {format: 'pcm_s16le', sample_rate, channels} for raw PCM
+#                   (transcribed a segment at a time), or {format: 'container',
+#                   mimetype} for MediaRecorder output (transcribed on stop)
+# transcribe_chunk  {seq, audio: <bytes>} with seq counting up from 0
+# transcribe_stop   no more audio; transcribe_final follows
+#
+# The server answers with transcribe_started, then transcribe_partial
+# {index, text, transcript} per segment in order, and transcribe_final
+# {text, segments}, or transcribe_error {error, status}.
+
+@socketio.on('transcribe_start')
+def handle_transcribe_start(data):
+    """Begin a live transcription session for this connection"""
+    data = data or {}
+    sid = request.sid
+
+    def emit_to_client(event, payload):
+        socketio.emit(event, payload, to=sid)
+
+    try:
+        session = LiveTranscription(
+            emit_to_client,
+            audio_format=data.get('format', 'pcm_s16le'),
+            sample_rate=int(data.get('sample_rate', 16000)),
+            channels=int(data.get('channels', 1)),
+            mimetype=data.get('mimetype', 'audio/webm'),
+        )
+    except (TranscriptionError, TypeError, ValueError) as e:
+        emit('transcribe_error', {'error': str(e), 'status': 400})
+        return
+    with _transcriptions_lock:
+        previous = _transcriptions.get(sid)
+        _transcriptions[sid] = session
+    if previous:
+        previous.close()
+    logger.debug("🎙️ Live transcription started for %s (%s)", sid, 'segmented' if session.segmented else 'buffered')
+    emit('transcribe_started', {'segmented': session.segmented})
+
+@socketio.on('transcribe_chunk')
+def handle_transcribe_chunk(data):
+    """Append recorded audio to this connection's session"""
+    with _transcriptions_lock:
+        session = _transcriptions.get(request.sid)
+    if session is None:
+        emit('transcribe_error', {'error': 'No transcription in progress', 'status': 409})
+        return
+    if isinstance(data, dict):
+        audio, seq = data.get('audio'), data.get('seq')
+    else:
+        audio, seq = data, None
+    if not isinstance(audio, (bytes, bytearray)):
+        emit('transcribe_error', {'error': 'Audio chunks must be binary', 'status': 400})
+        return
+    if seq is not None and (not isinstance(seq, int) or isinstance(seq, bool) or seq < 0):
+        emit('transcribe_error', {'error': 'seq must be a non-negative integer', 'status': 400})
+        return
+    try:
+        session.feed(audio, seq)
+    except TranscriptionError as e:
+        with _transcriptions_lock:
+            if _transcriptions.get(request.sid) is session:
+                del _transcriptions[request.sid]
+        session.close()
+        emit('transcribe_error', {'error': str(e), 'status': e.status_code})
+
+@socketio.on('transcribe_stop')
+def handle_transcribe_stop(data=None):
+    """Flush the session; transcribe_final is emitted once the last segment is back"""
+    with _transcriptions_lock:
+        session = _transcriptions.pop(request.sid, None)
+    if session is None:
+        emit('transcribe_error', {'error': 'No transcription in progress', 'status': 409})
+        return
+    session.finish()
+
+# ================ CHAT STREAMING ================
+#
+# chat_send takes the /api/chatOpenAI body plus an optional client_ref that
+# is echoed on every reply. The server answers with chat_started
+# {conversation_id, turn_id}, chat_chunk {content, offset} per token (the
+# client acks each one), then chat_complete {conversation_id,
+# conversation_title} or chat_error {error, status}. After a reconnect,
+# chat_resume {turn_id, offset} continues from the last offset received.
+# An idempotency_key in chat_send works like the HTTP Idempotency-Key header:
+# a repeat relays the turn the key already started (chat_started has
+# replayed: true) instead of starting another.
+
+class AckWindow:
+    """
+    Sends chat_chunk events to one client with at most `size` unacknowledged.
+
+    While the window is full, tokens are merged into a single pending chunk
+    that goes out as soon as an ack frees a slot, so a slow client gets fewer,
+    larger chunks instead of an ever-growing send queue. Clients that never
+    ack still receive everything: flush() sends the remainder at the end.
+    Each chunk carries the turn offset just past its last token.
+    """
+
+    def __init__(self, sid, size, extra):
+        self.sid = sid
+        self.size = size
+        self.extra = extra
+        self.sent = 0
+        self.merged = 0
+        self._unacked = 0
+        self._pending = ''
+        self._pending_offset = None
+        # Held across the emit so chunks can't be reordered between the turn and ack threads
+        self._lock = threading.Lock()
+
+    def push(self, content, offset):
+        with self._lock:
+            if self._unacked >= self.size:
+                self._pending += content
+                self._pending_offset = offset
+                self.merged += 1
+                return
+            self._send(content, offset)
+
+    def flush(self):
+        with self._lock:
+            if self._pending:
+                self._send_pending()
+
+    def _send_pending(self):
+        self._send(self._pending, self._pending_offset)
+        self._pending = ''
+
+    def _send(self, content, offset):
+        self._unacked += 1
+        self.sent += 1
+        socketio.emit('chat_chunk', {'content': content, 'offset': offset, **self.extra},
+                      to=self.sid, callback=self._on_ack)
+
+    def _on_ack(self, *args):
+        with self._lock:
+            self._unacked -= 1
+            if self._pending and self._unacked < self.size:
+                self._send_pending()
+
+def _relay_turn(sid, buffer, offset, extra):
+    """Forward a turn's buffered events from `offset` to one client until it ends or the client leaves"""
+    window = AckWindow(sid, CHAT_ACK_WINDOW, extra)
+    try:
+        for event in buffer.follow(offset):
+            if event['type'] == 'chunk':
+                offset += 1
+                window.push(event['content'], offset)
+                buffer.delivered()
+                # The turn itself keeps running (and is saved) without us
+                if not socketio.server.manager.is_connected(sid, '/'):
+                    return
+                continue
+            window.flush()
+            if event['type'] == 'complete':
+                socketio.emit('chat_complete', {
+                    'conversation_id': event['conversation_id'],
+                    'conversation_title': event['conversation_title'],
+                    'turn_id': buffer.turn_id,
+                    **extra,
+                }, to=sid)
+            else:
+                socketio.emit('chat_error', {'error': event['error'], 'status': 500, 'turn_id': buffer.turn_id, **extra}, to=sid)
+    except (ResumeGone, TimeoutError) as e:
+        socketio.emit('chat_error', {'error': str(e), 'status': 410, 'turn_id': buffer.turn_id, **extra}, to=sid)
+    if window.merged:
+        logger.debug("🐢 Slow client %s: merged %s tokens into %s chunks", sid, window.merged, window.sent)
+
+@socketio.on('chat_send')
+def handle_chat_send(data):
+    """Run a chat turn over this connection instead of a streaming HTTP request"""
+    # chat_turn imports this module (for emit_memory_update), so import it lazily
+    from chat_turn import TurnError, prepare_turn
+
+    data = data or {}
+    extra = {'client_ref': data['client_ref']} if 'client_ref' in data else {}
+    bind_request_id(uuid.uuid4().hex)
+    try:
+        buffer, replayed = start_turn_once(data.get('idempotency_key'), data,
+                                           lambda: prepare_turn(data, transport='socketio'))
+    except (TurnError, KeyConflict, TurnsBusy) as e:
+        emit('chat_error', {'error': str(e), 'status': e.status_code, **extra})
+        return
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("💥 chat_send failed before streaming: %s", e)
+        emit('chat_error', {'error': f'An error occurred: {str(e)}', 'status': 500, **extra})
+        return
+
+    emit('chat_started', {'conversation_id': buffer.conversation_id, 'turn_id': buffer.turn_id,
+                          'replayed': replayed, **extra})
+    _relay_turn(request.sid, buffer, 0, extra)
+
+@socketio.on('chat_resume')
+def handle_chat_resume(data):
+    """Continue a turn on this (new) connection from the offset the client last received"""
+    data = data or {}
+    extra = {'client_ref': data['client_ref']} if 'client_ref' in data else {}
+    buffer = get_turn(data.get('turn_id') or '')
+    if buffer is None:
+        emit('chat_error', {'error': 'Turn not found or expired', 'status': 404, **extra})
+        return
+    try:
+        offset = int(data.get('offset', 0))
+    except (TypeError, ValueError):
+        offset = -1
+    if offset < 0:
+        emit('chat_error', {'error': 'offset must be a non-negative chunk count', 'status': 400, **extra})
+        return
+    _relay_turn(request.sid, buffer, offset, extra)
+
+def emit_memory_update(user_id, memory_data):
+    """Emit a memory update to all clients in the user's room"""
+    room = f'user_{user_id}'
+    logger.debug("📢 Emitting memory update to room %s: %s...", room, memory_data.get("fact", "")[:50])
+    socketio.emit('memory_updated', {
+        'user_id': user_id,
+        'memory': memory_data,
+        'timestamp': datetime.utcnow().isoformat()
+    }, room=room)
@@ -0,0 +1,137 @@
+"""
+Per-user song recommendation store with stale-while-revalidate refresh.
+
+A user's last pick lives in song_recommendations and is served straight
+from the database. A pick is stale once it is older than
+SONG_CACHE_TTL_SECONDS or the user's profile digest has grown by
+SONG_REFRESH_AFTER_MESSAGES messages since it was generated; stale picks
+are still served while a background thread generates the replacement.
+Only a user with no pick at all, or one who asks to reroll, waits on the
+upstream call.
+
+SONG_CACHE_TTL_SECONDS       age at which a pick is refreshed (default 6 hours)
+SONG_REFRESH_AFTER_MESSAGES  new user messages that trigger a refresh (default 5)
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, SongRecommendation, UserProfileDigest
+from openai_api import post_chat_completion
+from profile_digest import digest_context
+
+logger = logging.getLogger('glow.songs')
+
+CACHE_TTL = timedelta(seconds=int(os.getenv('SONG_CACHE_TTL_SECONDS', str(6 * 3600))))
+REFRESH_AFTER_MESSAGES = int(os.getenv('SONG_REFRESH_AFTER_MESSAGES', '5'))
+
+DEFAULT_SONG = {
+    'title': 'Blank Space',
+    'artist': 'Taylor Swift',
+    'reason': 'A perfect start to your story - full of possibilities and new beginnings!'
+}
+FALLBACK_SONG = {
+    'title': 'Good 4 U',
+    'artist': 'Olivia Rodrigo',
+    'reason': 'Captures your vibrant energy and passion for life!'
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='song-refresh')
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def is_stale(recommendation, digest, now=None):
+    now = now or datetime.utcnow()
+    if now - recommendation.generated_at > CACHE_TTL:
+        return True
+    return digest.message_count - recommendation.digest_message_count >= REFRESH_AFTER_MESSAGES
+
+
+def generate_song(name, digest, previous=None):
+    """Ask the model for a song; returns a title/artist/reason dict or raises"""
+    avoid = ''
+    if previous:
+        avoid = f'\nTheir last pick was "{previous.title}" by {previous.artist}; recommend a different song.\n'
+    prompt = f"""Here is what we know about {name} from all our conversations ({digest.message_count} messages so far):
+{digest_context(digest)}
+
+Give a pop culture song to best describe their life (should be in the theme of rap, pop, and kpop and must be a part of pop culture) --- in terms how they feel when they listen to the song, not the lyrics. Suggested artists include Taylor Swift, Kanye West, Drake, Ariana Grande, and Black Pink.
+{avoid}
+Consider their current mood and recent conversations.
+
+Return ONLY a JSON object with this exact format:
+{{
+    "title": "Song Title",
+    "artist": "Artist Name",
+    "reason": "Brief explanation of why this song captures their vibe (1-2 sentences)"
+}}"""
+
+    payload = {
+        'model': 'gpt-3.5-turbo',
+        'messages': [
+            {"role": "system", "content": "You are a music curator that understands people's vibes and recommends songs that capture their essence. Always respond with valid JSON only."},
+            {"role": "user", "content": prompt}
+        ],
+        'max_tokens': 150,
+        'temperature': 0.9
+    }
+
+    response = post_chat_completion(payload, timeout=30)
+    if response.status_code != 200:
+        raise Exception(f"OpenAI API error: {response.status_code}")
+    song = json.loads(response.json()['choices'][0]['message']['content'].strip())
+    return {'title': song['title'], 'artist': song['artist'], 'reason': song.get('reason')}
+
+
+def save_song(user_id, song, digest_message_count, recommendation=None):
+    """Insert or overwrite the user's cached pick and commit; returns its generated_at"""
+    if recommendation is None:
+        recommendation = SongRecommendation.query.get(user_id)
+    if recommendation is None:
+        recommendation = SongRecommendation(user_id=user_id)
+        db.session.add(recommendation)
+    recommendation.title = song['title'][:200]
+    recommendation.artist = song['artist'][:200]
+    recommendation.reason = song.get('reason')
+    recommendation.digest_message_count = digest_message_count
+    generated_at = recommendation.generated_at = datetime.utcnow()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent refresh inserted first; theirs is just as fresh
+        db.session.rollback()
+    return generated_at
+
+
+def _refresh(app, user_id, name):
+    try:
+        with app.app_context():
+            digest = UserProfileDigest.query.get(user_id)
+            previous = SongRecommendation.query.get(user_id)
+            if digest is None:
+                return
+            song = generate_song(name, digest, previous)
+            save_song(user_id, song, digest.message_count, previous)
+            logger.debug("🎵 Refreshed song for user %s: %s", user_id, song['title'])
+    except Exception as e:
+        logger.warning("⚠️ Background song refresh failed for user %s: %s", user_id, e)
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(user_id)
+
+
+def schedule_refresh(app, user_id, name):
+    """Queue a background refresh unless one is already running for this user in this process"""
+    with _in_flight_lock:
+        if user_id in _in_flight:
+            return False
+        _in_flight.add(user_id)
+    _executor.submit(_refresh, app, user_id, name)
+    return True
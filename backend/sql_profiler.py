@@ -0,0 +1,172 @@
+"""
+Per-request SQL profiling with N+1 detection.
+
+Every statement executed while a QueryLog is active is recorded with its
+duration and a normalized "shape" (placeholders, literals and expanded IN
+lists collapsed), so the same query issued once per row of a parent
+result groups together. When profiling is on, each request gets a log and
+the response carries X-Query-Count / X-Query-Time-Ms / X-Query-Repeated;
+shapes repeated at least SQL_N_PLUS_ONE_THRESHOLD times are logged as
+likely N+1 patterns.
+
+query_budget() opens a log around any block (a test client call, a
+benchmark) and raises QueryBudgetExceeded when the block runs more
+statements than declared. Logs nest, so a budget wrapped around a test
+client request also sees the statements the request's own log records.
+
+SQL_PROFILE               enable per-request profiling (default on in development)
+SQL_N_PLUS_ONE_THRESHOLD  repeats of one shape that count as N+1 (default 5)
+"""
+
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, request
+from sqlalchemy import event
+
+logger = logging.getLogger('glow.sql')
+
+_active_log = contextvars.ContextVar('sql_query_log', default=None)
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|\?|:\w+\b')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def statement_shape(statement):
+    """Collapse a statement to the form shared by all its executions"""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _PLACEHOLDER.sub('?', shape)
+    shape = _LITERAL.sub('?', shape)
+    return _IN_LIST.sub('(?, ...)', shape)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.statements = []  # (shape, seconds)
+
+    def record(self, statement, seconds):
+        shape = statement_shape(statement)
+        log = self
+        while log is not None:
+            log.statements.append((shape, seconds))
+            log = log.parent
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_time(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    def shape_counts(self):
+        return Counter(shape for shape, _ in self.statements)
+
+    def repeated(self, threshold):
+        """Statement shapes executed at least `threshold` times, most frequent first"""
+        return [(shape, n) for shape, n in self.shape_counts().most_common() if n >= threshold]
+
+    def report(self, limit=5):
+        lines = [f'{self.count} statements in {self.total_time * 1000:.1f}ms']
+        for shape, n in self.shape_counts().most_common(limit):
+            lines.append(f'  {n:>4}x  {shape[:160]}')
+        return '\n'.join(lines)
+
+
+def _n_plus_one_threshold():
+    return int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+
+
+def profiling_enabled():
+    default = 'true' if os.getenv('FLASK_ENV') == 'development' else 'false'
+    return os.getenv('SQL_PROFILE', default).lower() in ('1', 'true', 'yes')
+
+
+@contextmanager
+def query_log():
+    """Record every statement executed in this context into a fresh QueryLog"""
+    log = QueryLog(parent=_active_log.get())
+    token = _active_log.set(log)
+    try:
+        yield log
+    finally:
+        _active_log.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries):
+    """
+    Fail the enclosed block when it executes more than `max_queries` statements:
+
+        with query_budget(4):
+            client.get('/api/follow-requests?user_id=alice')
+    """
+    with query_log() as log:
+        yield log
+    if log.count > max_queries:
+        raise QueryBudgetExceeded(f'Query budget of {max_queries} exceeded: {log.report()}')
+
+
+def init_sql_profiler(app, engine):
+    """Record statements on `engine` into the active QueryLog; profile requests when enabled"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _active_log.get() is not None:
+            conn.info.setdefault('profiler_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log = _active_log.get()
+        starts = conn.info.get('profiler_query_start')
+        if log is None or not starts:
+            return
+        log.record(statement, time.perf_counter() - starts.pop())
+
+    if not profiling_enabled():
+        return
+
+    threshold = _n_plus_one_threshold()
+
+    @app.before_request
+    def start_query_log():
+        log = QueryLog(parent=_active_log.get())
+        g.sql_query_log = log
+        _active_log.set(log)
+
+    @app.after_request
+    def report_query_log(response):
+        log = g.get('sql_query_log')
+        if log is None:
+            return response
+        repeated = log.repeated(threshold)
+        response.headers['X-Query-Count'] = str(log.count)
+        response.headers['X-Query-Time-Ms'] = f'{log.total_time * 1000:.1f}'
+        response.headers['X-Query-Repeated'] = str(len(repeated))
+        if repeated:
+            logger.warning(
+                "🐢 Possible N+1 on %s %s: %s",
+                request.method, request.path,
+                '; '.join(f'{n}x {shape[:120]}' for shape, n in repeated),
+            )
+        logger.debug("🗄️ %s", log.report())
+        return response
+
+    @app.teardown_request
+    def end_query_log(exc):
+        # Worker threads are reused; restore whatever log was active before the request
+        log = g.pop('sql_query_log', None)
+        if log is not None:
+            _active_log.set(log.parent)
@@ -0,0 +1,150 @@
+"""
+Theme analysis for memories and conversations, plus theme image lookup
+"""
+
+import logging
+import os
+import random
+
+from models import db, User, Conversation, Message
+
+logger = logging.getLogger('glow.themes')
+
+# Theme -> keywords, checked in this order (order decides the primary theme)
+THEME_KEYWORDS = {
+    # NYC keywords
+    'NYC': ('nyc', 'new york', 'manhattan', 'brooklyn', 'queens', 'bronx', 'staten island', 'central park', 'times square', 'wall street'),
+    # SF keywords
+    'SF': ('sf', 'san francisco', 'bay area', 'silicon valley', 'golden gate', 'palo alto', 'berkeley', 'oakland'),
+    # Startup keywords
+    'Startup': ('startup', 'entrepreneur', 'founder', 'building', 'project', 'venture', 'pitch', 'investor', 'funding', 'mvp', 'product launch', 'business idea'),
+    # CS keywords
+    'CS': ('code', 'coding', 'programming', 'software', 'algorithm', 'debug', 'computer science', 'cs', 'tech', 'development', 'app', 'website', 'python', 'javascript', 'react', 'api'),
+    # Career keywords
+    'Career': ('job', 'career', 'internship', 'interview', 'resume', 'application', 'hiring', 'work', 'professional', 'linkedin', 'networking', 'salary', 'promotion'),
+    # Academics keywords
+    'Academics': ('school', 'college', 'university', 'study', 'exam', 'grade', 'professor', 'class', 'homework', 'assignment', 'semester', 'graduation', 'degree', 'major', 'cornell', 'academic'),
+    # GirlBoss keywords
+    'GirlBoss': ('girlboss', 'empowerment', 'confidence', 'leadership', 'boss', 'independent', 'strong', 'fierce', 'ambitious', 'rejection', 'heartbreak', 'new era', 'cutting toxic', 'prioritizing myself', 'building empire'),
+    # LivingHer1989Era keywords (partying, exploring, new experiences)
+    'LivingHer1989Era': ('party', 'exploring', 'adventure', 'travel', 'trip', 'new city', 'moving', 'nightlife', 'fun', 'spontaneous', 'wild', 'freedom', 'living', 'experience'),
+    # SoftGirl keywords (relationships, love, soft moments)
+    'SoftGirl': ('relationship', 'boyfriend', 'girlfriend', 'love', 'romantic', 'soft', 'gentle', 'caring', 'sweet', 'tender', 'long term', 'partner', 'dating', 'couple'),
+    # Indian keywords (culture, dance, clothes, food, traditions)
+    'Indian': ('indian', 'india', 'bollywood', 'sari', 'saree', 'diwali', 'holi', 'curry', 'desi', 'bharatanatyam', 'kathak', 'classical dance', 'bhangra', 'rangoli', 'mehendi', 'henna', 'punjabi', 'hindi', 'tamil', 'gujarati', 'bengali', 'marathi', 'telugu', 'kannada', 'malayalam', 'sanskrit', 'yoga', 'ayurveda', 'temple', 'mandir', 'gurudwara', 'ganga', 'ganges', 'taj mahal', 'mumbai', 'delhi', 'bangalore', 'chennai', 'kolkata', 'hyderabad', 'pune', 'ahmedabad', 'jaipur', 'lucknow', 'kochi', 'goa', 'kerala', 'rajasthan', 'punjab', 'gujarat', 'maharashtra', 'karnataka', 'tamil nadu', 'andhra pradesh', 'west bengal', 'biryani', 'samosa', 'dosa', 'idli', 'vada', 'chaat', 'masala', 'tandoori', 'naan', 'roti', 'chapati', 'dal', 'rice', 'paneer', 'chicken tikka', 'butter chicken', 'palak paneer', 'chole', 'rajma', 'lassi', 'chai', 'kulfi', 'gulab jamun', 'rasmalai', 'jalebi', 'laddu', 'barfi', 'indian culture', 'indian tradition', 'indian wedding', 'indian festival', 'indian music', 'indian classical', 'indian dance', 'indian food', 'indian clothes', 'indian attire', 'lehenga', 'churidar', 'salwar kameez', 'kurti', 'dupatta', 'bindi', 'sindoor', 'mangalsutra', 'bangles', 'jewelry', 'indian jewelry', 'gold jewelry', 'ethnic wear', 'traditional wear', 'puja', 'aarti', 'namaste', 'om', 'ganesh', 'krishna', 'shiva', 'vishnu', 'lakshmi', 'durga', 'kali', 'hanuman', 'rama', 'sita', 'gita', 'vedas', 'upanishads', 'karma', 'dharma', 'moksha', 'samsara', 'reincarnation', 'meditation', 'spirituality', 'ashram', 'guru', 'pandit', 'brahmin', 'kshatriya', 'vaishya', 'shudra', 'caste', 'varna', 'jati', 'arranged marriage', 'joint family', 'extended family', 'respect elders', 'touch feet', 'blessing', 'indian values', 'indian customs', 'indian rituals', 'indian ceremonies', 'indian traditions'),
+    # Tennis keywords (sport, matches, equipment, tournaments)
+    'Tennis': ('tennis', 'racket', 'racquet', 'court', 'serve', 'ace', 'volley', 'baseline', 'net', 'love', 'deuce', 'advantage', 'set', 'match', 'wimbledon', 'us open', 'french open', 'australian open', 'grand slam', 'atp', 'wta', 'federer', 'nadal', 'djokovic', 'serena', 'venus', 'singles', 'doubles', 'tennis ball', 'tennis shoes', 'tennis outfit', 'tennis lesson', 'tennis coach', 'tennis tournament', 'tennis practice', 'tennis player', 'tennis club', 'tennis match', 'tennis game', 'backhand', 'forehand', 'smash', 'lob', 'drop shot', 'cross court', 'down the line', 'slice', 'topspin', 'underspin'),
+    # Lawyer keywords (law, legal, court, practice)
+    'Lawyer': ('lawyer', 'attorney', 'legal', 'law', 'court', 'judge', 'jury', 'case', 'trial', 'lawsuit', 'litigation', 'contract', 'agreement', 'brief', 'motion', 'deposition', 'testimony', 'evidence', 'witness', 'objection', 'sustained', 'overruled', 'verdict', 'settlement', 'plaintiff', 'defendant', 'prosecutor', 'defense', 'counsel', 'bar exam', 'law school', 'legal studies', 'jurisprudence', 'statute', 'regulation', 'ordinance', 'constitutional', 'criminal law', 'civil law', 'corporate law', 'family law', 'immigration law', 'tax law', 'intellectual property', 'real estate law', 'personal injury', 'malpractice', 'bankruptcy', 'mergers', 'acquisitions', 'compliance', 'due diligence', 'legal research', 'legal writing', 'law firm', 'paralegal', 'legal assistant', 'court clerk', 'bailiff', 'magistrate', 'arbitration', 'mediation', 'negotiation', 'legal advice', 'legal counsel', 'legal representation', 'pro bono', 'retainer', 'billable hours', 'legal fees', 'law practice', 'legal profession', 'justice', 'equity', 'precedent', 'appellate', 'supreme court', 'federal court', 'state court', 'municipal court', 'small claims'),
+}
+
+ALL_THEMES = ['Academics', 'Career', 'CS', 'GirlBoss', 'NYC', 'SF', 'Startup', 'LivingHer1989Era', 'SoftGirl', 'Indian', 'Tennis', 'Lawyer']
+
+# Path to the public images folder (standard web serving)
+PUBLIC_IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'public', 'images')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def analyze_content_for_themes(content):
+    """Analyze content (memory or conversation) to determine relevant image themes"""
+    content_lower = content.lower()
+    return [
+        theme for theme, keywords in THEME_KEYWORDS.items()
+        if any(keyword in content_lower for keyword in keywords)
+    ]
+
+def analyze_recent_conversations_for_themes(user_id, limit=3):
+    """Analyze the last N conversations to determine themes for personality images"""
+    try:
+        logger.debug("🔍 Analyzing last %s conversations for user %s...", limit, user_id)
+        
+        # User messages of their last N conversations, in one query
+        recent = db.session.query(Conversation.id, Conversation.updated_at)\
+            .join(User, Conversation.user_id == User.id)\
+            .filter(User.username == user_id)\
+            .order_by(Conversation.updated_at.desc())\
+            .limit(limit)\
+            .subquery()
+        contents = db.session.query(Message.content)\
+            .join(recent, Message.conversation_id == recent.c.id)\
+            .filter(Message.role == 'user')\
+            .order_by(recent.c.updated_at.desc(), Message.created_at)\
+            .all()
+
+        if not contents:
+            logger.debug("📭 No recent user messages found for user %s", user_id)
+            return {}
+
+        logger.debug("📚 Found %s user messages in recent conversations", len(contents))
+        all_conversation_content = " " + " ".join(content for (content,) in contents)
+        
+        # Analyze the combined content for themes
+        conversation_themes = analyze_content_for_themes(all_conversation_content)
+        
+        # Count theme occurrences (weight recent conversations more heavily)
+        theme_counts = {}
+        for theme in conversation_themes:
+            # Give recent conversations double weight compared to older memories
+            theme_counts[theme] = theme_counts.get(theme, 0) + 2
+        
+        logger.debug("🎨 Recent conversation themes found: %s", theme_counts)
+        return theme_counts
+        
+    except Exception as e:
+        logger.exception("❌ Error analyzing recent conversations: %s", e)
+        return {}
+
+def get_conversation_themes(user_id):
+    """Analyze all conversations to determine dominant themes for filling empty spaces"""
+    try:
+        user = User.query.filter_by(username=user_id).first()
+        if not user:
+            return {}
+        
+        # Get all messages from user's conversations
+        conversations = Conversation.query.filter_by(user_id=user.id).all()
+        all_content = ""
+        
+        for conv in conversations:
+            for message in conv.messages:
+                if message.role == 'user':  # Only analyze user messages
+                    all_content += " " + message.content
+        
+        # Count theme occurrences
+        theme_counts = {}
+        themes = analyze_content_for_themes(all_content)
+        
+        for theme in themes:
+            theme_counts[theme] = theme_counts.get(theme, 0) + 1
+        
+        # Sort by frequency
+        sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
+        return dict(sorted_themes)
+        
+    except Exception as e:
+        logger.exception("Error analyzing conversation themes: %s", e)
+        return {}
+
+def get_random_image_from_folder(folder_name):
+    """Get a random image from the specified public images folder"""
+    try:
+        # Path to the public images folder (standard web serving)
+        public_images_path = os.path.join(PUBLIC_IMAGES_DIR, folder_name)
+        
+        if not os.path.exists(public_images_path):
+            return None
+            
+        # Get all image files
+        images = [f for f in os.listdir(public_images_path) 
+                 if f.lower().endswith(IMAGE_EXTENSIONS)]
+        
+        if not images:
+            return None
+            
+        # Return random image with public URL path
+        selected_image = random.choice(images)
+        return f"/images/{folder_name}/{selected_image}"
+        
+    except Exception as e:
+        logger.exception("Error getting random image from %s: %s", folder_name, e)
+        return None
@@ -0,0 +1,187 @@
+"""
+Per-turn tracing for chat streams.
+
+A trace covers one chat turn: a root span plus child spans for each phase
+(user-message commit, payload build, upstream connect, the stream itself,
+the post-stream DB commit, title generation, memory save). Point-in-time
+milestones such as the first upstream byte, the first token and the first
+chunk written to the client (by the HTTP or Socket.IO transport) are
+recorded as span events with their own timestamps.
+
+Finished traces are appended to TRACE_SINK_PATH as one OTLP/JSON
+ExportTraceServiceRequest per line, the same shape the OpenTelemetry
+collector's file exporter writes, so the file can be replayed into any
+OTLP-compatible backend or summarized with benchmarks/trace_report.py.
+Tracing is off (and free) when TRACE_SINK_PATH is unset.
+
+TRACE_SINK_PATH  file to append finished traces to (default: tracing disabled)
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+SERVICE_NAME = 'glow-backend'
+SCOPE_NAME = 'glow.tracing'
+
+_sink_lock = threading.Lock()
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class Span:
+    def __init__(self, trace, name, parent_id, attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.events = []
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, **attributes):
+        self.events.append((name, time.time_ns(), attributes))
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [_attribute(k, v) for k, v in self.attributes.items()],
+            'events': [
+                {
+                    'name': name,
+                    'timeUnixNano': str(ts),
+                    'attributes': [_attribute(k, v) for k, v in attrs.items()],
+                }
+                for name, ts, attrs in self.events
+            ],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class Trace:
+    """One chat turn; the root span is opened on creation and closed by finish()"""
+
+    def __init__(self, sink_path, name, attributes):
+        self.sink_path = sink_path
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self.root = self._open(name, None, attributes)
+
+    def _open(self, name, parent_id, attributes):
+        span = Span(self, name, parent_id, attributes)
+        self.spans.append(span)
+        return span
+
+    def start_span(self, name, **attributes):
+        """Open a child of the root span; the caller must end() it"""
+        return self._open(name, self.root.span_id, attributes)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except Exception as exc:
+            span.error = f'{type(exc).__name__}: {exc}'
+            raise
+        finally:
+            span.end()
+
+    def add_event(self, name, **attributes):
+        self.root.add_event(name, **attributes)
+
+    def set_attribute(self, key, value):
+        self.root.set_attribute(key, value)
+
+    def finish(self, error=None):
+        if error:
+            self.root.error = error
+        for span in self.spans:
+            span.end()
+        record = {
+            'resourceSpans': [{
+                'resource': {'attributes': [_attribute('service.name', SERVICE_NAME)]},
+                'scopeSpans': [{
+                    'scope': {'name': SCOPE_NAME},
+                    'spans': [span.to_otlp() for span in self.spans],
+                }],
+            }]
+        }
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with _sink_lock:
+            with open(self.sink_path, 'a', encoding='utf-8') as sink:
+                sink.write(line)
+
+
+class _NullSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def add_event(self, name, **attributes):
+        pass
+
+    def end(self):
+        pass
+
+
+class _NullTrace:
+    """Stand-in used when tracing is disabled; every call is a no-op"""
+    trace_id = None
+    _span = _NullSpan()
+
+    def start_span(self, name, **attributes):
+        return self._span
+
+    @contextmanager
+    def span(self, name, **attributes):
+        yield self._span
+
+    def add_event(self, name, **attributes):
+        pass
+
+    def set_attribute(self, key, value):
+        pass
+
+    def finish(self, error=None):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+def start_trace(name, **attributes):
+    """Begin a trace, or return the no-op trace when TRACE_SINK_PATH is unset"""
+    sink_path = os.getenv('TRACE_SINK_PATH')
+    if not sink_path:
+        return NULL_TRACE
+    return Trace(sink_path, name, attributes)
@@ -0,0 +1,171 @@
+"""
+Content-addressed transcript cache with in-flight coalescing.
+
+Transcripts are keyed by the SHA-256 of the audio bytes sent to Whisper
+(computed by the caller as the bytes go past, not in a second pass) and
+stored one small file per key under TRANSCRIBE_CACHE_DIR. Reads bump a
+file's mtime, and once the store holds more than
+TRANSCRIBE_CACHE_MAX_ENTRIES files the least recently used are deleted,
+so the directory behaves as an LRU that every worker process shares.
+
+Identical audio that is already being transcribed in this process is not
+sent again: later callers wait on the first caller's result.
+
+TRANSCRIBE_CACHE_DIR          where transcripts are stored (default <tmp>/glow-transcripts; empty disables)
+TRANSCRIBE_CACHE_MAX_ENTRIES  transcripts kept before the oldest are evicted (default 5000)
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger('glow.transcription')
+
+CACHE_DIR = os.getenv('TRANSCRIBE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'glow-transcripts'))
+MAX_ENTRIES = int(os.getenv('TRANSCRIBE_CACHE_MAX_ENTRIES', '5000'))
+# Bump when the transcription request changes in a way that changes the text (model, prompt, ...)
+KEY_PREFIX = 'whisper-1:'
+# How long a duplicate request waits on the one already in flight
+WAIT_TIMEOUT = 120
+
+
+def audio_hasher():
+    """A hash object to feed the audio bytes into as they are forwarded"""
+    return hashlib.sha256(KEY_PREFIX.encode())
+
+
+def audio_key(data):
+    hasher = audio_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+class TranscriptStore:
+    """Bounded on-disk LRU of transcripts, one file per key"""
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.txt')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return text
+
+    def put(self, key, text):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("⚠️ Could not cache transcript %s: %s", key[:12], e)
+            return
+        with self._lock:
+            self._writes += 1
+            # Listing the directory is the expensive part, so only check every few writes
+            due = self._writes % max(1, self.max_entries // 10) == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used transcripts down to 90% of max_entries"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.txt'):
+                        try:
+                            entries.append((entry.stat().st_mtime, entry.path))
+                        except OSError:
+                            continue
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - int(self.max_entries * 0.9)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class Claim:
+    """
+    A caller's stake in a key: either the cached/in-flight result to wait
+    on, or ownership of the one upstream call (the owner must settle()).
+    """
+
+    def __init__(self, key, future, owner):
+        self.key = key
+        self.future = future
+        self.owner = owner
+
+    def result(self):
+        return self.future.result(timeout=WAIT_TIMEOUT)
+
+    def settle(self, text=None, error=None):
+        if not self.owner:
+            return
+        if error is None and store is not None:
+            store.put(self.key, text)
+        with _in_flight_lock:
+            _in_flight.pop(self.key, None)
+        if error is None:
+            self.future.set_result(text)
+        else:
+            self.future.set_exception(error)
+
+
+store = TranscriptStore(CACHE_DIR, MAX_ENTRIES) if CACHE_DIR else None
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def cached(key):
+    """The stored transcript for this key, or None"""
+    return store.get(key) if store is not None else None
+
+
+def claim(key):
+    """Return a Claim that is already resolved on a hit, joins a request in flight, or owns a new one"""
+    text = cached(key)
+    if text is not None:
+        future = Future()
+        future.set_result(text)
+        return Claim(key, future, owner=False)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return Claim(key, future, owner=False)
+        future = _in_flight[key] = Future()
+    return Claim(key, future, owner=True)
+
+
+def transcribe_once(key, transcribe):
+    """Return the transcript for key, calling transcribe() only if nobody has or is"""
+    stake = claim(key)
+    if not stake.owner:
+        return stake.result()
+    try:
+        text = transcribe()
+    except Exception as e:
+        stake.settle(error=e)
+        raise
+    stake.settle(text)
+    return text
@@ -0,0 +1,507 @@
+"""
+Streaming transcription pipeline.
+
+The multipart upload is parsed incrementally from the request stream
+(werkzeug's sans-IO decoder) instead of through request.files, so the
+audio is never spooled to memory or a temp file:
+
+- PCM WAV recordings are cut into TRANSCRIBE_SEGMENT_SECONDS segments as
+  the bytes arrive; each segment is sent to Whisper from a thread pool
+  while the rest of the upload is still being read (never more segments
+  in flight than workers), and the texts are stitched back together in
+  order. Duration is known from the header, so over-long recordings are
+  rejected before any audio is read.
+- Any other format (the browser records webm/opus) is forwarded as a
+  single chunked multipart request whose body is the upload stream.
+
+LiveTranscription does the same segmenting for audio that arrives over
+Socket.IO while it is still being recorded (see sockets.py): segments are
+cut at the quietest point near LIVE_SEGMENT_SECONDS and each partial
+transcript is emitted as soon as it and everything before it are done.
+
+Both upload paths go through transcript_cache: WAV segments are looked up
+by their content hash before being sent, and streamed uploads are hashed
+as they are forwarded, so a resubmitted clip costs no Whisper call.
+
+Uploads over TRANSCRIBE_MAX_BYTES are rejected from Content-Length up
+front, or as soon as the running byte count crosses the limit.
+
+TRANSCRIBE_MAX_BYTES        largest accepted upload (default 25 MB, Whisper's limit)
+TRANSCRIBE_MAX_SECONDS      longest accepted WAV recording (default 600)
+TRANSCRIBE_SEGMENT_SECONDS  WAV segment length sent per upstream call (default 60)
+TRANSCRIBE_WORKERS          concurrent segment uploads per process (default 4)
+TRANSCRIBE_LIVE_SEGMENT_SECONDS  target segment length for live audio (default 5)
+"""
+
+import io
+import logging
+import os
+import struct
+import sys
+import threading
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+
+import transcript_cache
+from openai_api import post_transcription, post_transcription_stream
+
+logger = logging.getLogger('glow.transcription')
+
+MAX_UPLOAD_BYTES = int(os.getenv('TRANSCRIBE_MAX_BYTES', str(25 * 1024 * 1024)))
+MAX_DURATION_SECONDS = float(os.getenv('TRANSCRIBE_MAX_SECONDS', '600'))
+SEGMENT_SECONDS = float(os.getenv('TRANSCRIBE_SEGMENT_SECONDS', '60'))
+SEGMENT_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', '4'))
+LIVE_SEGMENT_SECONDS = float(os.getenv('TRANSCRIBE_LIVE_SEGMENT_SECONDS', '5'))
+
+READ_CHUNK = 64 * 1024
+# Live segments are cut at the quietest 20 ms window in the last second before the target length
+SILENCE_WINDOW_SECONDS = 0.02
+SILENCE_SEARCH_SECONDS = 1.0
+PROMPT_CHARS = 200
+# (connect, read) timeouts per upstream call; a segment is short, a streamed upload may not be
+SEGMENT_TIMEOUT = (10, 30)
+STREAM_TIMEOUT = (10, 60)
+
+_executor = ThreadPoolExecutor(max_workers=SEGMENT_WORKERS, thread_name_prefix='transcribe')
+
+
+class TranscriptionError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadedFile:
+    """The file part of a multipart upload, exposed as an iterator of byte chunks"""
+
+    def __init__(self, stream, content_type, field, max_bytes=MAX_UPLOAD_BYTES):
+        mimetype, options = parse_options_header(content_type or '')
+        boundary = options.get('boundary')
+        if mimetype != 'multipart/form-data' or not boundary:
+            raise TranscriptionError('Expected a multipart/form-data upload')
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary.encode())
+        self._max_bytes = max_bytes
+        self.received = 0
+        self.filename = None
+        self.mimetype = None
+        self._find_part(field)
+
+    def _events(self):
+        while True:
+            event = self._decoder.next_event()
+            if isinstance(event, NeedData):
+                data = self._stream.read(READ_CHUNK)
+                self._decoder.receive_data(data or None)
+                continue
+            yield event
+            if isinstance(event, Epilogue):
+                return
+
+    def _find_part(self, field):
+        self._events_iter = self._events()
+        for event in self._events_iter:
+            if isinstance(event, File) and event.name == field:
+                self.filename = event.filename or 'audio'
+                self.mimetype = event.headers.get('Content-Type', 'application/octet-stream')
+                return
+        raise TranscriptionError('No audio file provided')
+
+    def __iter__(self):
+        for event in self._events_iter:
+            if not isinstance(event, Data):
+                continue
+            if event.data:
+                self.received += len(event.data)
+                if self.received > self._max_bytes:
+                    raise TranscriptionError(f'Audio exceeds the {self._max_bytes // (1024 * 1024)} MB limit', 413)
+                yield event.data
+            if not event.more_data:
+                return
+
+
+class ChunkReader:
+    """Exact-size reads over an iterator of byte chunks"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size):
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def peek(self, size):
+        data = self.read(size)
+        self._buffer[:0] = data
+        return data
+
+    def remaining(self):
+        if self._buffer:
+            yield bytes(self._buffer)
+            self._buffer.clear()
+        yield from self._chunks
+
+
+def read_wav_header(reader):
+    """
+    Consume a PCM WAV header up to the start of the sample data.
+
+    Returns (fmt chunk bytes, byte_rate, block_align, data_size), or None when
+    the stream is not PCM WAV (nothing is consumed in that case).
+    """
+    head = reader.peek(12)
+    if len(head) < 12 or head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+        return None
+    reader.read(12)
+    fmt = None
+    while True:
+        chunk_header = reader.read(8)
+        if len(chunk_header) < 8:
+            raise TranscriptionError('Truncated WAV header')
+        chunk_id, chunk_size = chunk_header[:4], struct.unpack('<I', chunk_header[4:])[0]
+        if chunk_id == b'data':
+            break
+        body = reader.read(chunk_size + (chunk_size & 1))
+        if chunk_id == b'fmt ':
+            fmt = body[:chunk_size]
+    if fmt is None or len(fmt) < 16:
+        raise TranscriptionError('WAV file has no format chunk')
+    audio_format, _, _, byte_rate, block_align, _ = struct.unpack('<HHIIHH', fmt[:16])
+    if audio_format not in (1, 0xFFFE) or not byte_rate or not block_align:
+        raise TranscriptionError('Only PCM WAV audio can be segmented')
+    # Streaming recorders write 0 or 0xFFFFFFFF when the length is unknown
+    data_size = None if chunk_size in (0, 0xFFFFFFFF) else chunk_size
+    return fmt, byte_rate, block_align, data_size
+
+
+def wav_bytes(fmt, pcm):
+    """Wrap a slice of PCM samples in a minimal WAV container"""
+    header = b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt) + 8 + len(pcm)) + b'WAVE'
+    header += b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    header += b'data' + struct.pack('<I', len(pcm))
+    return header + pcm
+
+
+def _transcribe_segment(filename, data, prompt=None):
+    files = {
+        'file': (filename, io.BytesIO(data), 'audio/wav'),
+        'model': (None, 'whisper-1')
+    }
+    if prompt:
+        # Whisper conditions on the preceding text, which keeps words split across a cut consistent
+        files['prompt'] = (None, prompt)
+    response = post_transcription(files, timeout=SEGMENT_TIMEOUT)
+    return _transcription_text(response)
+
+
+def _transcription_text(response):
+    if response.status_code == 200:
+        return response.json().get('text', '').strip()
+    try:
+        error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+        message = error_data.get('error', {}).get('message', f'Whisper API error: {response.status_code}')
+    except ValueError:
+        message = f'Whisper API error: {response.status_code}'
+    logger.warning("OpenAI API Error: %s - %s", response.status_code, message)
+    raise TranscriptionError(message, response.status_code)
+
+
+def _transcribe_wav(reader, upload, header):
+    fmt, byte_rate, block_align, data_size = header
+    if data_size is not None and data_size / byte_rate > MAX_DURATION_SECONDS:
+        raise TranscriptionError(f'Recording is longer than {int(MAX_DURATION_SECONDS)} seconds', 413)
+
+    segment_bytes = max(block_align, int(SEGMENT_SECONDS * byte_rate) // block_align * block_align)
+    max_pcm_bytes = int(MAX_DURATION_SECONDS * byte_rate)
+    base_name = os.path.splitext(upload.filename)[0]
+    futures, pcm_read = [], 0
+    try:
+        while data_size is None or pcm_read < data_size:
+            size = segment_bytes if data_size is None else min(segment_bytes, data_size - pcm_read)
+            pcm = reader.read(size)
+            if not pcm:
+                break
+            pcm_read += len(pcm)
+            if pcm_read > max_pcm_bytes:
+                raise TranscriptionError(f'Recording is longer than {int(MAX_DURATION_SECONDS)} seconds', 413)
+            # Backpressure: don't read further ahead than the pool can upload
+            pending = [future for future in futures if not future.done()]
+            if len(pending) >= SEGMENT_WORKERS:
+                wait(pending, return_when=FIRST_COMPLETED)
+            index = len(futures)
+            segment = wav_bytes(fmt, pcm)
+            key = transcript_cache.audio_key(segment)
+            text = transcript_cache.cached(key)
+            if text is not None:
+                # A resubmitted recording is answered segment by segment from the cache
+                futures.append(_resolved(text))
+                continue
+            futures.append(_executor.submit(
+                transcript_cache.transcribe_once, key,
+                partial(_transcribe_segment, f'{base_name}-{index:03d}.wav', segment)))
+        # Drain anything after the sample data so the multipart stream is fully consumed
+        for _ in reader.remaining():
+            pass
+        texts = [future.result() for future in futures]
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+    logger.debug("🎙️ Transcribed %s segments (%s bytes of PCM)", len(futures), pcm_read)
+    return ' '.join(text for text in texts if text), len(futures)
+
+
+def transcribe_upload(stream, content_type, content_length=None, field='audio'):
+    """Transcribe the `field` file of a multipart upload; returns (text, segment count)"""
+    if content_length and content_length > MAX_UPLOAD_BYTES + READ_CHUNK:
+        # Allow for multipart framing around the file itself
+        raise TranscriptionError(f'Audio exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit', 413)
+
+    upload = UploadedFile(stream, content_type, field)
+    reader = ChunkReader(upload)
+    header = read_wav_header(reader)
+    if header is not None:
+        return _transcribe_wav(reader, upload, header)
+
+    if not reader.peek(1):
+        raise TranscriptionError('No audio file selected')
+    return _transcribe_stream(reader, upload), 1
+
+
+class _AlreadyTranscribed(Exception):
+    """Raised out of the upload body to abandon a request whose transcript is known or in flight"""
+
+    def __init__(self, stake):
+        super().__init__(stake.key)
+        self.stake = stake
+
+
+def _transcribe_stream(reader, upload):
+    """
+    Forward the upload as one streamed request, hashing it on the way.
+
+    The hash is only known once the last byte has been sent, so that is
+    when the cache is consulted: on a hit (or an identical request already
+    in flight) the body is abandoned before its closing boundary, Whisper
+    never sees a complete request, and the known transcript is used.
+    """
+    hasher = transcript_cache.audio_hasher()
+    stakes = []
+
+    def hashed_chunks():
+        for chunk in reader.remaining():
+            hasher.update(chunk)
+            yield chunk
+        stake = transcript_cache.claim(hasher.hexdigest())
+        if not stake.owner:
+            raise _AlreadyTranscribed(stake)
+        stakes.append(stake)
+
+    try:
+        response = post_transcription_stream(upload.filename, upload.mimetype, hashed_chunks(), timeout=STREAM_TIMEOUT)
+        text = _transcription_text(response)
+    except _AlreadyTranscribed as e:
+        logger.debug("🎙️ Transcript for %s served from cache", e.stake.key[:12])
+        return e.stake.result()
+    except Exception as e:
+        if stakes:
+            stakes[0].settle(error=e)
+        raise
+    stakes[0].settle(text)
+    return text
+
+
+def _resolved(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def quietest_cut(pcm, byte_rate, block_align, search_seconds=SILENCE_SEARCH_SECONDS):
+    """
+    Byte offset at which to end a segment of 16-bit PCM: the middle of the
+    quietest short window within the last `search_seconds` of `pcm`, so a
+    cut lands between words rather than inside one.
+    """
+    window = max(block_align, int(SILENCE_WINDOW_SECONDS * byte_rate) // block_align * block_align)
+    start = max(0, len(pcm) - int(search_seconds * byte_rate) // block_align * block_align)
+    best_offset, best_energy = len(pcm), None
+    for offset in range(start, len(pcm) - window + 1, window):
+        samples = array('h', pcm[offset:offset + window])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        energy = sum(abs(sample) for sample in samples)
+        if best_energy is None or energy < best_energy:
+            best_offset, best_energy = offset + window // 2 // block_align * block_align, energy
+    return best_offset
+
+
+class LiveTranscription:
+    """
+    Incremental transcription of audio fed chunk by chunk while it is recorded.
+
+    Raw 16-bit little-endian PCM is cut into segments that are transcribed on
+    the shared pool as soon as they are complete; `emit(event, data)` receives
+    'transcribe_partial' for each segment, strictly in order, then
+    'transcribe_final' once finish() has been called and every segment is
+    done. Any other format can't be cut without a decoder, so it is buffered
+    and transcribed in one call on finish().
+
+    Socket.IO may run a client's events on different threads, so chunks carry
+    a sequence number and are applied in that order.
+    """
+
+    def __init__(self, emit, audio_format='pcm_s16le', sample_rate=16000, channels=1,
+                 mimetype='audio/webm', segment_seconds=LIVE_SEGMENT_SECONDS):
+        self._emit = emit
+        self.segmented = audio_format == 'pcm_s16le'
+        if self.segmented:
+            if not 8000 <= sample_rate <= 48000 or channels not in (1, 2):
+                raise TranscriptionError('Unsupported sample rate or channel count')
+            self._block_align = 2 * channels
+            self._byte_rate = sample_rate * self._block_align
+            self._fmt = struct.pack('<HHIIHH', 1, channels, sample_rate, self._byte_rate, self._block_align, 16)
+            self._segment_bytes = max(self._block_align, int(segment_seconds * self._byte_rate) // self._block_align * self._block_align)
+            # Audio past the target length the cut may look at (the other half of the search window is before it)
+            self._lookahead = int(SILENCE_SEARCH_SECONDS / 2 * self._byte_rate) // self._block_align * self._block_align
+            self._max_bytes = int(MAX_DURATION_SECONDS * self._byte_rate)
+        else:
+            self._max_bytes = MAX_UPLOAD_BYTES
+        self.mimetype = mimetype
+        self.received = 0
+        self._buffer = bytearray()
+        self._chunks = []
+        self._next_seq = 0
+        self._out_of_order = {}
+        self._feed_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._emit_lock = threading.Lock()
+        self._futures = []
+        self._texts = {}
+        self._next_emit = 0
+        self._finished = False
+        self._closed = False
+
+    def feed(self, data, seq=None):
+        """Add recorded bytes; completed segments are submitted immediately"""
+        with self._feed_lock:
+            if self._finished or self._closed:
+                raise TranscriptionError('Transcription already finished')
+            seq = self._next_seq if seq is None else seq
+            if seq < self._next_seq or seq in self._out_of_order:
+                return
+            self.received += len(data)
+            if self.received > self._max_bytes:
+                raise TranscriptionError('Recording is too long for live transcription', 413)
+            self._out_of_order[seq] = bytes(data)
+            while self._next_seq in self._out_of_order:
+                self._append(self._out_of_order.pop(self._next_seq))
+                self._next_seq += 1
+
+    def finish(self):
+        """Flush what is left; 'transcribe_final' follows once every segment is done"""
+        with self._feed_lock:
+            if self._finished or self._closed:
+                return
+            if self._out_of_order:
+                logger.warning("⚠️ Live transcription finished with %s chunks missing before it", len(self._out_of_order))
+                for seq in sorted(self._out_of_order):
+                    self._append(self._out_of_order.pop(seq))
+            if self.segmented and self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            elif self._chunks:
+                chunks, self._chunks = self._chunks, []
+                self._track(_executor.submit(self._transcribe_whole, chunks))
+            with self._lock:
+                self._finished = True
+        self._flush()
+
+    def close(self):
+        """Abandon the session (client went away); nothing more is emitted"""
+        with self._lock:
+            self._closed = True
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+    def _append(self, data):
+        if not self.segmented:
+            self._chunks.append(data)
+            return
+        self._buffer += data
+        while len(self._buffer) >= self._segment_bytes + self._lookahead:
+            cut = quietest_cut(self._buffer[:self._segment_bytes + self._lookahead], self._byte_rate, self._block_align)
+            self._submit(bytes(self._buffer[:cut]))
+            del self._buffer[:cut]
+
+    def _submit(self, pcm):
+        with self._lock:
+            index = len(self._futures)
+            # At speaking pace the previous segment is usually back by the time the next one is cut
+            previous = self._texts.get(index - 1)
+        prompt = previous[-PROMPT_CHARS:] if previous else None
+        self._track(_executor.submit(_transcribe_segment, f'live-{index:03d}.wav', wav_bytes(self._fmt, pcm), prompt))
+
+    def _transcribe_whole(self, chunks):
+        response = post_transcription_stream('live-recording', self.mimetype, iter(chunks), timeout=STREAM_TIMEOUT)
+        return _transcription_text(response)
+
+    def _track(self, future):
+        with self._lock:
+            index = len(self._futures)
+            self._futures.append(future)
+        future.add_done_callback(lambda done: self._on_done(index, done))
+
+    def _on_done(self, index, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        with self._lock:
+            if self._closed:
+                return
+            if error is None:
+                self._texts[index] = future.result()
+            else:
+                self._closed = True
+        if error is not None:
+            logger.warning("⚠️ Live transcription segment %s failed: %s", index, error)
+            status = error.status_code if isinstance(error, TranscriptionError) else 502
+            self._emit('transcribe_error', {'error': str(error), 'status': status})
+            return
+        self._flush()
+
+    def _flush(self):
+        """Emit every consecutive finished segment, then the final text once all are in"""
+        # Held across the emits so two completing segments can't deliver their partials out of order
+        with self._emit_lock:
+            events = []
+            with self._lock:
+                if self._closed:
+                    return
+                while self._next_emit in self._texts:
+                    self._next_emit += 1
+                    events.append(('transcribe_partial', {
+                        'index': self._next_emit - 1,
+                        'text': self._texts[self._next_emit - 1],
+                        'transcript': self._transcript(),
+                    }))
+                if self._finished and self._next_emit == len(self._futures):
+                    self._closed = True
+                    events.append(('transcribe_final', {'text': self._transcript(), 'segments': len(self._futures)}))
+            for event, data in events:
+                self._emit(event, data)
+
+    def _transcript(self):
+        return ' '.join(text for text in (self._texts[index] for index in range(self._next_emit)) if text)
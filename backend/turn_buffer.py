@@ -0,0 +1,286 @@
+"""
+Server-side buffers that make chat turns outlive their client connection.
+
+start_turn() prepares a ChatTurn and runs it on its own thread and records every
+chunk in a TurnBuffer keyed by a turn id. Clients read the buffer rather
+than the upstream stream, so:
+
+- a client that drops mid-stream doesn't stop the turn: the reply is
+  still saved as the assistant message, and the upstream call is paid once;
+- a reconnecting client resumes from the number of chunks it already has
+  (GET /api/chat/turns/<turn_id>?offset=N, or the chat_resume Socket.IO
+  event) and gets the rest, live if the turn is still streaming.
+
+Buffers live in the process that ran the turn, so a resume has to reach
+the same worker (sticky sessions, or the Socket.IO connection itself).
+Each buffer keeps at most TURN_BUFFER_MAX_BYTES of recent chunks; a resume
+from an offset that has been dropped is refused as gone. At most
+TURN_BUFFER_MAX_TURNS turns run at once per process; past that a new turn
+is refused with 503 before its message is stored.
+
+A turn can also be started under a client-chosen idempotency key
+(start_turn_once). Repeats of the key, from the same user, attach to the
+turn it started instead of inserting another message and calling the
+upstream again: concurrent duplicates wait for the first request to
+prepare its turn, later ones replay the stored reply. Keys expire with
+their turn's buffer. Like the buffers, keys are per process: a retry that
+lands on another gunicorn worker isn't deduplicated.
+
+TURN_BUFFER_TTL_SECONDS  how long a finished turn stays resumable (default 300)
+TURN_BUFFER_MAX_TURNS    buffers kept, and turns running, per process (default 500)
+TURN_BUFFER_MAX_BYTES    chunk text kept per turn (default 256 KB)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from itertools import islice
+
+logger = logging.getLogger('glow.chat')
+
+TTL_SECONDS = float(os.getenv('TURN_BUFFER_TTL_SECONDS', '300'))
+MAX_TURNS = int(os.getenv('TURN_BUFFER_MAX_TURNS', '500'))
+MAX_BYTES = int(os.getenv('TURN_BUFFER_MAX_BYTES', str(256 * 1024)))
+# A follower gives up if a live turn produces nothing for this long (the upstream read timeout is 25s)
+FOLLOW_IDLE_SECONDS = 60
+# How long a duplicate waits for the first request with its key to start the turn
+KEY_WAIT_SECONDS = 30
+MAX_KEY_LENGTH = 255
+
+
+class ResumeGone(Exception):
+    """The requested offset has already been dropped from the buffer"""
+
+
+class KeyConflict(Exception):
+    """An idempotency key can't be honored for this request"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TurnsBusy(Exception):
+    """Every turn slot in this process is taken"""
+
+    status_code = 503
+
+
+class TurnBuffer:
+    """Chunks of one turn, appended by its runner and read by any number of followers"""
+
+    def __init__(self, turn_id, conversation_id, max_bytes=MAX_BYTES, trace=None):
+        self.turn_id = turn_id
+        self.conversation_id = conversation_id
+        self.max_bytes = max_bytes
+        self.finished_at = None
+        self._trace = trace
+        self._delivered = False
+        self._chunks = deque()
+        self._base = 0  # offset of the oldest chunk still held
+        self._bytes = 0
+        self._final = None
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self._final is not None
+
+    @property
+    def first_offset(self):
+        return self._base
+
+    def append(self, content):
+        with self._cond:
+            self._chunks.append(content)
+            self._bytes += len(content)
+            while self._bytes > self.max_bytes and len(self._chunks) > 1:
+                self._bytes -= len(self._chunks.popleft())
+                self._base += 1
+            self._cond.notify_all()
+
+    def delivered(self):
+        """Called by a transport after writing a chunk to its client; the first call is a trace milestone"""
+        with self._cond:
+            if self._delivered:
+                return
+            self._delivered = True
+        if self._trace is not None:
+            self._trace.add_event('first_client_chunk')
+
+    def finish(self, event):
+        """Record the closing 'complete' or 'error' event and wake every follower"""
+        with self._cond:
+            if self._final is None:
+                self._final = dict(event, turn_id=self.turn_id)
+                self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def follow(self, offset=0):
+        """Yield chunk events from `offset` on, waiting for new ones, then the closing event"""
+        index = offset
+        while True:
+            with self._cond:
+                while index >= self._base + len(self._chunks) and self._final is None:
+                    if not self._cond.wait(FOLLOW_IDLE_SECONDS):
+                        raise TimeoutError(f'Turn {self.turn_id} stalled')
+                if index < self._base:
+                    raise ResumeGone(f'Chunks before {self._base} are no longer buffered')
+                pending = list(islice(self._chunks, index - self._base, None))
+                final = self._final
+            if not pending:
+                yield final
+                return
+            for content in pending:
+                yield {'content': content, 'type': 'chunk'}
+            index += len(pending)
+
+
+_turns = OrderedDict()
+_turns_lock = threading.Lock()
+# One slot per running turn, taken before the turn is prepared and freed by its runner
+_slots = threading.BoundedSemaphore(MAX_TURNS)
+# (user, idempotency key) -> KeyClaim, dropped along with the claimed turn
+_keys = {}
+
+
+def _prune(now):
+    """Drop expired finished turns, then the oldest finished ones while over MAX_TURNS"""
+    for turn_id, buffer in list(_turns.items()):
+        if buffer.finished_at is not None and now - buffer.finished_at > TTL_SECONDS:
+            del _turns[turn_id]
+    if len(_turns) > MAX_TURNS:
+        for turn_id, buffer in list(_turns.items()):
+            if len(_turns) <= MAX_TURNS:
+                break
+            if buffer.done:
+                del _turns[turn_id]
+    for key, stake in list(_keys.items()):
+        if stake.future.done() and stake.turn_id not in _turns:
+            del _keys[key]
+
+
+def get_turn(turn_id):
+    with _turns_lock:
+        return _turns.get(turn_id)
+
+
+def _run(turn, buffer):
+    try:
+        for event in turn.events():
+            if event['type'] == 'chunk':
+                buffer.append(event['content'])
+            else:
+                buffer.finish(event)
+    except Exception as e:
+        # events() reports its own failures as an 'error' event; this is the last resort
+        logger.exception("💥 Turn %s runner failed: %s", buffer.turn_id, e)
+    finally:
+        buffer.finish({'type': 'error', 'error': 'The reply was interrupted. Please try again.'})
+        _slots.release()
+
+
+def start_turn(prepare):
+    """
+    Prepare a ChatTurn, run it in the background and return the buffer its
+    chunks go to; raises TurnsBusy, before preparing, when no slot is free
+    """
+    if not _slots.acquire(blocking=False):
+        logger.warning("🚦 Refusing a turn: %s already running", MAX_TURNS)
+        raise TurnsBusy('Too many replies in progress. Please try again shortly.')
+    try:
+        turn = prepare()
+    except BaseException:
+        _slots.release()
+        raise
+    buffer = TurnBuffer(uuid.uuid4().hex, turn.conversation_id, trace=getattr(turn, 'trace', None))
+    with _turns_lock:
+        _prune(time.monotonic())
+        _turns[buffer.turn_id] = buffer
+    # Not a daemon: a graceful worker shutdown waits for in-flight turns to be saved
+    threading.Thread(target=_run, args=(turn, buffer), name=f'turn-{buffer.turn_id[:8]}').start()
+    return buffer
+
+
+class KeyClaim:
+    """
+    A request's stake in an idempotency key: either the turn another request
+    started (or is preparing) under it, or ownership of starting it.
+    """
+
+    def __init__(self, key, fingerprint, future, owner):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.future = future
+        self.owner = owner
+        self.turn_id = None
+
+    def result(self):
+        try:
+            return self.future.result(timeout=KEY_WAIT_SECONDS)
+        except TimeoutError:
+            raise KeyConflict('A request with this Idempotency-Key is still being processed', 409) from None
+
+    def settle(self, buffer=None, error=None):
+        if not self.owner:
+            return
+        with _turns_lock:
+            if error is None:
+                self.turn_id = buffer.turn_id
+            else:
+                # A failed request didn't start anything, so a corrected retry may reuse the key
+                _keys.pop(self.key, None)
+        if error is None:
+            self.future.set_result(buffer)
+        else:
+            self.future.set_exception(error)
+
+
+def _fingerprint(data):
+    body = {k: v for k, v in data.items() if k not in ('client_ref', 'idempotency_key')}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def claim_key(idempotency_key, data):
+    """Return a KeyClaim on this user's key that joins an existing turn or owns a new one"""
+    if not isinstance(idempotency_key, str) or not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise KeyConflict(f'Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters', 400)
+    key = (str(data.get('user_id', 'default_user')), idempotency_key)
+    fingerprint = _fingerprint(data)
+    with _turns_lock:
+        stake = _keys.get(key)
+        if stake is None:
+            stake = _keys[key] = KeyClaim(key, fingerprint, Future(), owner=True)
+            return stake
+    if stake.fingerprint != fingerprint:
+        raise KeyConflict('Idempotency-Key was already used for a different request', 422)
+    return KeyClaim(key, fingerprint, stake.future, owner=False)
+
+
+def start_turn_once(idempotency_key, data, prepare):
+    """
+    start_turn(prepare) unless this key already started a turn; returns
+    (buffer, replayed). Without a key every call starts a new turn.
+    """
+    if idempotency_key is None:
+        return start_turn(prepare), False
+    stake = claim_key(idempotency_key, data)
+    if not stake.owner:
+        buffer = stake.result()
+        if buffer.first_offset:
+            raise KeyConflict('The reply for this Idempotency-Key is no longer buffered', 410)
+        logger.info("🔁 Idempotency-Key repeat attached to turn %s", buffer.turn_id)
+        return buffer, True
+    try:
+        buffer = start_turn(prepare)
+    except Exception as e:
+        stake.settle(error=e)
+        raise
+    stake.settle(buffer)
+    return buffer, False
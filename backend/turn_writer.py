@@ -0,0 +1,164 @@
+"""
+Batched write path for the end of a chat turn.
+
+After a streamed reply finishes, a turn needs to insert the assistant message,
+touch the conversation (title + updated_at) and optionally insert a memory
+(or rewrite the near-duplicate memory it adds detail to).
+On PostgreSQL these statements are sent through psycopg3 pipeline mode as
+server-side prepared statements, so the whole turn (BEGIN, inserts, update,
+COMMIT) costs a single network round trip instead of one per commit.
+Other drivers fall back to a single SQLAlchemy transaction.
+
+The memory is the only optional write: if the combined transaction fails
+with one, the turn is written again without it, so a memory problem (a
+constraint error, say) never costs the user the reply.
+"""
+
+import logging
+import re
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+
+logger = logging.getLogger('glow.turn_writer')
+
+# Fixed set of hot statements, written with psycopg named placeholders
+INSERT_MESSAGE_SQL = (
+    "INSERT INTO messages (id, conversation_id, role, content, created_at, edited) "
+    "VALUES (%(id)s, %(conversation_id)s, %(role)s, %(content)s, %(created_at)s, false)"
+)
+INSERT_MEMORY_SQL = (
+    "INSERT INTO user_memories (id, user_id, fact, source_conversation_id, is_displayed, created_at) "
+    "VALUES (%(id)s, %(user_id)s, %(fact)s, %(source_conversation_id)s, true, %(created_at)s)"
+)
+# A merged fact is shown again even if the user had hidden the memory it
+# extends, and a merge target deleted meanwhile is simply inserted again
+MERGE_MEMORY_SQL = (
+    "INSERT INTO user_memories (id, user_id, fact, source_conversation_id, is_displayed, created_at) "
+    "VALUES (%(id)s, %(user_id)s, %(fact)s, %(source_conversation_id)s, true, %(created_at)s) "
+    "ON CONFLICT (id) DO UPDATE SET fact = EXCLUDED.fact, "
+    "source_conversation_id = EXCLUDED.source_conversation_id, is_displayed = true, "
+    "created_at = EXCLUDED.created_at"
+)
+TOUCH_CONVERSATION_SQL = (
+    "UPDATE conversations SET title = COALESCE(%(title)s, title), updated_at = %(updated_at)s "
+    "WHERE id = %(id)s"
+)
+
+_NAMED_PARAM = re.compile(r'%\((\w+)\)s')
+
+
+def _to_sqlalchemy(sql):
+    """Convert psycopg %(name)s placeholders to SQLAlchemy :name binds"""
+    return _NAMED_PARAM.sub(r':\1', sql)
+
+
+def _psycopg_connection(raw_connection):
+    """Return the underlying psycopg3 connection, or None for other drivers"""
+    driver_connection = getattr(raw_connection, 'driver_connection', None)
+    if driver_connection is not None and hasattr(driver_connection, 'pipeline'):
+        return driver_connection
+    return None
+
+
+def build_turn_statements(conversation_id, messages=(), title=None, memory=None, now=None, merge_memory_id=None):
+    """
+    Build the (sql, params) list for a chat turn.
+
+    messages: iterable of (role, content) tuples to append to the conversation
+    title:    new conversation title, or None to keep the current one
+    memory:   (user_id, fact) tuple, or None
+    merge_memory_id: existing memory whose fact `memory` replaces instead of
+              being inserted (it moves to the top, as if just saved)
+
+    Returns (statements, records) where records holds the dicts of the rows
+    created so callers can emit them without re-reading the database.
+    """
+    now = now or datetime.utcnow()
+    statements = []
+    records = {'messages': [], 'memory': None}
+
+    for role, content in messages:
+        params = {
+            'id': str(uuid.uuid4()),
+            'conversation_id': conversation_id,
+            'role': role,
+            'content': content,
+            'created_at': now,
+        }
+        statements.append((INSERT_MESSAGE_SQL, params))
+        records['messages'].append({
+            'id': params['id'],
+            'conversation_id': conversation_id,
+            'role': role,
+            'content': content,
+            'created_at': now.isoformat(),
+            'edited': False
+        })
+
+    statements.append((TOUCH_CONVERSATION_SQL, {'id': conversation_id, 'title': title, 'updated_at': now}))
+
+    if memory:
+        user_id, fact = memory
+        params = {
+            'id': merge_memory_id or str(uuid.uuid4()),
+            'user_id': user_id,
+            'fact': fact,
+            'source_conversation_id': conversation_id,
+            'created_at': now,
+        }
+        statements.append((MERGE_MEMORY_SQL if merge_memory_id else INSERT_MEMORY_SQL, params))
+        records['memory'] = {
+            'id': params['id'],
+            'user_id': user_id,
+            'fact': fact,
+            'source_conversation_id': conversation_id,
+            'is_displayed': True,
+            'created_at': now.isoformat(),
+            'merged': bool(merge_memory_id)
+        }
+
+    return statements, records
+
+
+def execute_statements(engine, statements):
+    """Run statements in one transaction, pipelined when the driver is psycopg3"""
+    raw_connection = engine.raw_connection()
+    try:
+        conn = _psycopg_connection(raw_connection)
+        if conn is None:
+            raw_connection.close()
+            raw_connection = None
+            with engine.begin() as connection:
+                for sql, params in statements:
+                    connection.execute(text(_to_sqlalchemy(sql)), params)
+            return
+
+        try:
+            with conn.pipeline():
+                with conn.cursor() as cursor:
+                    for sql, params in statements:
+                        cursor.execute(sql, params, prepare=True)
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        if raw_connection is not None:
+            raw_connection.close()  # Return the connection to the pool
+
+
+def write_turn(engine, conversation_id, messages=(), title=None, memory=None, merge_memory_id=None):
+    """Persist a chat turn's writes in a single round trip; returns the created records"""
+    statements, records = build_turn_statements(conversation_id, messages, title, memory,
+                                                 merge_memory_id=merge_memory_id)
+    try:
+        execute_statements(engine, statements)
+    except Exception as e:
+        if not memory:
+            raise
+        logger.warning("⚠️ Turn write with memory failed, saving the reply without it: %s", e)
+        statements, records = build_turn_statements(conversation_id, messages, title)
+        execute_statements(engine, statements)
+    return records
@@ -19,6 +19,27 @@ interface Message {
   edited?: boolean;
 }
 
+// Resends of the same message after a dropped connection (before any response)
+const SEND_RETRIES = 2;
+
+// One key per message send, reused by its retries so the server attaches them to the turn it started
+const newIdempotencyKey = (): string =>
+  typeof crypto !== 'undefined' && typeof crypto.randomUUID === 'function'
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+// fetch that resends on network errors; only safe with an Idempotency-Key header
+const fetchWithRetries = async (url: string, init: RequestInit): Promise<Response> => {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await fetch(url, init);
+    } catch (networkError) {
+      if (attempt >= SEND_RETRIES) throw networkError;
+      await new Promise(resolve => setTimeout(resolve, 500 * (attempt + 1)));
+    }
+  }
+};
+
 interface NewChatInterfaceProps {
   currentUser?: any;
   onLogout: () => void;
@@ -181,6 +202,8 @@ const NewChatInterface: React.FC<NewChatInterfaceProps> = ({ currentUser, onLogo
       timestamp: new Date()
     };
 
+    const idempotencyKey = newIdempotencyKey();
+
     setMessages(prev => [...prev, userMessage]);
     setInputText('');
     setSelectedFiles([]);
@@ -194,10 +217,12 @@ const NewChatInterface: React.FC<NewChatInterfaceProps> = ({ currentUser, onLogo
 
     // Call streaming backend API
     try {
-      const response = await fetch(`${config.API_URL}/api/chatOpenAI`, {
+      const response = await fetchWithRetries(`${config.API_URL}/api/chatOpenAI`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          // Same key on every attempt: a request that did reach the server isn't run twice
+          'Idempotency-Key': idempotencyKey,
         },
         body: JSON.stringify({
           message: inputText,
@@ -555,7 +555,7 @@ const ProfilePage: React.FC<ProfilePageProps> = ({ onLogout, currentUser, sideba
         
         // Show a brief notification
         const notification = document.createElement('div');
-        notification.textContent = '✨ New memory added!';
+        notification.textContent = data.memory?.merged ? '✨ Memory updated!' : '✨ New memory added!';
         notification.style.cssText = `
           position: fixed;
           top: 20px;